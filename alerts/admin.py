@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import AlertMatch, SavedSearch
+
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ('email', 'job_title', 'company', 'location', 'frequency', 'confirmed', 'active', 'last_sent_at')
+    list_filter = ('frequency', 'confirmed', 'active')
+    search_fields = ('email', 'job_title', 'company')
+    readonly_fields = ('terms', 'token')
+
+
+@admin.register(AlertMatch)
+class AlertMatchAdmin(admin.ModelAdmin):
+    list_display = ('search', 'job_id', 'created_at', 'sent_at')
+    list_select_related = ('search',)
+    raw_id_fields = ('search',)
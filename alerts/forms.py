@@ -0,0 +1,13 @@
+from django import forms
+
+from .models import SavedSearch
+
+
+class SavedSearchForm(forms.ModelForm):
+    class Meta:
+        model = SavedSearch
+        fields = ['email', 'job_title', 'company', 'location', 'function', 'schedule', 'frequency']
+        widgets = {
+            'email': forms.EmailInput(attrs={'class': 'form-control', 'placeholder': 'Your email'}),
+            'frequency': forms.Select(attrs={'class': 'form-control'}),
+        }
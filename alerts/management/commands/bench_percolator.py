@@ -0,0 +1,98 @@
+# alerts/management/commands/bench_percolator.py
+
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from alerts.percolator import Percolator, job_terms, query_terms
+
+TITLE_WORDS = (
+    'senior', 'junior', 'lead', 'software', 'data', 'backend', 'frontend', 'sales', 'marketing', 'finance',
+    'engineer', 'developer', 'analyst', 'manager', 'specialist', 'accountant', 'designer', 'consultant',
+    'operator', 'assistant', 'hr', 'legal', 'driver', 'teacher', 'nurse', 'cashier', 'logistics', 'support',
+)
+# Long tail of rarer title words (skills, products, specialisms)
+RARE_WORDS = tuple(f'skill{i}' for i in range(1000))
+COMPANIES = [f'Company {i}' for i in range(2000)]
+LOCATIONS = ('Baku', 'Ganja', 'Sumgait', 'Lankaran', 'Shaki', 'Quba', 'Remote')
+SCHEDULES = ('Full-time', 'Part-time', 'Contract')
+
+
+def title_words(rng, count):
+    return ' '.join(rng.choice(RARE_WORDS if rng.random() < 0.4 else TITLE_WORDS) for _ in range(count))
+
+
+def synthetic_searches(count, rng):
+    for search_id in range(count):
+        title = title_words(rng, rng.randint(1, 2))
+        if rng.random() < 0.3:
+            # Some visitors type the start of a word
+            title = title[:rng.randint(3, 6)] if len(title) > 3 else title
+        yield search_id, query_terms(
+            title,
+            rng.choice(COMPANIES) if rng.random() < 0.2 else '',
+            rng.choice(LOCATIONS) if rng.random() < 0.5 else '',
+            '',
+            rng.choice(SCHEDULES) if rng.random() < 0.1 else '',
+        )
+
+
+def synthetic_job(rng):
+    return job_terms(
+        title_words(rng, rng.randint(2, 4)), rng.choice(COMPANIES), rng.choice(LOCATIONS),
+        None, rng.choice(SCHEDULES),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Measures percolating new jobs against synthetic saved searches, against checking every search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--searches', type=int, default=100000)
+        parser.add_argument('--jobs', type=int, default=10000)
+        parser.add_argument('--brute-force-jobs', type=int, default=200, help='Jobs to time the full scan with')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        searches = list(synthetic_searches(options['searches'], rng))
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        percolator = Percolator()
+        for search_id, terms in searches:
+            percolator.add(search_id, terms)
+        build = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(
+            f"{len(percolator)} searches indexed under {len(percolator.index)} anchor terms "
+            f"in {build:.2f}s, {size / 2**20:.1f} MB"
+        )
+
+        jobs = [synthetic_job(rng) for _ in range(options['jobs'])]
+        samples, matches = [], 0
+        for terms in jobs:
+            start = time.perf_counter()
+            matches += len(percolator.match(terms))
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        self.stdout.write(
+            f"percolator: {len(jobs)} jobs, {matches / len(jobs):.1f} matches per job, "
+            f"p50 {statistics.median(samples) * 1e6:.0f} us  p99 {samples[int(len(samples) * 0.99) - 1] * 1e6:.0f} us  "
+            f"{len(jobs) / sum(samples):.0f} jobs/s"
+        )
+
+        search_terms = [(search_id, frozenset(terms)) for search_id, terms in searches]
+        sample = jobs[:options['brute_force_jobs']]
+        start = time.perf_counter()
+        for terms in sample:
+            expected = {search_id for search_id, query in search_terms if query <= terms}
+            if expected != set(percolator.match(terms)):
+                self.stderr.write("Percolator and full scan disagree")
+                raise SystemExit(1)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"full scan:  {len(sample) / elapsed:.0f} jobs/s (results agree)")
@@ -0,0 +1,38 @@
+# alerts/management/commands/run_alerts.py
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from alerts.worker import AlertWorker
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Matches new jobs against saved searches and sends alert digests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between passes')
+        parser.add_argument('--once', action='store_true', help='Run one pass and exit')
+
+    def handle(self, *args, **options):
+        worker = AlertWorker()
+        while True:
+            start = time.monotonic()
+            try:
+                counts = worker.run_once()
+            except Exception:
+                # Keep the worker alive; the next pass retries from the same cursor
+                logger.exception("Alert pass failed")
+                if options['once']:
+                    raise
+            else:
+                self.stdout.write(
+                    f"{len(worker.percolator)} searches loaded ({counts['searches']} changed), "
+                    f"{counts['matched']} matches, {counts['sent']} digests in {time.monotonic() - start:.1f}s"
+                )
+            if options['once']:
+                return
+            time.sleep(options['interval'])
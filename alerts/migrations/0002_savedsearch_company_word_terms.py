@@ -0,0 +1,51 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+# Frozen copies of jobs.models.company_key and alerts.percolator.words as of
+# this migration
+LEGAL_FORMS = {
+    'llc', 'ltd', 'limited', 'inc', 'corp', 'co', 'plc', 'gmbh', 'jsc', 'ojsc', 'cjsc', 'mmc', 'asc', 'qsc', 'ssc',
+}
+STOPWORDS = {'and', 'or', 'the', 'of', 'in', 'for', 'with', 'at', 'to', 'an', 've', 'ile', 'uzre'}
+
+
+def _company_key(name):
+    words = re.sub(r'\W+', ' ', (name or '').casefold()).split()
+    core = [word for word in words if word not in LEGAL_FORMS]
+    return ' '.join(core or words)[:500]
+
+
+def _words(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return [word for word in re.split(r'\W+', text) if len(word) > 1 and word not in STOPWORDS]
+
+
+def company_word_terms(apps, schema_editor):
+    # Company terms were the whole key ("c:kapital bank"); they are now its
+    # words, matched against prefixes of the job's company names
+    SavedSearch = apps.get_model('alerts', 'SavedSearch')
+    batch = []
+    for search in SavedSearch.objects.exclude(company='').only('id', 'company', 'terms').iterator(chunk_size=2000):
+        key = _company_key(search.company)
+        company = {f'c:{word}' for word in _words(key)} or ({f'c:{key}'} if key else set())
+        search.terms = sorted({term for term in search.terms if not term.startswith('c:')} | company)
+        batch.append(search)
+        if len(batch) >= 2000:
+            SavedSearch.objects.bulk_update(batch, ['terms'])
+            batch = []
+    if batch:
+        SavedSearch.objects.bulk_update(batch, ['terms'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(company_word_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+import uuid
+
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+
+from jobs.models import JobPost
+from . import percolator
+
+
+class SavedSearch(models.Model):
+    """A job list query a visitor wants emailed digests for.
+
+    `terms` is the query in percolator form (alerts.percolator.query_terms);
+    a job matches when it has every term.
+    """
+    HOURLY = 'hourly'
+    DAILY = 'daily'
+    FREQUENCY_CHOICES = [(HOURLY, 'Hourly'), (DAILY, 'Daily')]
+
+    email = models.EmailField()
+    job_title = models.CharField(max_length=255, blank=True)
+    company = models.CharField(max_length=255, blank=True)
+    location = models.CharField(max_length=255, blank=True)
+    function = models.CharField(max_length=255, blank=True)
+    schedule = models.CharField(max_length=255, blank=True)
+    terms = ArrayField(models.CharField(max_length=300), default=list, editable=False)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default=DAILY)
+    # Secret for the confirm and unsubscribe links
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    confirmed = models.BooleanField(default=False)
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    last_sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'saved searches'
+
+    def __str__(self):
+        return f'{self.email}: {self.describe()}'
+
+    def describe(self):
+        parts = [self.job_title, self.company, self.location, self.function, self.schedule]
+        return ', '.join(part for part in parts if part) or 'all jobs'
+
+    def save(self, *args, **kwargs):
+        self.terms = percolator.query_terms(self.job_title, self.company, self.location, self.function, self.schedule)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'terms', 'updated_at'}
+        super().save(*args, **kwargs)
+
+
+class AlertMatch(models.Model):
+    """A job that matched a saved search, waiting for (or included in) a digest."""
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='matches')
+    # No database constraint: jobs move to the archive tables with raw SQL
+    job = models.ForeignKey(JobPost, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['search', 'job'], name='alerts_alertmatch_search_job_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['search'], condition=models.Q(sent_at__isnull=True), name='alerts_alertmatch_unsent_idx'),
+        ]
+
+
+class AlertCursor(models.Model):
+    """How far the alert worker has percolated jobs, by JobPost.updated_at."""
+    name = models.CharField(max_length=50, primary_key=True)
+    position = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.name} at {self.position}'
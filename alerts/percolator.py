@@ -0,0 +1,138 @@
+# alerts/percolator.py
+#
+# Matching new jobs against saved searches without running the searches.
+#
+# A saved search becomes a set of terms ("w:engineer", "c:kapital bank",
+# "l:baku", ...) and matches a job that has all of them. The Percolator
+# keeps a reverse index from one anchor term per search, the term least
+# likely to be on a job, to the searches anchored on it. Percolating a job
+# looks up the job's own terms in that index and checks the few candidate
+# searches in full, so the cost follows the number of plausible searches,
+# not the number of saved ones.
+#
+# Title words match as whole words or, from three letters, as word
+# prefixes, so "dev" finds "Developer" as the job list search does. Company
+# words match the same way against the job's company name and every name
+# its employer is known by (jobs.models.CompanyAlias), so "Kapital" finds
+# jobs at "Kapital Bank" as the job list's company filter does. Function
+# and schedule match as normalized text, locations by gazetteer place.
+import re
+import unicodedata
+from collections import defaultdict
+
+from jobs.geo import gazetteer_lookup, location_key
+from jobs.models import company_key
+
+STOPWORDS = {'and', 'or', 'the', 'of', 'in', 'for', 'with', 'at', 'to', 'an', 've', 'ile', 'uzre'}
+MIN_PREFIX = 3
+# Anchor preference when a search has several terms, rarest kind first:
+# thousands of companies and title words, a handful of schedules and places
+_KIND_RANK = {'c': 0, 'w': 1, 'f': 2, 's': 3, 'l': 4}
+
+
+def words(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return [word for word in re.split(r'\W+', text) if len(word) > 1 and word not in STOPWORDS]
+
+
+def place_term(location):
+    """Places the gazetteer knows match by coordinates, so "Bakı" finds "Baku, Azerbaijan"."""
+    point = gazetteer_lookup(location) if location else None
+    if point:
+        return f'l:{point[0]:.4f},{point[1]:.4f}'
+    return f'l:{location_key(location)}' if location_key(location) else None
+
+
+def _field_terms(location, function, schedule):
+    terms = {place_term(location)}
+    for kind, value in (('f', function), ('s', schedule)):
+        if location_key(value):
+            terms.add(f'{kind}:{location_key(value)}')
+    terms.discard(None)
+    return terms
+
+
+def _prefix_terms(kind, text):
+    terms = set()
+    for word in words(text):
+        terms.add(f'{kind}:{word}')
+        terms.update(f'{kind}:{word[:n]}' for n in range(MIN_PREFIX, len(word)))
+    return terms
+
+
+def company_terms(company):
+    """Terms a job's company must have: the words of its key, or the whole key if it has none."""
+    key = company_key(company)
+    if not key:
+        return set()
+    return {f'c:{word}' for word in words(key)} or {f'c:{key}'}
+
+
+def query_terms(job_title='', company='', location='', function='', schedule=''):
+    """Terms a job must have to match the query, sorted."""
+    terms = {f'w:{word}' for word in words(job_title)}
+    return sorted(terms | company_terms(company) | _field_terms(location, function, schedule))
+
+
+def job_terms(title, company, location, function=None, schedule=None, company_names=()):
+    """Terms of a job: every title and company word and their prefixes, plus the other fields.
+
+    `company_names` are the other names of the job's employer (its canonical
+    name and alias keys).
+    """
+    terms = _field_terms(location, function, schedule)
+    terms |= _prefix_terms('w', title)
+    for name in (company, *company_names):
+        key = company_key(name)
+        if key:
+            terms.add(f'c:{key}')
+            terms |= _prefix_terms('c', key)
+    return terms
+
+
+def anchor(terms):
+    return min(terms, key=lambda term: (_KIND_RANK[term[0]], -len(term), term))
+
+
+class Percolator:
+    """Reverse index of saved searches by anchor term."""
+
+    def __init__(self):
+        self.searches = {}
+        self.index = defaultdict(set)
+        # Searches without terms match every job
+        self.match_all = set()
+
+    def __len__(self):
+        return len(self.searches)
+
+    def add(self, search_id, terms):
+        self.remove(search_id)
+        terms = frozenset(terms)
+        self.searches[search_id] = terms
+        if terms:
+            self.index[anchor(terms)].add(search_id)
+        else:
+            self.match_all.add(search_id)
+
+    def remove(self, search_id):
+        terms = self.searches.pop(search_id, None)
+        if terms is None:
+            return
+        if terms:
+            key = anchor(terms)
+            self.index[key].discard(search_id)
+            if not self.index[key]:
+                del self.index[key]
+        else:
+            self.match_all.discard(search_id)
+
+    def match(self, terms):
+        """Ids of the searches a job with `terms` matches."""
+        matched = list(self.match_all)
+        for term in terms:
+            for search_id in self.index.get(term, ()):
+                if self.searches[search_id] <= terms:
+                    matched.append(search_id)
+        return matched
@@ -0,0 +1,142 @@
+from django.core import mail
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.models import CompanyAlias, JobPost
+from users.models import CustomUser
+from .models import AlertMatch, SavedSearch
+from .percolator import Percolator, job_terms, query_terms
+from .worker import AlertWorker
+
+
+class PercolatorTests(SimpleTestCase):
+
+    def matches(self, job, **query):
+        percolator = Percolator()
+        percolator.add(1, query_terms(**query))
+        return percolator.match(job) == [1]
+
+    def test_title_words_match_as_prefixes(self):
+        job = job_terms('Senior Python Developer', 'Kapital Bank', 'Baku')
+
+        self.assertTrue(self.matches(job, job_title='python dev'))
+        self.assertTrue(self.matches(job, job_title='Developer, Senior'))
+        self.assertFalse(self.matches(job, job_title='java developer'))
+
+    def test_company_words_match_as_prefixes(self):
+        job = job_terms('Accountant', 'Kapital Bank OJSC', 'Baku')
+
+        self.assertTrue(self.matches(job, company='Kapital'))
+        self.assertTrue(self.matches(job, company='kapital bank'))
+        self.assertTrue(self.matches(job, company='Kap'))
+        self.assertFalse(self.matches(job, company='Pasha Bank'))
+
+    def test_company_aliases_match(self):
+        job = job_terms('Accountant', 'KB', 'Baku', company_names=['Kapital Bank', 'kapitalbank'])
+
+        self.assertTrue(self.matches(job, company='Kapital'))
+        self.assertTrue(self.matches(job, company='KB'))
+
+    def test_every_term_is_required(self):
+        job = job_terms('Accountant', 'Kapital Bank', 'Baku', schedule='Full time')
+
+        self.assertTrue(self.matches(job, job_title='accountant', schedule='full-time'))
+        self.assertFalse(self.matches(job, job_title='accountant', schedule='part time'))
+
+    def test_empty_query_matches_everything(self):
+        self.assertTrue(self.matches(job_terms('Accountant', 'Kapital Bank', 'Baku')))
+
+    def test_remove(self):
+        percolator = Percolator()
+        percolator.add(1, query_terms(company='Kapital'))
+        percolator.remove(1)
+
+        self.assertEqual(percolator.match(job_terms('Accountant', 'Kapital Bank', 'Baku')), [])
+        self.assertEqual(len(percolator), 0)
+
+
+class AlertWorkerTests(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='hr@example.com')
+
+    def make_job(self, title, company):
+        return JobPost.objects.create(
+            title=title, description='', company=company, location='Baku', posted_by=self.user,
+            apply_link=f'https://jobs.example.com/{title.lower()}',
+        )
+
+    def search(self, confirmed=True, **query):
+        return SavedSearch.objects.create(email='visitor@example.com', confirmed=confirmed, **query)
+
+    def test_matching_jobs_are_sent_once(self):
+        search = self.search(job_title='python', company='Kapital')
+        job = self.make_job('Python Developer', 'Kapital Bank')
+        self.make_job('Java Developer', 'Kapital Bank')
+
+        result = AlertWorker().run_once()
+
+        self.assertEqual((result['matched'], result['sent']), (1, 1))
+        self.assertEqual(list(AlertMatch.objects.values_list('search_id', 'job_id')), [(search.id, job.id)])
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['visitor@example.com'])
+        self.assertIn('Python Developer', message.body)
+        self.assertEqual(message.extra_headers['List-Unsubscribe-Post'], 'List-Unsubscribe=One-Click')
+
+        # Nothing new: no second digest
+        self.assertEqual(AlertWorker().run_once()['sent'], 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_company_matches_through_aliases(self):
+        self.search(company='Kapital')
+        job = self.make_job('Accountant', 'KB')
+        CompanyAlias.objects.create(key='kapital bank', company=job.employer)
+
+        AlertWorker().run_once()
+
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_unconfirmed_and_unsubscribed_searches_get_nothing(self):
+        self.search(confirmed=False)
+        self.search(active=False)
+        self.make_job('Python Developer', 'Kapital Bank')
+
+        self.assertEqual(AlertWorker().run_once()['matched'], 0)
+        self.assertEqual(mail.outbox, [])
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class ConfirmUnsubscribeTests(TestCase):
+
+    def setUp(self):
+        self.search = SavedSearch.objects.create(email='visitor@example.com', job_title='python')
+
+    def test_confirm_link_only_asks(self):
+        url = reverse('alert_confirm', args=[self.search.token])
+
+        response = self.client.get(url)
+        self.assertContains(response, '<form method="post"')
+        self.search.refresh_from_db()
+        self.assertFalse(self.search.confirmed)
+
+        self.client.post(url)
+        self.search.refresh_from_db()
+        self.assertTrue(self.search.confirmed)
+
+    def test_unsubscribe_link_only_asks(self):
+        url = reverse('alert_unsubscribe', args=[self.search.token])
+
+        self.client.get(url)
+        self.search.refresh_from_db()
+        self.assertTrue(self.search.active)
+
+    def test_one_click_unsubscribe(self):
+        client = self.client_class(enforce_csrf_checks=True)
+
+        response = client.post(reverse('alert_unsubscribe', args=[self.search.token]),
+                               {'List-Unsubscribe': 'One-Click'})
+
+        self.assertEqual(response.status_code, 200)
+        self.search.refresh_from_db()
+        self.assertFalse(self.search.active)
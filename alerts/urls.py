@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('subscribe/', views.subscribe, name='alert_subscribe'),
+    path('<uuid:token>/confirm/', views.confirm, name='alert_confirm'),
+    path('<uuid:token>/unsubscribe/', views.unsubscribe, name='alert_unsubscribe'),
+]
@@ -0,0 +1,78 @@
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST
+
+from .forms import SavedSearchForm
+from .models import SavedSearch
+
+logger = logging.getLogger(__name__)
+
+MAX_SEARCHES_PER_EMAIL = 10
+
+
+def _message(request, title, text, status=200, button=None):
+    return render(request, 'alerts/message.html', {'title': title, 'text': text, 'button': button}, status=status)
+
+
+@require_POST
+def subscribe(request):
+    """Save the job list query from the alert form and send the confirmation email."""
+    form = SavedSearchForm(request.POST)
+    if not form.is_valid():
+        return _message(request, "Job alert not saved", "Please go back and enter a valid email address.", status=400)
+
+    email = form.cleaned_data['email']
+    if SavedSearch.objects.filter(email__iexact=email, active=True).count() >= MAX_SEARCHES_PER_EMAIL:
+        return _message(
+            request, "Job alert not saved",
+            f"You already have {MAX_SEARCHES_PER_EMAIL} job alerts. Unsubscribe from one first.", status=400)
+
+    search = form.save()
+    context = {
+        'search': search,
+        'confirm_url': settings.SITE_URL + reverse('alert_confirm', args=[search.token]),
+        'unsubscribe_url': settings.SITE_URL + reverse('alert_unsubscribe', args=[search.token]),
+    }
+    try:
+        send_mail('Confirm your job alert', render_to_string('alerts/email/confirm.txt', context), None, [search.email])
+    except Exception:
+        logger.exception("Couldn't send alert confirmation for saved search %s", search.id)
+        return _message(request, "Job alert not saved", "We couldn't send the confirmation email. Please try again later.", status=503)
+    return _message(
+        request, "Check your inbox",
+        f"We sent a confirmation link to {search.email}. Alerts for {search.describe()} start once you confirm.")
+
+
+# Mail scanners fetch the links in emails, so following a link only shows a
+# button and the change itself takes a POST
+@require_http_methods(['GET', 'POST'])
+def confirm(request, token):
+    search = get_object_or_404(SavedSearch, token=token)
+    if request.method == 'GET':
+        return _message(request, "Confirm your job alert", f"Email me new jobs for {search.describe()}.",
+                        button="Confirm")
+    if not search.confirmed or not search.active:
+        search.confirmed = search.active = True
+        search.save(update_fields=['confirmed', 'active'])
+    return _message(request, "Job alert confirmed", f"We'll email you new jobs for {search.describe()} {search.get_frequency_display().lower()}.")
+
+
+# Mail clients send one-click unsubscribes (RFC 8058) as a POST without a
+# CSRF token; the token in the URL is the secret
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def unsubscribe(request, token):
+    search = get_object_or_404(SavedSearch, token=token)
+    if request.method == 'GET':
+        return _message(request, "Unsubscribe", f"Stop emailing me alerts for {search.describe()}.",
+                        button="Unsubscribe")
+    if search.active:
+        search.active = False
+        search.save(update_fields=['active'])
+    return _message(request, "Unsubscribed", f"You won't get any more alerts for {search.describe()}.")
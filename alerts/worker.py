@@ -0,0 +1,178 @@
+# alerts/worker.py
+#
+# The alert worker, run by `manage.py run_alerts`:
+#
+#   1. sync the in-memory Percolator with saved searches changed since the
+#      last pass (SavedSearch.updated_at)
+#   2. percolate listed jobs changed since the last pass (JobPost.updated_at,
+#      indexed), which catches single posts, bulk ingests and crawls alike,
+#      and store the pairs as AlertMatch rows
+#   3. send each due search one digest of its unsent matches
+#
+# Steps 1 and 2 re-read a short overlap, and AlertMatch is unique per search
+# and job, so a job committed late is still seen and never alerted twice.
+# Digests are claimed with SKIP LOCKED, so several workers can send.
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs import queries
+from jobs.models import Company, CompanyAlias
+from mailer.models import OutboundEmail
+from .models import AlertCursor, AlertMatch, SavedSearch
+from .percolator import Percolator, job_terms
+
+logger = logging.getLogger(__name__)
+
+OVERLAP = timedelta(minutes=2)
+# Jobs first posted longer ago than this are old news, even if just changed
+MAX_JOB_AGE = timedelta(days=7)
+JOB_BATCH_SIZE = 1000
+DIGEST_BATCH_SIZE = 50
+MAX_JOBS_PER_DIGEST = 20
+PERIODS = {SavedSearch.HOURLY: timedelta(hours=1), SavedSearch.DAILY: timedelta(days=1)}
+JOB_FIELDS = ('id', 'title', 'company', 'employer_id', 'location', 'function', 'schedule', 'updated_at')
+
+
+def company_names(company_ids):
+    """Canonical name and alias keys of each company, as the job list's company filter matches them."""
+    names = defaultdict(list)
+    for company_id, name in Company.objects.filter(id__in=company_ids).values_list('id', 'name'):
+        names[company_id].append(name)
+    for company_id, key in CompanyAlias.objects.filter(company_id__in=company_ids).values_list('company_id', 'key'):
+        names[company_id].append(key)
+    return names
+
+
+class AlertWorker:
+    def __init__(self):
+        self.percolator = Percolator()
+        self.searches_synced_at = None
+
+    def sync_searches(self):
+        """Bring the percolator up to date with saved searches; returns searches changed."""
+        started = timezone.now()
+        searches = SavedSearch.objects.all()
+        if self.searches_synced_at is not None:
+            searches = searches.filter(updated_at__gte=self.searches_synced_at - OVERLAP)
+        changed = 0
+        for search_id, terms, confirmed, active in searches.values_list('id', 'terms', 'confirmed', 'active').iterator():
+            if confirmed and active:
+                self.percolator.add(search_id, terms)
+            else:
+                self.percolator.remove(search_id)
+            changed += 1
+        self.searches_synced_at = started
+        return changed
+
+    def percolate_jobs(self):
+        """Match jobs changed since the last pass; returns the job-search pairs found."""
+        started = timezone.now()
+        cursor, _ = AlertCursor.objects.get_or_create(name='jobs', defaults={'position': started})
+        jobs = (
+            queries.active_jobs()
+            .filter(updated_at__gte=cursor.position - OVERLAP, updated_at__lt=started,
+                    posted_at__gte=started - MAX_JOB_AGE)
+            .order_by('updated_at', 'id')
+            .values(*JOB_FIELDS)
+        )
+        matched, after = 0, None
+        while True:
+            batch = jobs
+            if after is not None:
+                batch = batch.filter(Q(updated_at__gt=after[0]) | Q(updated_at=after[0], id__gt=after[1]))
+            rows = list(batch[:JOB_BATCH_SIZE])
+            if not rows:
+                break
+            names = company_names({row['employer_id'] for row in rows} - {None})
+            pairs = [
+                AlertMatch(search_id=search_id, job_id=row['id'])
+                for row in rows
+                for search_id in self.percolator.match(job_terms(
+                    row['title'], row['company'], row['location'], row['function'], row['schedule'],
+                    names.get(row['employer_id'], ())))
+            ]
+            matched += len(AlertMatch.objects.bulk_create(pairs, ignore_conflicts=True, batch_size=5000))
+            after = (rows[-1]['updated_at'], rows[-1]['id'])
+        cursor.position = started
+        cursor.save(update_fields=['position'])
+        return matched
+
+    def send_digests(self):
+        """Send every due digest, in claimed batches. Returns the searches handled."""
+        sent = 0
+        while True:
+            count = self._send_batch()
+            sent += count
+            if count < DIGEST_BATCH_SIZE:
+                return sent
+
+    def _send_batch(self):
+        now = timezone.now()
+        due = Q(last_sent_at__isnull=True)
+        for frequency, period in PERIODS.items():
+            due |= Q(frequency=frequency, last_sent_at__lte=now - period)
+        unsent = AlertMatch.objects.filter(search=OuterRef('pk'), sent_at__isnull=True)
+        with transaction.atomic():
+            searches = list(
+                SavedSearch.objects.select_for_update(skip_locked=True)
+                .filter(due, Exists(unsent), confirmed=True, active=True)
+                .order_by('id')[:DIGEST_BATCH_SIZE]
+            )
+            if not searches:
+                return 0
+            matches = list(
+                AlertMatch.objects.filter(search__in=searches, sent_at__isnull=True)
+                .order_by('-created_at').values_list('id', 'search_id', 'job_id')
+            )
+            job_ids = {job_id for _, _, job_id in matches}
+            jobs = queries.active_jobs().only(*queries.LIST_FIELDS).in_bulk(job_ids)
+            by_search = {}
+            for _, search_id, job_id in matches:
+                if job_id in jobs:
+                    by_search.setdefault(search_id, []).append(jobs[job_id])
+
+            messages = [
+                self._digest(search, by_search[search.id]) for search in searches if search.id in by_search
+            ]
+            if messages:
+                get_connection(priority=OutboundEmail.BULK).send_messages(messages)
+            AlertMatch.objects.filter(id__in=[match_id for match_id, _, _ in matches]).update(sent_at=now)
+            SavedSearch.objects.filter(id__in=[search.id for search in searches]).update(last_sent_at=now)
+        return len(searches)
+
+    def _digest(self, search, jobs):
+        for job in jobs:
+            job.url = job.apply_link if job.is_scraped else settings.SITE_URL + reverse('job_detail', args=[job.id])
+        context = {
+            'search': search,
+            'jobs': jobs[:MAX_JOBS_PER_DIGEST],
+            'more': max(len(jobs) - MAX_JOBS_PER_DIGEST, 0),
+            'site_url': settings.SITE_URL,
+            'unsubscribe_url': settings.SITE_URL + reverse('alert_unsubscribe', args=[search.token]),
+        }
+        message = EmailMultiAlternatives(
+            subject=f"{len(jobs)} new job{'s' if len(jobs) != 1 else ''} for {search.describe()}",
+            body=render_to_string('alerts/email/digest.txt', context),
+            to=[search.email],
+            headers={
+                'List-Unsubscribe': f"<{context['unsubscribe_url']}>",
+                'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click',
+            },
+        )
+        message.attach_alternative(render_to_string('alerts/email/digest.html', context), 'text/html')
+        return message
+
+    def run_once(self):
+        searches = self.sync_searches()
+        matched = self.percolate_jobs()
+        sent = self.send_digests()
+        return {'searches': searches, 'matched': matched, 'sent': sent}
@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import CrawlPage, CrawlSource
+
+
+@admin.register(CrawlSource)
+class CrawlSourceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'start_url', 'enabled', 'concurrency', 'delay', 'last_crawled_at')
+
+
+@admin.register(CrawlPage)
+class CrawlPageAdmin(admin.ModelAdmin):
+    list_display = ('url', 'source', 'status_code', 'fetched_at', 'changed_at')
+    list_filter = ('source', 'status_code')
+    search_fields = ('url',)
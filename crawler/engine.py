@@ -0,0 +1,157 @@
+# crawler/engine.py
+#
+# Incremental crawl of one CrawlSource into JobPost.
+#
+# Listing pages are walked through their next-page links; job pages are
+# fetched concurrently (within the per-domain limits) with the ETag and
+# Last-Modified seen last time. A 304, or a page whose extracted fields hash
+# to the stored content_hash, costs no database write for the job. Results
+# are written in batches: changed jobs go through jobs.ingest.Ingestor, page
+# state is upserted with one bulk statement, and pages that answer 404/410
+# soft-delete their job.
+import asyncio
+import hashlib
+import logging
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.db import connections, transaction
+from django.utils import timezone
+
+from jobs.caching import invalidate_job_detail
+from jobs.feeds import FEED_GROUP
+from jobs.ingest import Ingestor
+from jobs.models import JobPost
+from jobs.sitemaps import SITEMAP_GROUP
+from jobsite import prebuilt
+from .fetcher import DomainLimiter, Fetcher
+from .models import CrawlPage
+from .parse import extract_job, listing_links
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+MAX_LISTING_PAGES = 500
+PAGE_FIELDS = ['etag', 'last_modified', 'content_hash', 'job_fingerprint', 'status_code', 'fetched_at', 'changed_at']
+
+
+def content_hash(record):
+    return hashlib.sha256(orjson.dumps(record, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class Crawler:
+    def __init__(self, source, posted_by, batch_size=DEFAULT_BATCH_SIZE):
+        self.source = source
+        self.selectors = source.selectors
+        self.ingestor = Ingestor(posted_by)
+        self.batch_size = batch_size
+        self.pages = {}
+        self.stats = dict.fromkeys(
+            ('listed', 'not_modified', 'unchanged', 'changed', 'gone', 'rejected', 'errors'), 0)
+        self._results = []
+
+    def run(self):
+        """Crawl the source; returns the stats dict."""
+        self.pages = {page.url: page for page in CrawlPage.objects.filter(source=self.source)}
+        asyncio.run(self._crawl())
+        self.ingestor.finish()
+        self.source.last_crawled_at = timezone.now()
+        self.source.save(update_fields=['last_crawled_at'])
+        return self.stats
+
+    async def _crawl(self):
+        limiter = DomainLimiter(self.source.concurrency, self.source.delay)
+        try:
+            async with Fetcher(limiter) as fetcher:
+                urls = await self._list_jobs(fetcher)
+                self.stats['listed'] = len(urls)
+                await asyncio.gather(*(self._fetch_job(fetcher, url) for url in urls))
+            await sync_to_async(self._write)(self._take_results())
+        finally:
+            # The writes ran in asgiref's worker thread; close the connections
+            # they opened there, from that same thread
+            await sync_to_async(connections.close_all)()
+
+    async def _list_jobs(self, fetcher):
+        urls, url, seen = [], self.source.start_url, set()
+        while url and url not in seen and len(seen) < MAX_LISTING_PAGES:
+            seen.add(url)
+            # Listings change all the time; always fetch them in full
+            result = await fetcher.fetch(url)
+            if result.status != 200:
+                logger.warning("Listing page %s answered %s", url, result.status)
+                self.stats['errors'] += 1
+                break
+            links, url = listing_links(result.body, result.url, self.selectors)
+            urls.extend(links)
+        return list(dict.fromkeys(urls))
+
+    async def _fetch_job(self, fetcher, url):
+        page = self.pages.get(url)
+        if page is None:
+            page = self.pages[url] = CrawlPage(source=self.source, url=url)
+        result = await fetcher.fetch(url, page.etag, page.last_modified)
+        self._results.append((page, result))
+        if len(self._results) >= self.batch_size:
+            await sync_to_async(self._write)(self._take_results())
+
+    def _take_results(self):
+        results, self._results = self._results, []
+        return results
+
+    def _write(self, results):
+        if not results:
+            return
+        now = timezone.now()
+        pages, gone = [], []
+        for page, result in results:
+            if result.status is None or result.status == 'disallowed' or result.status >= 500:
+                self.stats['errors'] += 1
+                continue
+            page.status_code = result.status
+            page.fetched_at = now
+            pages.append(page)
+            if result.status == 304:
+                self.stats['not_modified'] += 1
+            elif result.status in (404, 410):
+                self.stats['gone'] += 1
+                if page.job_fingerprint:
+                    gone.append(page.job_fingerprint)
+                page.job_fingerprint = page.content_hash = page.etag = page.last_modified = ''
+            elif result.status == 200:
+                page.etag, page.last_modified = result.etag, result.last_modified
+                record = extract_job(result.body, result.url, self.selectors)
+                digest = content_hash(record)
+                if digest == page.content_hash:
+                    self.stats['unchanged'] += 1
+                    continue
+                row = self.ingestor.add(record)
+                if row is None:
+                    self.stats['rejected'] += 1
+                    continue
+                self.stats['changed'] += 1
+                if page.job_fingerprint and page.job_fingerprint != row['fingerprint']:
+                    # Title, company or apply link changed: the old job is replaced
+                    gone.append(page.job_fingerprint)
+                page.content_hash = digest
+                page.job_fingerprint = row['fingerprint']
+                page.changed_at = now
+            else:
+                self.stats['errors'] += 1
+
+        self.ingestor.flush()
+        with transaction.atomic():
+            if gone:
+                self._remove_jobs(gone)
+            CrawlPage.objects.bulk_create(
+                pages, update_conflicts=True, unique_fields=['url'], update_fields=PAGE_FIELDS,
+            )
+
+    def _remove_jobs(self, fingerprints):
+        jobs = JobPost.objects.filter(fingerprint__in=fingerprints, deleted=False, is_scraped=True)
+        job_ids = list(jobs.values_list('id', flat=True))
+        if job_ids:
+            JobPost.objects.filter(id__in=job_ids).update(deleted=True, updated_at=timezone.now())
+            transaction.on_commit(lambda: invalidate_job_detail(*job_ids))
+            prebuilt.mark_stale(SITEMAP_GROUP)
+            prebuilt.mark_stale(FEED_GROUP)
@@ -0,0 +1,115 @@
+# crawler/fetcher.py
+#
+# Polite, conditional HTTP fetching for the crawler.
+import asyncio
+import logging
+from collections import namedtuple
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'EployBot/1.0 (+https://www.eploy.io)'
+MAX_BODY_SIZE = 5 * 1024 * 1024
+
+FetchResult = namedtuple('FetchResult', 'url status body etag last_modified')
+
+
+def user_agent():
+    return getattr(settings, 'CRAWLER_USER_AGENT', DEFAULT_USER_AGENT)
+
+
+class DomainLimiter:
+    """Caps concurrent requests per host and spaces their start times by a delay."""
+
+    def __init__(self, concurrency=2, delay=1.0):
+        self.concurrency = concurrency
+        self.delay = delay
+        self._delays = {}
+        self._semaphores = {}
+        self._next_start = {}
+
+    def set_delay(self, host, delay):
+        self._delays[host] = max(self.delay, delay)
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.concurrency))
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self._delays.get(host, self.delay)
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+class Fetcher:
+    """aiohttp session wrapper applying robots.txt, per-domain limits and conditional GETs."""
+
+    def __init__(self, limiter, timeout=20):
+        self.limiter = limiter
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None
+        self._robots = {}
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(timeout=self.timeout, headers={'User-Agent': user_agent()})
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def _robots_for(self, url):
+        parts = urlsplit(url)
+        host = parts.netloc
+        if host not in self._robots:
+            parser = RobotFileParser()
+            try:
+                async with self.session.get(f'{parts.scheme}://{host}/robots.txt') as response:
+                    if response.status == 200:
+                        parser.parse((await response.text()).splitlines())
+                    else:
+                        # No robots.txt (or no access to it) means no restrictions
+                        parser.parse([])
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                parser.parse([])
+            delay = parser.crawl_delay(user_agent())
+            if delay:
+                self.limiter.set_delay(host, float(delay))
+            self._robots[host] = parser
+        return self._robots[host]
+
+    async def fetch(self, url, etag='', last_modified=''):
+        """GET `url`; status is None on network errors and 'disallowed' when robots.txt forbids it."""
+        robots = await self._robots_for(url)
+        if not robots.can_fetch(user_agent(), url):
+            return FetchResult(url, 'disallowed', None, etag, last_modified)
+
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        async with self.limiter.slot(url):
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    body = None
+                    if response.status == 200:
+                        body = await response.content.read(MAX_BODY_SIZE)
+                    return FetchResult(
+                        url,
+                        response.status,
+                        body,
+                        response.headers.get('ETag', etag),
+                        response.headers.get('Last-Modified', last_modified),
+                    )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("Fetching %s failed: %s", url, e)
+                return FetchResult(url, None, None, etag, last_modified)
@@ -0,0 +1,63 @@
+# crawler/fixture_site.py
+#
+# Serves a directory of static pages over HTTP, with ETag and Last-Modified
+# validators, so crawls can be run and measured against a local job board
+# (crawler/fixtures/site by default).
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURE_ROOT = os.path.join(os.path.dirname(__file__), 'fixtures', 'site')
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    _etag = None
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+            if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return None
+            self._etag = etag
+        return super().send_head()
+
+    def end_headers(self):
+        if self._etag:
+            self.send_header('ETag', self._etag)
+            self._etag = None
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureSite:
+    """Threaded static file server; `base_url` is valid once constructed."""
+
+    def __init__(self, directory=FIXTURE_ROOT, host='127.0.0.1', port=0):
+        self.server = ThreadingHTTPServer((host, port), functools.partial(_Handler, directory=directory))
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def serve_forever(self):
+        self.server.serve_forever()
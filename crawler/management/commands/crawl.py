@@ -0,0 +1,37 @@
+# crawler/management/commands/crawl.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crawler.engine import DEFAULT_BATCH_SIZE, Crawler
+from crawler.models import CrawlSource
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Incrementally crawls job sources into scraped JobPosts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', action='append', help='Source name (repeatable); defaults to all enabled sources')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--posted-by', default='scraper@example.com', help='Email of the user that owns the scraped jobs')
+
+    def handle(self, *args, **options):
+        try:
+            # Users log in by email; CustomUser has no username
+            posted_by = CustomUser.objects.get(**{CustomUser.USERNAME_FIELD: options['posted_by']})
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"User {options['posted_by']!r} does not exist")
+
+        sources = CrawlSource.objects.filter(enabled=True)
+        if options['source']:
+            sources = CrawlSource.objects.filter(name__in=options['source'])
+        if not sources:
+            raise CommandError("No crawl sources to run")
+
+        for source in sources:
+            start = time.monotonic()
+            stats = Crawler(source, posted_by, batch_size=options['batch_size']).run()
+            summary = ', '.join(f'{value} {key.replace("_", " ")}' for key, value in stats.items())
+            self.stdout.write(f"{source.name}: {summary} in {time.monotonic() - start:.1f}s")
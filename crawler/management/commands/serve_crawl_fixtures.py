@@ -0,0 +1,21 @@
+# crawler/management/commands/serve_crawl_fixtures.py
+
+from django.core.management.base import BaseCommand
+
+from crawler.fixture_site import FIXTURE_ROOT, FixtureSite
+
+
+class Command(BaseCommand):
+    help = 'Serves a directory of static job pages for crawling locally (the bundled fixture board by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8766)
+        parser.add_argument('--directory', default=FIXTURE_ROOT)
+
+    def handle(self, *args, **options):
+        site = FixtureSite(options['directory'], port=options['port'])
+        self.stdout.write(f"Serving {options['directory']} at {site.base_url}")
+        try:
+            site.serve_forever()
+        except KeyboardInterrupt:
+            site.stop()
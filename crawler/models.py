@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class CrawlSource(models.Model):
+    """A job board to crawl: a listing URL plus CSS selectors for its pages.
+
+    `selectors` keys: job_links and next_page on listing pages; title,
+    company, location, description and optionally apply_link, deadline,
+    requirements and responsibilities on job pages.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    start_url = models.URLField(max_length=1000)
+    selectors = models.JSONField(default=dict)
+    concurrency = models.IntegerField(default=2)  # parallel requests per domain
+    delay = models.FloatField(default=1.0)  # seconds between requests to a domain
+    enabled = models.BooleanField(default=True)
+    last_crawled_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class CrawlPage(models.Model):
+    """Last seen state of a job page, for conditional requests and change detection."""
+    source = models.ForeignKey(CrawlSource, on_delete=models.CASCADE, related_name='pages')
+    url = models.URLField(max_length=1000, unique=True)
+    etag = models.CharField(max_length=255, blank=True, default='')
+    last_modified = models.CharField(max_length=64, blank=True, default='')
+    content_hash = models.CharField(max_length=64, blank=True, default='')  # of the extracted job
+    job_fingerprint = models.CharField(max_length=32, blank=True, default='')  # JobPost.fingerprint
+    status_code = models.IntegerField(null=True, blank=True)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+    changed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.url
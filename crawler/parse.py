@@ -0,0 +1,47 @@
+# crawler/parse.py
+#
+# Extraction of job links and job fields with a source's CSS selectors.
+from urllib.parse import urljoin, urldefrag
+
+from bs4 import BeautifulSoup
+
+JOB_FIELDS = ('title', 'company', 'location', 'description', 'deadline', 'requirements', 'responsibilities')
+
+
+def _soup(html):
+    return BeautifulSoup(html, 'lxml')
+
+
+def listing_links(html, base_url, selectors):
+    """Return (job page URLs, next listing page URL or None)."""
+    soup = _soup(html)
+    links = []
+    for anchor in soup.select(selectors.get('job_links', 'a')):
+        href = anchor.get('href')
+        if href:
+            links.append(urldefrag(urljoin(base_url, href))[0])
+    next_page = None
+    if selectors.get('next_page'):
+        anchor = soup.select_one(selectors['next_page'])
+        if anchor is not None and anchor.get('href'):
+            next_page = urljoin(base_url, anchor['href'])
+    return list(dict.fromkeys(links)), next_page
+
+
+def extract_job(html, url, selectors):
+    """Return the job fields found on a job page (the page URL is the default apply link)."""
+    soup = _soup(html)
+    record = {}
+    for field in JOB_FIELDS:
+        if not selectors.get(field):
+            continue
+        element = soup.select_one(selectors[field])
+        if element is not None:
+            separator = '\n' if field in ('description', 'requirements', 'responsibilities') else ' '
+            record[field] = element.get_text(separator, strip=True)
+    record['apply_link'] = url
+    if selectors.get('apply_link'):
+        anchor = soup.select_one(selectors['apply_link'])
+        if anchor is not None and anchor.get('href'):
+            record['apply_link'] = urljoin(url, anchor['href'])
+    return record
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import shutil
+import tempfile
+
+from django.test import TransactionTestCase
+
+from jobs.models import JobPost
+from users.models import CustomUser
+from .engine import Crawler
+from .fetcher import DomainLimiter, Fetcher
+from .fixture_site import FIXTURE_ROOT, FixtureSite
+from .models import CrawlPage, CrawlSource
+
+SELECTORS = {
+    'job_links': 'ul.jobs a.job',
+    'next_page': 'a.next',
+    'title': 'h1.title',
+    'company': '.company',
+    'location': '.location',
+    'description': '.description',
+    'requirements': '.requirements',
+    'apply_link': 'a.apply',
+}
+
+
+class CrawlTests(TransactionTestCase):
+    # The crawl writes from asgiref's worker thread, so tests commit for real
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        shutil.copytree(FIXTURE_ROOT, self.directory, dirs_exist_ok=True)
+        self.site = FixtureSite(self.directory).start()
+        self.addCleanup(self.site.stop)
+        self.user = CustomUser.objects.create_user(email='scraper@example.com')
+        self.source = CrawlSource.objects.create(
+            name='fixture-board', start_url=self.site.base_url + 'index.html', selectors=SELECTORS,
+            concurrency=4, delay=0,
+        )
+
+    def crawl(self):
+        return Crawler(self.source, self.user).run()
+
+    def test_first_crawl_creates_jobs(self):
+        stats = self.crawl()
+
+        # Four job pages, one 404 and one link robots.txt disallows
+        self.assertEqual(stats['listed'], 6)
+        self.assertEqual(stats['changed'], 4)
+        self.assertEqual(stats['gone'], 1)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(JobPost.objects.filter(is_scraped=True, deleted=False).count(), 4)
+        self.assertTrue(JobPost.objects.filter(title='Python Developer', company='Caspian Tech').exists())
+        self.assertEqual(CrawlPage.objects.exclude(etag='').count(), 4)
+
+    def test_recrawl_uses_conditional_requests(self):
+        self.crawl()
+        updated = dict(JobPost.objects.values_list('id', 'updated_at'))
+
+        stats = self.crawl()
+
+        self.assertEqual(stats['not_modified'], 4)
+        self.assertEqual(stats['changed'], 0)
+        # Nothing was rewritten
+        self.assertEqual(dict(JobPost.objects.values_list('id', 'updated_at')), updated)
+
+    def test_removed_page_deletes_its_job(self):
+        before = self.crawl()
+        os.unlink(os.path.join(self.directory, 'jobs', '1.html'))
+
+        stats = self.crawl()
+
+        self.assertEqual(stats['gone'], before['gone'] + 1)
+        self.assertEqual(stats['not_modified'], 3)
+        job = JobPost.objects.get(title='Python Developer')
+        self.assertTrue(job.deleted)
+        self.assertEqual(JobPost.objects.filter(deleted=False).count(), 3)
+
+
+class FetcherTests(TransactionTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        os.makedirs(os.path.join(self.directory, 'private'))
+        with open(os.path.join(self.directory, 'robots.txt'), 'w') as fh:
+            fh.write('User-agent: *\nDisallow: /private/\nCrawl-delay: 2\n')
+        for name in ('open.html', 'private/secret.html'):
+            with open(os.path.join(self.directory, name), 'w') as fh:
+                fh.write('<html></html>')
+        self.site = FixtureSite(self.directory).start()
+        self.addCleanup(self.site.stop)
+
+    def fetch(self, *urls):
+        limiter = DomainLimiter(concurrency=2, delay=0)
+
+        async def run():
+            async with Fetcher(limiter) as fetcher:
+                return [await fetcher.fetch(url) for url in urls], limiter
+
+        return asyncio.run(run())
+
+    def test_robots_txt_is_obeyed(self):
+        (allowed, disallowed), limiter = self.fetch(
+            self.site.base_url + 'open.html', self.site.base_url + 'private/secret.html')
+
+        self.assertEqual(allowed.status, 200)
+        self.assertEqual(disallowed.status, 'disallowed')
+        self.assertIsNone(disallowed.body)
+        # Crawl-delay slows the host down, never below the source's own delay
+        host = self.site.base_url.split('/')[2]
+        self.assertEqual(limiter._delays[host], 2.0)
+
+    def test_conditional_get_answers_304(self):
+        (first,), _ = self.fetch(self.site.base_url + 'open.html')
+        self.assertTrue(first.etag)
+
+        async def refetch():
+            async with Fetcher(DomainLimiter(delay=0)) as fetcher:
+                return await fetcher.fetch(self.site.base_url + 'open.html', first.etag)
+
+        second = asyncio.run(refetch())
+        self.assertEqual(second.status, 304)
+        self.assertIsNone(second.body)
+        self.assertEqual(second.etag, first.etag)
@@ -1,12 +1,35 @@
 # jobs/admin.py
-from django.contrib import admin
-from .models import JobPost, JobApplication
+from django.contrib import admin, messages
+from .companies import merge
+from .models import Company, CompanyAlias, JobPost, JobApplication
+
+
+class CompanyAliasInline(admin.TabularInline):
+    model = CompanyAlias
+    extra = 0
+
+
+@admin.register(Company)
+class CompanyAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name', 'aliases__key')
+    inlines = [CompanyAliasInline]
+    actions = ['merge_companies']
+
+    @admin.action(description='Merge selected companies into the first one')
+    def merge_companies(self, request, queryset):
+        companies = list(queryset.order_by('id'))
+        moved = merge(companies[0], companies[1:])
+        self.message_user(request, f"Merged {len(companies) - 1} companies into {companies[0]}, moving {moved} jobs.", messages.SUCCESS)
+
 
 @admin.register(JobPost)
 class JobPostAdmin(admin.ModelAdmin):
     list_display = ('title', 'company', 'location', 'posted_by', 'posted_at')
     search_fields = ('title', 'company', 'location', 'posted_by__email')
-    list_filter = ('posted_at', 'location', 'company')
+    # Filtering by employer is an indexed id lookup; the company list comes
+    # from the small Company table, not a DISTINCT over jobs
+    list_filter = ('posted_at', 'location', 'employer')
 
 @admin.register(JobApplication)
 class JobApplicationAdmin(admin.ModelAdmin):
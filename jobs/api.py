@@ -0,0 +1,195 @@
+# jobs/api.py
+#
+# Read-only JSON feed of active jobs for aggregators and the frontend.
+#
+#     GET /jobs/api/jobs/?limit=50&fields=id,title,company&cursor=...
+#     GET /jobs/api/autocomplete/?field=title&q=dev
+#
+# Pages are walked with an opaque keyset cursor on (posted_at, id), newest
+# first, so deep pages cost the same as the first one and rows don't shift
+# while a client is paging. The ETag is derived from the ids and updated_at
+# of the rows on the page, so a 304 is answered before anything is
+# serialized.
+import base64
+import gzip
+import hashlib
+from datetime import datetime
+
+import brotli
+import orjson
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import require_GET
+
+from jobsite import metrics, prebuilt
+from . import autocomplete as suggestions, queries
+from .models import Company
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+API_FIELDS = (
+    'id', 'title', 'company', 'location', 'function', 'schedule', 'deadline',
+    'responsibilities', 'requirements', 'description', 'posted_at', 'updated_at',
+    'is_scraped', 'is_premium', 'apply_link', 'url',
+)
+DEFAULT_FIELDS = ('id', 'title', 'company', 'location', 'posted_at', 'is_scraped', 'url')
+# Needed for the cursor, the ETag and `url` whatever the client asks for
+KEY_FIELDS = ('id', 'posted_at', 'updated_at', 'is_scraped', 'apply_link')
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def encode_cursor(posted_at, job_id):
+    raw = orjson.dumps([posted_at.isoformat(), job_id])
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        posted_at, job_id = orjson.loads(raw)
+        return datetime.fromisoformat(posted_at), int(job_id)
+    except (ValueError, TypeError, orjson.JSONDecodeError):
+        raise BadRequest('Invalid cursor')
+
+
+def _parse_fields(value):
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in API_FIELDS]
+    if unknown:
+        raise BadRequest(f'Unknown fields: {", ".join(unknown)}')
+    return fields
+
+
+def _parse_limit(value):
+    if not value:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise BadRequest('limit must be an integer')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def fetch_page(fields, limit, cursor=None, title='', company=''):
+    """Return (rows, next_cursor) for one page of the feed."""
+    qs = queries.active_jobs()
+    if title:
+        qs = qs.filter(title__icontains=title)
+    if company:
+        qs = qs.filter(employer__in=Company.objects.matching(company))
+    if cursor:
+        posted_at, job_id = decode_cursor(cursor)
+        qs = qs.filter(Q(posted_at__lt=posted_at) | Q(posted_at=posted_at, id__lt=job_id))
+
+    columns = list(dict.fromkeys(KEY_FIELDS + tuple(f for f in fields if f != 'url')))
+    # One row more than needed tells us whether there is a next page
+    rows = list(qs.order_by('-posted_at', '-id').values(*columns)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['posted_at'], rows[-1]['id'])
+    return rows, next_cursor
+
+
+def page_etag(rows, fields, next_cursor):
+    """Version of a page for its ETags (prebuilt.etag_for adds the encoding)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(','.join(fields).encode())
+    digest.update((next_cursor or '').encode())
+    for row in rows:
+        digest.update(b'%d:%d;' % (row['id'], int(row['updated_at'].timestamp() * 1000000)))
+    return digest.hexdigest()
+
+
+def serialize_page(rows, fields, next_cursor, detail_url=None):
+    """Serialize a page with orjson, keeping only the requested fields."""
+    items = []
+    for row in rows:
+        item = {}
+        for field in fields:
+            if field == 'url':
+                item['url'] = row['apply_link'] if row['is_scraped'] or detail_url is None else detail_url(row['id'])
+            else:
+                item[field] = row[field]
+        items.append(item)
+    return orjson.dumps({'results': items, 'next': next_cursor})
+
+
+def compress(request, body):
+    """Return (body, encoding) using the best encoding the client accepts."""
+    if len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    if prebuilt.accepts_encoding(request, 'br'):
+        return brotli.compress(body, quality=4), 'br'
+    if prebuilt.accepts_encoding(request, 'gzip'):
+        return gzip.compress(body, compresslevel=6), 'gzip'
+    return body, None
+
+
+@require_GET
+def job_feed(request):
+    try:
+        fields = _parse_fields(request.GET.get('fields'))
+        limit = _parse_limit(request.GET.get('limit'))
+        rows, next_cursor = fetch_page(
+            fields,
+            limit,
+            cursor=request.GET.get('cursor'),
+            title=request.GET.get('job_title', ''),
+            company=request.GET.get('company', ''),
+        )
+    except BadRequest as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    version = page_etag(rows, fields, next_cursor)
+    etag = prebuilt.matching_etag(request, version)
+    if etag:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        metrics.API_RESPONSES.inc(result='not_modified')
+        return response
+
+    base = request.build_absolute_uri('/').rstrip('/')
+    body = serialize_page(rows, fields, next_cursor, lambda job_id: base + reverse('job_detail', args=[job_id]))
+    body, encoding = compress(request, body)
+
+    response = HttpResponse(body, content_type='application/json')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    # Compressed and plain bodies differ, so their strong ETags do too
+    response['ETag'] = prebuilt.etag_for(version, encoding)
+    patch_cache_control(response, public=True, max_age=60)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    metrics.API_RESPONSES.inc(result='ok')
+    return response
+
+
+@require_GET
+def autocomplete(request):
+    """Title or company suggestions for a prefix, from the in-memory index (jobs.autocomplete)."""
+    field = request.GET.get('field', 'title')
+    if field not in suggestions.FIELDS:
+        return JsonResponse({'error': f'field must be one of {", ".join(suggestions.FIELDS)}'}, status=400)
+    try:
+        limit = max(1, min(int(request.GET.get('limit') or AUTOCOMPLETE_LIMIT), AUTOCOMPLETE_MAX_LIMIT))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+
+    results = suggestions.suggest(field, request.GET.get('q', '')[:100], limit)
+    response = HttpResponse(orjson.dumps({'results': results}), content_type='application/json')
+    patch_cache_control(response, public=True, max_age=60)
+    metrics.API_RESPONSES.inc(result='autocomplete')
+    return response
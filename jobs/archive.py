@@ -0,0 +1,104 @@
+# jobs/archive.py
+#
+# Hot/archive split for jobs. Deleted and expired jobs that haven't changed
+# for a while are moved, with their applications, into ArchivedJobPost and
+# ArchivedJobApplication, so the hot tables and their indexes only hold jobs
+# that can still be listed or edited. Payment orders stay where they are;
+# their job link moves to Order.archived_job_id.
+#
+# HR views look a job up with get_hr_job() and its applications with
+# applications_for(), which read from whichever table holds the job.
+from django.db import connection, transaction
+from django.shortcuts import get_object_or_404
+
+from payments.models import Order
+from .caching import invalidate_job_detail
+from .models import ArchivedJobApplication, ArchivedJobPost, JobApplication, JobPost
+
+DEFAULT_BATCH_SIZE = 1000
+
+_ARCHIVE_SQL = """
+WITH batch AS (
+    SELECT id FROM {job}
+    WHERE id > %(after)s AND (deleted OR expired) AND updated_at < %(cutoff)s
+    ORDER BY id
+    LIMIT %(batch_size)s
+    FOR UPDATE SKIP LOCKED
+), orders AS (
+    UPDATE {order} SET archived_job_id = job_id, job_id = NULL
+    WHERE job_id IN (SELECT id FROM batch)
+), moved_applications AS (
+    DELETE FROM {application} WHERE job_id IN (SELECT id FROM batch)
+    RETURNING {application_columns}
+), moved_jobs AS (
+    DELETE FROM {job} WHERE id IN (SELECT id FROM batch)
+    RETURNING {job_columns}
+), archived_jobs AS (
+    INSERT INTO {archived_job} ({job_columns}, archived_at)
+    SELECT {job_columns}, now() FROM moved_jobs
+    RETURNING id
+), archived_applications AS (
+    INSERT INTO {archived_application} ({application_columns})
+    SELECT {application_columns} FROM moved_applications
+    RETURNING id
+)
+SELECT (SELECT array_agg(id) FROM archived_jobs), (SELECT count(*) FROM archived_applications)
+"""
+
+
+def _columns(model, exclude=()):
+    return ', '.join(
+        connection.ops.quote_name(field.column)
+        for field in model._meta.concrete_fields
+        if field.name not in exclude
+    )
+
+
+def archive_sql():
+    quote = connection.ops.quote_name
+    return _ARCHIVE_SQL.format(
+        job=quote(JobPost._meta.db_table),
+        application=quote(JobApplication._meta.db_table),
+        order=quote(Order._meta.db_table),
+        archived_job=quote(ArchivedJobPost._meta.db_table),
+        archived_application=quote(ArchivedJobApplication._meta.db_table),
+        job_columns=_columns(ArchivedJobPost, exclude=('archived_at',)),
+        application_columns=_columns(ArchivedJobApplication),
+    )
+
+
+def archive_jobs(cutoff, batch_size=DEFAULT_BATCH_SIZE, limit=None):
+    """Move jobs deleted or expired before `cutoff` to the archive.
+
+    Each batch is one statement in its own transaction. Returns
+    (jobs archived, applications archived).
+    """
+    sql = archive_sql()
+    jobs = applications = after = 0
+    while limit is None or jobs < limit:
+        size = batch_size if limit is None else min(batch_size, limit - jobs)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, {'after': after, 'cutoff': cutoff, 'batch_size': size})
+            job_ids, application_count = cursor.fetchone()
+        job_ids = job_ids or []
+        jobs += len(job_ids)
+        applications += application_count
+        if job_ids:
+            invalidate_job_detail(*job_ids)
+        if len(job_ids) < size:
+            break
+        after = max(job_ids)
+    return jobs, applications
+
+
+def get_hr_job(user, job_id):
+    """The user's job from the hot table, or from the archive once it has been moved."""
+    job = JobPost.objects.filter(id=job_id, posted_by=user).first()
+    if job is None:
+        job = get_object_or_404(ArchivedJobPost, id=job_id, posted_by=user)
+    return job
+
+
+def applications_for(job):
+    model = ArchivedJobApplication if job.is_archived else JobApplication
+    return model.objects.filter(job_id=job.id)
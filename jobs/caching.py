@@ -0,0 +1,14 @@
+# jobs/caching.py
+#
+# Cache keys shared by the job detail view and everything that changes jobs.
+from django.core.cache import cache
+
+
+def job_detail_cache_key(job_id):
+    return f'job_detail:meta:{job_id}'
+
+
+def invalidate_job_detail(*job_ids):
+    # Rendered pages are keyed by updated_at, so dropping the metadata is enough
+    for start in range(0, len(job_ids), 1000):
+        cache.delete_many([job_detail_cache_key(job_id) for job_id in job_ids[start:start + 1000]])
@@ -0,0 +1,70 @@
+# jobs/companies.py
+#
+# Canonical companies. JobPost.company keeps the name as posted or scraped;
+# JobPost.employer points at a Company, found through CompanyAlias by
+# company_key(), so "Kapital Bank", "KAPITAL BANK ASC" and "Kapital Bank,
+# ASC" are one company. Variants the key doesn't catch are merged in the
+# admin, which moves their aliases and jobs to the kept company.
+from django.db import connection, transaction
+
+from .models import Company, CompanyAlias, JobPost
+
+DEFAULT_BATCH_SIZE = 5000
+
+_SET_EMPLOYER_SQL = """
+UPDATE {table} j SET employer_id = v.employer_id
+FROM unnest(%s::bigint[], %s::bigint[]) AS v(id, employer_id)
+WHERE j.id = v.id
+"""
+
+_MOVE_JOBS_SQL = """
+UPDATE {table} SET employer_id = %(target)s
+WHERE id IN (
+    SELECT id FROM {table} WHERE employer_id = ANY(%(sources)s) ORDER BY id LIMIT %(batch_size)s
+)
+"""
+
+
+def backfill(batch_size=DEFAULT_BATCH_SIZE):
+    """Link jobs without an employer to their Company, in id-range batches. Returns jobs linked."""
+    table = connection.ops.quote_name(JobPost._meta.db_table)
+    sql = _SET_EMPLOYER_SQL.format(table=table)
+    last_id = JobPost.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    linked = 0
+    for after in range(0, last_id, batch_size):
+        rows = list(
+            JobPost.objects.filter(id__gt=after, id__lte=after + batch_size, employer__isnull=True)
+            .values_list('id', 'company')
+        )
+        if not rows:
+            continue
+        company_ids = Company.objects.resolve({company for _, company in rows})
+        pairs = [(job_id, company_ids[company]) for job_id, company in rows if company in company_ids]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [[job_id for job_id, _ in pairs], [company_id for _, company_id in pairs]])
+            linked += cursor.rowcount
+    return linked
+
+
+def merge(target, sources, batch_size=DEFAULT_BATCH_SIZE):
+    """Fold `sources` into `target`: their aliases and jobs move over and they are deleted."""
+    source_ids = [company.id for company in sources if company.id != target.id]
+    if not source_ids:
+        return 0
+    table = connection.ops.quote_name(JobPost._meta.db_table)
+    sql = _MOVE_JOBS_SQL.format(table=table)
+    params = {'target': target.id, 'sources': source_ids, 'batch_size': batch_size}
+    moved = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            count = cursor.rowcount
+        moved += count
+        if count < batch_size:
+            break
+    with transaction.atomic():
+        CompanyAlias.objects.filter(company_id__in=source_ids).update(company=target)
+        # Jobs saved while the batches ran still resolved to a source
+        moved += JobPost.objects.filter(employer_id__in=source_ids).update(employer=target)
+        Company.objects.filter(id__in=source_ids).delete()
+    return moved
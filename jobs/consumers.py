@@ -0,0 +1,42 @@
+# jobs/consumers.py
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .live import owner_group
+
+# Close code for connections that aren't from a logged-in HR user
+FORBIDDEN = 4403
+
+
+class ApplicantFeedConsumer(AsyncJsonWebsocketConsumer):
+    """Pushes the user's new and rescored applications, see jobs.live.
+
+    Connected at ws/hr/applicants/ (all the user's jobs, for the dashboard)
+    or ws/hr/applicants/<job_id>/ (one job). Idle connections only hold
+    their group membership; nothing runs for them until an event arrives.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated or user.user_type != 'HR':
+            await self.close(code=FORBIDDEN)
+            return
+        self.group = owner_group(user.id)
+        self.job_id = self.scope['url_route']['kwargs'].get('job_id')
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group'):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # The feed is one way; answer keepalive pings only
+        if content.get('type') == 'ping':
+            await self.send_json({'event': 'pong'})
+
+    async def applicant_event(self, event):
+        payload = event['payload']
+        if self.job_id is not None and payload.get('job_id') != self.job_id:
+            return
+        await self.send_json(payload)
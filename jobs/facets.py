@@ -0,0 +1,87 @@
+# jobs/facets.py
+#
+# Facet counts for the job list: the most common locations, functions,
+# schedules and companies among the jobs matching the current filters.
+#
+# All facets come from one GROUPING SETS query over the filtered result
+# set, so another facet is another grouping set rather than another query.
+# Results are cached briefly per filter combination; the unfiltered counts,
+# which every first visit asks for, are then computed once a minute.
+import hashlib
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+
+from .models import Company
+
+FACETS = ('location', 'function', 'schedule', 'company')
+# Model field counted for each facet; companies are counted by employer id
+FACET_FIELDS = {'location': 'location', 'function': 'function', 'schedule': 'schedule', 'company': 'employer'}
+FACET_LABELS = {'location': 'Location', 'function': 'Function', 'schedule': 'Schedule', 'company': 'Company'}
+# Values shown per facet
+FACET_SIZE = 10
+FACET_CACHE_SECONDS = 60
+
+_FACET_SQL = """
+SELECT facet, value, n FROM (
+    SELECT {facet_name} AS facet, {value} AS value, count(*) AS n,
+           row_number() OVER (
+               PARTITION BY GROUPING({columns}) ORDER BY count(*) DESC, {value}
+           ) AS position
+    FROM ({jobs}) jobs
+    GROUP BY GROUPING SETS ({grouping_sets})
+    HAVING {value} <> ''
+) counted
+WHERE position <= %s
+ORDER BY facet, n DESC, value
+"""
+
+
+def _alias(facet):
+    # Not a field name, so Django always aliases the column in the subquery
+    return f'facet_{facet}'
+
+
+def _facet_sql(jobs_sql):
+    columns = [connection.ops.quote_name(_alias(facet)) for facet in FACETS]
+    # Within a grouping set the other facet columns are NULL, so the first
+    # non-NULL one is the value of the set's own facet
+    value = f"COALESCE({', '.join(f'{column}::text' for column in columns)})"
+    facet_name = 'CASE ' + ' '.join(
+        f"WHEN GROUPING({column}) = 0 THEN '{facet}'" for facet, column in zip(FACETS, columns)
+    ) + ' END'
+    return _FACET_SQL.format(
+        facet_name=facet_name,
+        value=value,
+        columns=', '.join(columns),
+        jobs=jobs_sql,
+        grouping_sets=', '.join(f'({column})' for column in columns),
+    )
+
+
+def facet_counts(jobs):
+    """{facet: [(value, label, count), ...]} for the jobs in queryset `jobs`, most common first.
+
+    `value` is what the job list filters on: the text for most facets, the
+    Company id for `company`.
+    """
+    facet_values = {_alias(facet): F(FACET_FIELDS[facet]) for facet in FACETS}
+    jobs_sql, params = jobs.order_by().values(**facet_values).query.sql_with_params()
+    sql = _facet_sql(jobs_sql)
+    params = (*params, FACET_SIZE)
+
+    key = 'facets:' + hashlib.md5(repr((sql, params)).encode()).hexdigest()
+    counts = cache.get(key)
+    if counts is None:
+        counts = {facet: [] for facet in FACETS}
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            for facet, value, n in cursor.fetchall():
+                counts[facet].append((value, value, n))
+        names = Company.objects.in_bulk([int(value) for value, _, _ in counts['company']])
+        counts['company'] = [
+            (int(value), names[int(value)].name, n) for value, _, n in counts['company'] if int(value) in names
+        ]
+        cache.set(key, counts, FACET_CACHE_SECONDS)
+    return counts
@@ -0,0 +1,102 @@
+# jobs/feeds.py
+#
+# Partner feeds, pre-generated into PREBUILT_ROOT/feeds/ by
+# `manage.py build_feeds` and served from disk by jobsite.prebuilt:
+#
+#     feeds/jobs.rss, feeds/jobs.atom   latest FEED_ITEMS active jobs
+#     feeds/jobs.xml, feeds/jobs.jsonl  every active job
+import io
+from xml.sax.saxutils import escape
+
+import orjson
+from django.conf import settings
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.text import Truncator
+
+from jobsite import prebuilt
+from . import queries
+
+FEED_GROUP = 'feeds'
+FEED_ITEMS = 100
+DUMP_CHUNK_SIZE = 5000
+
+# Columns published in the bulk dumps
+DUMP_FIELDS = (
+    'id', 'title', 'company', 'location', 'function', 'schedule', 'deadline',
+    'description', 'responsibilities', 'requirements', 'posted_at', 'updated_at',
+    'is_scraped', 'apply_link',
+)
+
+FEED_FILES = {
+    'jobs.rss': 'application/rss+xml; charset=utf-8',
+    'jobs.atom': 'application/atom+xml; charset=utf-8',
+    'jobs.xml': 'application/xml; charset=utf-8',
+    'jobs.jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def _job_url(base, row):
+    if row['is_scraped'] and row['apply_link']:
+        return row['apply_link']
+    return base + reverse('job_detail', args=[row['id']])
+
+
+def _write_syndication(base, rows):
+    for name, feed_class in (('jobs.rss', feedgenerator.Rss201rev2Feed), ('jobs.atom', feedgenerator.Atom1Feed)):
+        feed = feed_class(
+            title='Eploy jobs',
+            link=base + reverse('job_list'),
+            description='Latest jobs posted on Eploy.',
+            feed_url=base + f'/feeds/{name}',
+            language='en',
+        )
+        for row in rows:
+            feed.add_item(
+                title=f"{row['title']} at {row['company']}",
+                link=_job_url(base, row),
+                description=Truncator(row['description']).chars(500),
+                unique_id=base + reverse('job_detail', args=[row['id']]),
+                pubdate=row['posted_at'],
+                updateddate=row['updated_at'],
+            )
+        out = io.StringIO()
+        feed.write(out, 'utf-8')
+        prebuilt.write_atomic(f'feeds/{name}', out.getvalue().encode())
+
+
+def _xml_job(base, row):
+    parts = [f'<job id="{row["id"]}">']
+    for field in DUMP_FIELDS[1:]:
+        value = row[field]
+        if value is None:
+            continue
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        elif isinstance(value, bool):
+            value = 'true' if value else 'false'
+        parts.append(f'<{field}>{escape(str(value))}</{field}>')
+    parts.append(f'<url>{escape(_job_url(base, row))}</url></job>')
+    return ''.join(parts)
+
+
+def build_feeds():
+    """Regenerate every feed file. Returns the number of jobs in the dumps.
+
+    The dumps are streamed row by row into temp files that replace the old
+    ones when complete, so memory use doesn't grow with the number of jobs.
+    """
+    base = settings.SITE_URL.rstrip('/')
+    jobs = queries.active_jobs().order_by('-posted_at', '-id').values(*DUMP_FIELDS)
+
+    _write_syndication(base, list(jobs[:FEED_ITEMS]))
+
+    count = 0
+    with prebuilt.open_atomic('feeds/jobs.xml') as xml, prebuilt.open_atomic('feeds/jobs.jsonl') as jsonl:
+        xml.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<jobs>')
+        for row in jobs.iterator(chunk_size=DUMP_CHUNK_SIZE):
+            xml.write(_xml_job(base, row).encode())
+            jsonl.write(orjson.dumps(dict(row, url=_job_url(base, row)), option=orjson.OPT_APPEND_NEWLINE))
+            count += 1
+        xml.write(b'</jobs>\n')
+    return count
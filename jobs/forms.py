@@ -1,11 +1,34 @@
 from django import forms
-from .models import JobPost, JobApplication
+from .models import JobPost, JobApplication, job_fingerprint
 
 class JobPostForm(forms.ModelForm):
     class Meta:
         model = JobPost
         fields = ['title', 'description', 'company', 'location']
 
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+
+    def clean(self):
+        cleaned_data = super().clean()
+        title, company = cleaned_data.get('title'), cleaned_data.get('company')
+        if title and company:
+            fingerprint = job_fingerprint(title, company, self.instance.apply_link)
+            duplicates = JobPost.objects.filter(fingerprint=fingerprint, deleted=False, expired=False).exclude(pk=self.instance.pk)
+            duplicate = duplicates.first()
+            if duplicate is None:
+                return cleaned_data
+            if self.instance.pk is None and self.user is not None and self._is_unpaid_draft(duplicate):
+                # The poster left payment unfinished; posting again resumes that job
+                self.instance = duplicate
+            else:
+                raise forms.ValidationError("A job with this title and company is already listed.")
+        return cleaned_data
+
+    def _is_unpaid_draft(self, job):
+        return job.posted_by_id == self.user.pk and not job.is_paid and not job.is_scraped
+
 class JobApplicationForm(forms.ModelForm):
     full_name = forms.CharField(max_length=255, label='Full Name', required=True)
     email = forms.EmailField(label='Email', required=True)
@@ -0,0 +1,181 @@
+# jobs/geo.py
+#
+# Coordinates for job locations and "within N km" filtering.
+#
+# Locations are free text ("Baku, Azerbaijan"). locate() resolves them
+# without network access: from GeocodeCache, which remembers earlier
+# answers (including places the online geocoder couldn't find), and then
+# from the gazetteer file
+# (settings.GEOCODER_GAZETTEER). Only `manage.py geocode_jobs --online` asks
+# Nominatim, through geopy, for what neither knows. JobPost stores the
+# result in latitude/longitude when it is saved or ingested.
+#
+# within_q() is a bounding box on the indexed latitude/longitude columns and
+# an exact haversine distance for the rows inside it, so distances are only
+# computed for jobs that are already close.
+import csv
+import functools
+import math
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.lookups import LessThanOrEqual
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+DEFAULT_BATCH_SIZE = 5000
+
+_SET_COORDINATES_SQL = """
+UPDATE {table} j SET latitude = v.latitude, longitude = v.longitude
+FROM unnest(%s::bigint[], %s::float8[], %s::float8[]) AS v(id, latitude, longitude)
+WHERE j.id = v.id
+"""
+
+_separators = re.compile(r'[,;/()|]+')
+
+
+def location_key(text):
+    """Matching key for a place name: no accents, case or punctuation."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return ' '.join(re.sub(r'\W+', ' ', text).split())[:500]
+
+
+@functools.lru_cache(maxsize=1)
+def gazetteer():
+    """{location_key: (latitude, longitude)} from the gazetteer CSV."""
+    places = {}
+    with open(settings.GEOCODER_GAZETTEER, newline='', encoding='utf-8') as fh:
+        for row in csv.DictReader(fh):
+            point = (float(row['latitude']), float(row['longitude']))
+            for name in [row['name'], *(row.get('aliases') or '').split('|')]:
+                if location_key(name):
+                    places.setdefault(location_key(name), point)
+    return places
+
+
+def gazetteer_lookup(text):
+    """Coordinates for the whole text, else its first part or word the gazetteer knows."""
+    places = gazetteer()
+    candidates = [location_key(text)]
+    parts = [location_key(part) for part in _separators.split(text or '')]
+    candidates += parts
+    candidates += [word for part in parts for word in part.split() if len(word) > 2]
+    for key in candidates:
+        if key in places:
+            return places[key]
+    return None
+
+
+def online_lookup(texts):
+    """Ask Nominatim, one request per second as its usage policy requires."""
+    from geopy.extra.rate_limiter import RateLimiter
+    from geopy.geocoders import Nominatim
+
+    geocode = RateLimiter(Nominatim(user_agent=settings.GEOCODER_USER_AGENT).geocode, min_delay_seconds=1)
+    found = {}
+    for text in texts:
+        place = geocode(text, timeout=10)
+        found[text] = (place.latitude, place.longitude) if place else None
+    return found
+
+
+def locate(texts, online=False, remember=True):
+    """Map location texts to (latitude, longitude), or None when unknown.
+
+    remember=False skips caching new answers, for text typed by visitors.
+    """
+    from .models import GeocodeCache
+
+    keys = {text: location_key(text) for text in texts if location_key(text)}
+    cached = {
+        key: (lat, lon) if lat is not None else None
+        for key, lat, lon in GeocodeCache.objects.filter(key__in=set(keys.values()))
+        .values_list('key', 'latitude', 'longitude')
+    }
+    misses = {key: text for text, key in keys.items() if key not in cached}
+    if misses:
+        found = {key: gazetteer_lookup(text) for key, text in misses.items()}
+        sources = dict.fromkeys(found, GeocodeCache.GAZETTEER)
+        if online:
+            unknown = {misses[key]: key for key, point in found.items() if point is None}
+            for text, point in online_lookup(unknown).items():
+                found[unknown[text]] = point
+                sources[unknown[text]] = GeocodeCache.ONLINE
+        # Gazetteer misses aren't cached, so an --online run can still fill them
+        if remember:
+            GeocodeCache.objects.bulk_create(
+                [
+                    GeocodeCache(key=key, latitude=point and point[0], longitude=point and point[1], source=sources[key])
+                    for key, point in found.items()
+                    if point is not None or sources[key] == GeocodeCache.ONLINE
+                ],
+                ignore_conflicts=True,
+            )
+        cached.update(found)
+    return {text: cached[key] for text, key in keys.items()}
+
+
+def backfill(batch_size=DEFAULT_BATCH_SIZE, online=False):
+    """Set coordinates on jobs that have none, in id-range batches. Returns jobs located."""
+    from .models import JobPost
+
+    sql = _SET_COORDINATES_SQL.format(table=connection.ops.quote_name(JobPost._meta.db_table))
+    last_id = JobPost.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    located = 0
+    for after in range(0, last_id, batch_size):
+        rows = list(
+            JobPost.objects.filter(id__gt=after, id__lte=after + batch_size, latitude__isnull=True)
+            .values_list('id', 'location')
+        )
+        points = locate({location for _, location in rows}, online=online)
+        found = [(job_id, points[location]) for job_id, location in rows if points.get(location)]
+        if not found:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [
+                [job_id for job_id, _ in found],
+                [point[0] for _, point in found],
+                [point[1] for _, point in found],
+            ])
+            located += cursor.rowcount
+    return located
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) around a point; doesn't wrap the antimeridian."""
+    dlat = radius_km / KM_PER_DEGREE
+    dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    dlat, dlon = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distance_km(latitude, longitude):
+    """SQL expression: haversine distance from the point to a job's coordinates."""
+    from .models import JobPost
+
+    table = connection.ops.quote_name(JobPost._meta.db_table)
+    lat, lon = f'{table}."latitude"', f'{table}."longitude"'
+    return RawSQL(
+        f"2 * {EARTH_RADIUS_KM} * asin(least(1, sqrt("
+        f"power(sin(radians({lat} - %s) / 2), 2) "
+        f"+ cos(radians(%s)) * cos(radians({lat})) * power(sin(radians({lon} - %s) / 2), 2))))",
+        (latitude, latitude, longitude),
+        output_field=FloatField(),
+    )
+
+
+def within_q(latitude, longitude, radius_km):
+    """Jobs within `radius_km` of the point: index range scan, then exact distance."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    return Q(latitude__range=(min_lat, max_lat), longitude__range=(min_lon, max_lon)) & Q(
+        LessThanOrEqual(distance_km(latitude, longitude), radius_km))
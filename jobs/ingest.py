@@ -0,0 +1,197 @@
+# jobs/ingest.py
+#
+# Bulk ingestion of scraped jobs.
+#
+# Records are normalized and fingerprinted in Python, de-duplicated within
+# each chunk, COPYed into a temporary staging table and merged into JobPost
+# with one INSERT ... ON CONFLICT on the listed fingerprint constraint: new
+# jobs are inserted, listed scraped copies whose content changed are updated,
+# anything else is left alone. A chunk is one transaction.
+import csv
+import io
+import os
+import re
+from datetime import date, datetime
+
+import orjson
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from jobsite import prebuilt
+from . import geo, ranking
+from .caching import invalidate_job_detail
+from .feeds import FEED_GROUP
+from .models import Company, JobPost, job_fingerprint
+from .sitemaps import SITEMAP_GROUP
+
+DEFAULT_CHUNK_SIZE = 50000
+
+# Staging columns in COPY order; nullable ones may be left empty
+STAGING_COLUMNS = (
+    'fingerprint', 'title', 'company', 'location', 'description', 'function', 'schedule',
+    'deadline', 'responsibilities', 'requirements', 'apply_link', 'rank_score', 'employer_id',
+    'latitude', 'longitude', 'posted_at',
+)
+REQUIRED_COLUMNS = ('fingerprint', 'title', 'company', 'location', 'description', 'apply_link', 'rank_score')
+CONTENT_COLUMNS = (
+    'location', 'latitude', 'longitude', 'description', 'function', 'schedule', 'deadline',
+    'responsibilities', 'requirements',
+)
+
+_whitespace = re.compile(r'\s+')
+
+
+def _clean(value, max_length=None):
+    if value is None:
+        return ''
+    value = _whitespace.sub(' ', str(value)).strip()
+    return value[:max_length] if max_length else value
+
+
+def _parse_when(value, parser):
+    if value in (None, ''):
+        return None
+    if isinstance(value, (date, datetime)):
+        return value
+    try:
+        return parser(str(value))
+    except ValueError:
+        return None
+
+
+def normalize(record):
+    """Return a normalized row dict, or None when required fields are missing."""
+    row = {
+        'title': _clean(record.get('title'), 500),
+        'company': _clean(record.get('company'), 500),
+        'location': _clean(record.get('location'), 500),
+        'description': (record.get('description') or '').strip(),
+        'function': _clean(record.get('function'), 500) or None,
+        'schedule': _clean(record.get('schedule'), 500) or None,
+        'deadline': _parse_when(record.get('deadline'), parse_date),
+        'responsibilities': (record.get('responsibilities') or '').strip() or None,
+        'requirements': (record.get('requirements') or '').strip() or None,
+        'apply_link': _clean(record.get('apply_link'), 1000),
+        'posted_at': _parse_when(record.get('posted_at'), parse_datetime),
+    }
+    if not (row['title'] and row['company'] and row['apply_link']):
+        return None
+    if isinstance(row['posted_at'], datetime) and timezone.is_naive(row['posted_at']):
+        row['posted_at'] = timezone.make_aware(row['posted_at'])
+    row['fingerprint'] = job_fingerprint(row['title'], row['company'], row['apply_link'])
+    row['rank_score'] = ranking.score_values(row['posted_at'], is_scraped=True)
+    return row
+
+
+def read_records(path, fmt=None, batch_size=DEFAULT_CHUNK_SIZE):
+    """Yield raw record dicts from a JSONL, CSV or Parquet file."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt in ('jsonl', 'ndjson', 'json'):
+        with open(path, 'rb') as fh:
+            for line in fh:
+                if line.strip():
+                    yield orjson.loads(line)
+    elif fmt == 'csv':
+        with open(path, newline='', encoding='utf-8') as fh:
+            yield from csv.DictReader(fh)
+    elif fmt == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f'Unsupported input format: {fmt}')
+
+
+def _copy_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class Ingestor:
+    """Merge normalized rows into JobPost chunk by chunk and keep counts."""
+
+    def __init__(self, posted_by, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.posted_by = posted_by
+        self.chunk_size = chunk_size
+        self.read = self.rejected = self.duplicates = self.inserted = self.updated = 0
+        self._chunk = {}
+
+    def add(self, record):
+        """Queue a raw record; returns its normalized row, or None if it was rejected."""
+        self.read += 1
+        row = normalize(record)
+        if row is None:
+            self.rejected += 1
+            return None
+        if row['fingerprint'] in self._chunk:
+            self.duplicates += 1
+        # The last copy of a job in the input wins; ON CONFLICT can't touch a row twice
+        self._chunk[row['fingerprint']] = row
+        if len(self._chunk) >= self.chunk_size:
+            self.flush()
+        return row
+
+    def flush(self):
+        if not self._chunk:
+            return
+        rows, self._chunk = list(self._chunk.values()), {}
+        employers = Company.objects.resolve({row['company'] for row in rows})
+        points = geo.locate({row['location'] for row in rows})
+        for row in rows:
+            row['employer_id'] = employers.get(row['company'])
+            row['latitude'], row['longitude'] = points.get(row['location']) or (None, None)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_copy_value(row[column]) for column in STAGING_COLUMNS])
+        buffer.seek(0)
+
+        job_table = connection.ops.quote_name(JobPost._meta.db_table)
+        columns = ', '.join(STAGING_COLUMNS)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("""
+                CREATE TEMP TABLE ingest_staging (
+                    fingerprint text, title text, company text, location text, description text,
+                    function text, schedule text, deadline date, responsibilities text,
+                    requirements text, apply_link text, rank_score double precision, employer_id bigint,
+                    latitude double precision, longitude double precision, posted_at timestamptz
+                ) ON COMMIT DROP
+            """)
+            cursor.copy_expert(
+                f"COPY ingest_staging ({columns}) FROM STDIN "
+                f"WITH (FORMAT csv, FORCE_NOT_NULL ({', '.join(REQUIRED_COLUMNS)}))",
+                buffer,
+            )
+
+            changed = ' OR '.join(f'j.{c} IS DISTINCT FROM EXCLUDED.{c}' for c in CONTENT_COLUMNS)
+            cursor.execute(f"""
+                INSERT INTO {job_table} AS j (
+                    {columns}, posted_by_id, updated_at, deleted, expired, is_scraped, is_premium,
+                    premium_days, priority_level, is_paid, posting_cost
+                )
+                SELECT {', '.join(f's.{c}' for c in STAGING_COLUMNS if c != 'posted_at')},
+                       COALESCE(s.posted_at, now()), %s, now(), FALSE, FALSE, TRUE, FALSE, 0, 0, FALSE, 0
+                FROM ingest_staging s
+                ON CONFLICT (fingerprint) WHERE NOT deleted AND NOT expired DO UPDATE
+                SET {', '.join(f'{c} = EXCLUDED.{c}' for c in CONTENT_COLUMNS)}, updated_at = now()
+                WHERE j.is_scraped AND ({changed})
+                RETURNING j.id, (j.xmax = 0) AS inserted
+            """, [self.posted_by.pk])
+            results = cursor.fetchall()
+            updated_ids = [job_id for job_id, inserted in results if not inserted]
+            inserted = len(results) - len(updated_ids)
+            transaction.on_commit(lambda: invalidate_job_detail(*updated_ids))
+
+        self.updated += len(updated_ids)
+        self.inserted += inserted
+
+    def finish(self):
+        self.flush()
+        if self.inserted or self.updated:
+            prebuilt.mark_stale(SITEMAP_GROUP)
+            prebuilt.mark_stale(FEED_GROUP)
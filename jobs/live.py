@@ -0,0 +1,59 @@
+# jobs/live.py
+#
+# Live applicant updates for HR pages over WebSockets (Django Channels).
+#
+# Every open hr_dashboard or hr_applicants page holds a WebSocket served by
+# jobs.consumers.ApplicantFeedConsumer, in a channel layer group per job
+# owner. When an application is created, or its match score is saved, the
+# post_save signal publishes it to the owner's group after the transaction
+# commits, and the pages add or update the row instead of being refreshed.
+#
+# The channel layer is Redis when REDIS_URL is set, so any web worker can
+# reach any connection, and in-memory (one process) otherwise, as in tests.
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+CREATED = 'created'
+SCORED = 'scored'
+
+
+def owner_group(user_id):
+    return f'hr_applicants.{user_id}'
+
+
+def application_payload(application, event):
+    try:
+        resume_url = application.resume.url if application.resume else None
+    except Exception:
+        resume_url = None
+    return {
+        'event': event,
+        'id': application.id,
+        'job_id': application.job_id,
+        'job_title': application.job.title,
+        'full_name': application.full_name,
+        'email': application.email,
+        'phone': application.phone,
+        'match_score': application.match_score_percentage(),
+        'resume_url': resume_url,
+        'applied_at': application.applied_at.isoformat() if application.applied_at else None,
+    }
+
+
+def publish(user_id, payload):
+    """Send `payload` to the user's open HR pages. Never raises: live updates are best effort."""
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    try:
+        async_to_sync(layer.group_send)(owner_group(user_id), {'type': 'applicant.event', 'payload': payload})
+    except Exception:
+        logger.warning("Failed to publish live applicant update", exc_info=True)
+
+
+def publish_application(application, event):
+    publish(application.job.posted_by_id, application_payload(application, event))
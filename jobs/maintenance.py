@@ -0,0 +1,99 @@
+# jobs/maintenance.py
+#
+# Scheduled upkeep of JobPost, run by `manage.py run_maintenance`:
+#
+#   - premium placements whose premium_days ran out lose is_premium
+#   - postings past their listing window or deadline are marked expired
+#   - rank scores are refreshed
+#
+# Every change is a set-based UPDATE over at most `batch_size` rows claimed
+# with FOR UPDATE SKIP LOCKED, each in its own short transaction, so rows
+# being edited are skipped until the next run instead of waited on, and no
+# statement holds many row locks for long. Batches walk the primary key, so
+# a full pass reads the table once.
+from django.db import connection, transaction
+from django.utils import timezone
+
+from jobsite import prebuilt
+from . import ranking
+from .caching import invalidate_job_detail
+from .feeds import FEED_GROUP
+from .models import JobPost
+from .queries import POSTED_JOB_MAX_AGE, SCRAPED_JOB_MAX_AGE
+from .sitemaps import SITEMAP_GROUP
+
+DEFAULT_BATCH_SIZE = 5000
+
+_BATCH_SQL = """
+UPDATE {table}
+SET {assignments}, updated_at = %(now)s
+WHERE id IN (
+    SELECT id FROM {table}
+    WHERE id > %(after)s AND {condition}
+    ORDER BY id
+    LIMIT %(batch_size)s
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING id
+"""
+
+_PREMIUM_CONDITION = """
+    NOT deleted AND is_premium
+    AND posted_at + premium_days * interval '1 day' <= %(now)s
+"""
+
+_EXPIRY_CONDITION = """
+    NOT deleted AND NOT expired AND (
+        (NOT is_scraped AND posted_at < %(posted_cutoff)s)
+        OR (is_scraped AND posted_at < %(scraped_cutoff)s)
+        OR deadline < %(today)s
+    )
+"""
+
+
+def _run_batches(assignments, condition, params, batch_size):
+    table = connection.ops.quote_name(JobPost._meta.db_table)
+    sql = _BATCH_SQL.format(table=table, assignments=assignments, condition=condition)
+    changed_ids, after = [], 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, dict(params, batch_size=batch_size, after=after))
+            ids = [job_id for (job_id,) in cursor.fetchall()]
+        changed_ids.extend(ids)
+        if len(ids) < batch_size:
+            return changed_ids
+        after = max(ids)
+
+
+def expire_premium(batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Clear is_premium on placements past their premium_days. Returns the job ids changed."""
+    now = now or timezone.now()
+    return _run_batches('is_premium = FALSE', _PREMIUM_CONDITION, {'now': now}, batch_size)
+
+
+def expire_postings(batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Mark jobs past their listing window or deadline as expired. Returns the job ids changed."""
+    now = now or timezone.now()
+    params = {
+        'now': now,
+        'posted_cutoff': now - POSTED_JOB_MAX_AGE,
+        'scraped_cutoff': now - SCRAPED_JOB_MAX_AGE,
+        'today': timezone.localdate(now),
+    }
+    return _run_batches('expired = TRUE, rank_score = 0', _EXPIRY_CONDITION, params, batch_size)
+
+
+def run(batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Run every maintenance step; returns a dict of counts."""
+    now = now or timezone.now()
+    premium_ids = expire_premium(batch_size, now)
+    expired_ids = expire_postings(batch_size, now)
+    rescored = ranking.refresh_scores(batch_size=batch_size, now=now)
+
+    changed_ids = set(premium_ids) | set(expired_ids)
+    if changed_ids:
+        invalidate_job_detail(*changed_ids)
+    if expired_ids:
+        prebuilt.mark_stale(SITEMAP_GROUP)
+        prebuilt.mark_stale(FEED_GROUP)
+    return {'premium_expired': len(premium_ids), 'expired': len(expired_ids), 'rescored': rescored}
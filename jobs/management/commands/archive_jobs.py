@@ -0,0 +1,31 @@
+# jobs/management/commands/archive_jobs.py
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs import archive
+
+
+class Command(BaseCommand):
+    help = 'Moves deleted and expired jobs, with their applications, to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=30, help='Days since the job last changed')
+        parser.add_argument('--batch-size', type=int, default=archive.DEFAULT_BATCH_SIZE, help='Jobs per statement')
+        parser.add_argument('--limit', type=int, help='Stop after archiving this many jobs')
+        parser.add_argument('--interval', type=float, help='Keep running, every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.monotonic()
+            cutoff = timezone.now() - timedelta(days=options['older_than'])
+            jobs, applications = archive.archive_jobs(cutoff, options['batch_size'], options['limit'])
+            self.stdout.write(
+                f"Archived {jobs} jobs and {applications} applications in {time.monotonic() - start:.1f}s"
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
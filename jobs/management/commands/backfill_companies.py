@@ -0,0 +1,19 @@
+# jobs/management/commands/backfill_companies.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import companies
+
+
+class Command(BaseCommand):
+    help = 'Links existing jobs to canonical companies, creating companies for unseen names'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=companies.DEFAULT_BATCH_SIZE, help='Job ids per batch')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        linked = companies.backfill(batch_size=options['batch_size'])
+        self.stdout.write(f"Linked {linked} jobs to companies in {time.monotonic() - start:.1f}s")
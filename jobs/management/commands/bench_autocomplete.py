@@ -0,0 +1,76 @@
+# jobs/management/commands/bench_autocomplete.py
+
+import random
+import statistics
+import string
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from jobs.autocomplete import PrefixIndex
+
+WORDS = (
+    'senior', 'junior', 'lead', 'software', 'data', 'backend', 'frontend', 'sales', 'marketing', 'finance',
+    'engineer', 'developer', 'analyst', 'manager', 'specialist', 'accountant', 'designer', 'consultant',
+    'operator', 'assistant', 'baku', 'azerbaijan', 'international', 'group', 'holding', 'bank', 'energy',
+)
+
+
+def synthetic_values(count, seed):
+    rng = random.Random(seed)
+    values = set()
+    while len(values) < count:
+        words = rng.sample(WORDS, rng.randint(2, 4))
+        suffix = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(0, 6)))
+        values.add(' '.join(words).title() + (f' {suffix}' if suffix else ''))
+    return list(values)
+
+
+class Command(BaseCommand):
+    help = 'Measures memory and lookup latency of the autocomplete prefix index with synthetic values'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--values', type=int, default=1000000, help='Distinct values to index')
+        parser.add_argument('--lookups', type=int, default=10000)
+        parser.add_argument('--max-mb', type=float, default=200, help='Fail if the index is larger than this')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        values = synthetic_values(options['values'], options['seed'])
+        raw = sum(len(value) for value in values)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        index = PrefixIndex(values)
+        build = time.perf_counter() - start
+        size, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del values
+
+        self.stdout.write(
+            f"{len(index)} values ({raw / 2**20:.1f} MB of text) indexed in {build:.2f}s: "
+            f"{size / 2**20:.1f} MB resident, {peak / 2**20:.1f} MB peak while building, "
+            f"{size / len(index):.0f} bytes per value"
+        )
+
+        rng = random.Random(options['seed'])
+        prefixes = [rng.choice(WORDS)[:rng.randint(1, 6)] for _ in range(options['lookups'])]
+        samples = []
+        for prefix in prefixes:
+            start = time.perf_counter()
+            index.lookup(prefix, 10)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        self.stdout.write(
+            f"lookup p50 {statistics.median(samples) * 1e6:.1f} us  "
+            f"p99 {samples[int(len(samples) * 0.99) - 1] * 1e6:.1f} us  max {samples[-1] * 1e6:.1f} us"
+        )
+
+        start = time.perf_counter()
+        added = sum(index.add(f'Incremental Value {i}') for i in range(1000))
+        self.stdout.write(f"{added} incremental inserts: {(time.perf_counter() - start) * 1e6 / 1000:.1f} us each")
+
+        if size / 2**20 > options['max_mb']:
+            self.stderr.write(f"Index uses more than {options['max_mb']} MB")
+            raise SystemExit(1)
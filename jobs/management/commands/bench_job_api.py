@@ -0,0 +1,78 @@
+# jobs/management/commands/bench_job_api.py
+
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import RequestFactory
+from django.utils import timezone
+
+from jobs import api
+
+
+class Command(BaseCommand):
+    help = 'Measures job feed serialization and compression throughput on synthetic rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=10000)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        count = options['jobs']
+        rounds = options['rounds']
+        now = timezone.now()
+        rows = [
+            {
+                'id': i,
+                'title': f'Senior Backend Developer {i}',
+                'company': f'Company {i % 500}',
+                'location': 'Baku, Azerbaijan',
+                'function': 'Engineering',
+                'schedule': 'Full-time',
+                'deadline': (now + timedelta(days=30)).date(),
+                'responsibilities': 'Design, build and run services. ' * 8,
+                'requirements': 'Python, Django, PostgreSQL. ' * 8,
+                'description': 'We are hiring. ' * 40,
+                'posted_at': now - timedelta(minutes=i),
+                'updated_at': now - timedelta(minutes=i),
+                'is_scraped': i % 3 == 0,
+                'is_premium': False,
+                'apply_link': f'https://example.com/jobs/{i}',
+            }
+            for i in range(count)
+        ]
+        detail_url = lambda job_id: f'https://www.eploy.io/jobs/{job_id}/'
+
+        def stdlib(fields):
+            items = [
+                {f: (detail_url(r['id']) if f == 'url' else r[f]) for f in fields}
+                for r in rows
+            ]
+            return json.dumps({'results': items, 'next': None}, cls=DjangoJSONEncoder).encode()
+
+        def fast(fields):
+            return api.serialize_page(rows, fields, None, detail_url)
+
+        for label, fields in (('default fields', api.DEFAULT_FIELDS), ('all fields', api.API_FIELDS)):
+            for name, serializer in (('json + DjangoJSONEncoder', stdlib), ('orjson', fast)):
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    body = serializer(fields)
+                elapsed = (time.perf_counter() - start) / rounds
+                self.stdout.write(
+                    f'{label:15} {name:26} {count / elapsed:12,.0f} jobs/s  {len(body) / 1024:9,.0f} KiB'
+                )
+
+            body = fast(fields)
+            for encoding in ('gzip', 'br'):
+                request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=encoding)
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    compressed, _ = api.compress(request, body)
+                elapsed = (time.perf_counter() - start) / rounds
+                self.stdout.write(
+                    f'{label:15} {encoding + " compression":26} {count / elapsed:12,.0f} jobs/s  '
+                    f'{len(compressed) / 1024:9,.0f} KiB'
+                )
@@ -0,0 +1,51 @@
+# jobs/management/commands/bench_job_list.py
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from jobs import queries
+
+
+class Command(BaseCommand):
+    help = 'Compares the ranked job list query with the date-sorted one on the current database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=200)
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--deep-page', type=int, default=50, help='Also time this page number')
+
+    def _time(self, queryset, rounds):
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            list(queryset)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+    def _plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def handle(self, *args, **options):
+        size = options['page_size']
+        orders = {
+            'date-sorted': queries.active_jobs().order_by('is_scraped', '-posted_at', '-id').values_list('id', flat=True),
+            'ranked': queries.ranked_job_ids(),
+        }
+        self.stdout.write(f"{queries.active_jobs().count()} listed jobs")
+        for label, ids in orders.items():
+            for page in (1, options['deep_page']):
+                offset = (page - 1) * size
+                queryset = ids[offset:offset + size]
+                p50, p95 = self._time(queryset, options['rounds'])
+                self.stdout.write(f"{label:12} page {page:<4} p50 {p50 * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms")
+            plan = self._plan(ids[:size])
+            scan = next((line.strip() for line in plan if 'Scan' in line), plan[0])
+            self.stdout.write(f"{'':12} plan: {scan}")
+            self.stdout.write(f"{'':12} {plan[-1].strip()}")
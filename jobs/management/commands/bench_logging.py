@@ -0,0 +1,50 @@
+# jobs/management/commands/bench_logging.py
+
+import logging
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobsite.log import JsonFormatter, QueueListenerHandler, SamplingFilter
+
+
+class Command(BaseCommand):
+    help = 'Measures the request-path cost of a log call for each handler setup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        records = options['records']
+        devnull = open(os.devnull, 'w')
+
+        sync_handler = logging.StreamHandler(devnull)
+        sync_handler.setFormatter(JsonFormatter())
+
+        queue_handler = QueueListenerHandler(maxsize=records + 1, stream=devnull)
+
+        sampled_handler = QueueListenerHandler(maxsize=records + 1, stream=devnull)
+        sampled_handler.addFilter(SamplingFilter(rate=10, period=60))
+
+        setups = [
+            ('sync json stream', sync_handler, logging.INFO),
+            ('queue handler', queue_handler, logging.INFO),
+            ('queue handler, sampled debug', sampled_handler, logging.DEBUG),
+        ]
+        for label, handler, level in setups:
+            logger = logging.getLogger(f'bench.{label}')
+            logger.propagate = False
+            logger.handlers = [handler]
+            logger.setLevel(logging.DEBUG)
+
+            start = time.perf_counter()
+            for i in range(records):
+                logger.log(level, 'Payment result for order %s: %s', i, 'success', extra={'order': i})
+            elapsed = time.perf_counter() - start
+
+            if isinstance(handler, QueueListenerHandler):
+                handler.stop()
+            self.stdout.write(f'{label:32} {elapsed / records * 1e6:8.2f} us/record  ({records / elapsed:,.0f} records/s)')
+
+        devnull.close()
@@ -0,0 +1,28 @@
+# jobs/management/commands/build_feeds.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobsite import prebuilt
+from jobs.feeds import FEED_GROUP, build_feeds
+
+
+class Command(BaseCommand):
+    help = 'Generates the RSS/Atom feeds and the XML/JSONL job dumps into PREBUILT_ROOT/feeds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--if-stale', action='store_true', help='Only rebuild when jobs changed since the last build')
+        parser.add_argument('--interval', type=float, help='Keep running, checking every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            if not options['if_stale'] or prebuilt.is_stale(FEED_GROUP) or not prebuilt.is_file('feeds/jobs.rss'):
+                # Clear first: changes made during the build mark it stale again
+                prebuilt.clear_stale(FEED_GROUP)
+                start = time.monotonic()
+                count = build_feeds()
+                self.stdout.write(f"Wrote feeds with {count} jobs in {time.monotonic() - start:.1f}s")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
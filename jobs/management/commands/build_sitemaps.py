@@ -0,0 +1,27 @@
+# jobs/management/commands/build_sitemaps.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobsite import prebuilt
+from jobs.sitemaps import SITEMAP_GROUP, build_sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Generates the sitemap index and its gzipped sections into PREBUILT_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--if-stale', action='store_true', help='Only rebuild when jobs changed since the last build')
+        parser.add_argument('--interval', type=float, help='Keep running, checking every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            if not options['if_stale'] or prebuilt.is_stale(SITEMAP_GROUP) or not prebuilt.is_file('sitemap.xml'):
+                # Clear first: changes made during the build mark it stale again
+                prebuilt.clear_stale(SITEMAP_GROUP)
+                sections = build_sitemaps()
+                self.stdout.write(f"Wrote sitemap index with {len(sections)} sections")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
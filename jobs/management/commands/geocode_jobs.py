@@ -0,0 +1,43 @@
+# jobs/management/commands/geocode_jobs.py
+
+import csv
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import geo
+from jobs.models import GeocodeCache
+
+
+class Command(BaseCommand):
+    help = 'Sets coordinates on jobs without them, from the geocode cache and gazetteer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=geo.DEFAULT_BATCH_SIZE, help='Job ids per batch')
+        parser.add_argument('--online', action='store_true', help='Ask Nominatim for places the gazetteer lacks')
+        parser.add_argument('--load', metavar='CSV', help='First fill the cache from a location,latitude,longitude file')
+
+    def handle(self, *args, **options):
+        if options['load']:
+            self._load(options['load'])
+        start = time.monotonic()
+        located = geo.backfill(batch_size=options['batch_size'], online=options['online'])
+        self.stdout.write(f"Located {located} jobs in {time.monotonic() - start:.1f}s")
+
+    def _load(self, path):
+        with open(path, newline='', encoding='utf-8') as fh:
+            entries = {
+                geo.location_key(row['location']): (float(row['latitude']), float(row['longitude']))
+                for row in csv.DictReader(fh)
+                if geo.location_key(row['location'])
+            }
+        GeocodeCache.objects.bulk_create(
+            [
+                GeocodeCache(key=key, latitude=lat, longitude=lon, source=GeocodeCache.MANUAL)
+                for key, (lat, lon) in entries.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['latitude', 'longitude', 'source', 'updated_at'],
+        )
+        self.stdout.write(f"Loaded {len(entries)} places into the geocode cache")
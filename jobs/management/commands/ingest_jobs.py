@@ -0,0 +1,45 @@
+# jobs/management/commands/ingest_jobs.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.ingest import DEFAULT_CHUNK_SIZE, Ingestor, read_records
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Bulk-loads scraped jobs from JSONL, CSV or Parquet files, merging duplicates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument('--format', choices=['jsonl', 'csv', 'parquet'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--posted-by', default='scraper@example.com', help='Email of the user that owns the scraped jobs')
+
+    def handle(self, *args, **options):
+        try:
+            # Users log in by email; CustomUser has no username
+            posted_by = CustomUser.objects.get(**{CustomUser.USERNAME_FIELD: options['posted_by']})
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"User {options['posted_by']!r} does not exist")
+
+        ingestor = Ingestor(posted_by, chunk_size=options['chunk_size'])
+        start = time.monotonic()
+        for path in options['paths']:
+            try:
+                for record in read_records(path, options['format'], batch_size=options['chunk_size']):
+                    ingestor.add(record)
+                    if ingestor.read % options['chunk_size'] == 0:
+                        elapsed = time.monotonic() - start
+                        self.stdout.write(f"{ingestor.read:,} rows read ({ingestor.read / elapsed:,.0f} rows/s)")
+            except (OSError, ValueError) as e:
+                raise CommandError(f"{path}: {e}")
+        ingestor.finish()
+        elapsed = time.monotonic() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{ingestor.read:,} rows in {elapsed:.1f}s ({ingestor.read / max(elapsed, 1e-9):,.0f} rows/s): "
+            f"{ingestor.inserted:,} inserted, {ingestor.updated:,} updated, "
+            f"{ingestor.duplicates:,} duplicates in input, {ingestor.rejected:,} rejected"
+        ))
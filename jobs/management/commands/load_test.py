@@ -0,0 +1,63 @@
+# jobs/management/commands/load_test.py
+
+import asyncio
+import statistics
+import time
+
+import aiohttp
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Fires concurrent requests at a running server and reports throughput and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Full URL to request, e.g. http://127.0.0.1:8000/jobs/')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--header', action='append', default=[], help='Extra header as "Name: value"')
+
+    def handle(self, *args, **options):
+        headers = dict(h.split(':', 1) for h in options['header'])
+        headers = {name.strip(): value.strip() for name, value in headers.items()}
+        latencies, errors, elapsed = asyncio.run(self.run(
+            options['url'], options['method'], headers, options['concurrency'], options['duration'],
+        ))
+
+        total = len(latencies) + errors
+        self.stdout.write(f"Requests: {total} in {elapsed:.1f}s ({total / elapsed:,.1f} req/s), errors: {errors}")
+        if len(latencies) > 1:
+            latencies.sort()
+            quantiles = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f"Latency ms: p50={quantiles[49] * 1000:.1f} p95={quantiles[94] * 1000:.1f} "
+                f"p99={quantiles[98] * 1000:.1f} max={latencies[-1] * 1000:.1f}"
+            )
+
+    async def run(self, url, method, headers, concurrency, duration):
+        latencies = []
+        errors = 0
+        deadline = time.monotonic() + duration
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        timeout = aiohttp.ClientTimeout(total=60)
+
+        async def client(session):
+            nonlocal errors
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    async with session.request(method, url, headers=headers, allow_redirects=False) as response:
+                        await response.read()
+                        if response.status >= 500:
+                            errors += 1
+                            continue
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        started = time.monotonic()
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        return latencies, errors, time.monotonic() - started
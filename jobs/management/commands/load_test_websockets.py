@@ -0,0 +1,144 @@
+# jobs/management/commands/load_test_websockets.py
+
+import asyncio
+import statistics
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+import aiohttp
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.live import owner_group
+
+
+def quantiles(values):
+    if len(values) < 2:
+        return 'n/a'
+    values = sorted(values)
+    q = statistics.quantiles(values, n=100)
+    return f"p50={q[49] * 1000:.1f} p95={q[94] * 1000:.1f} p99={q[98] * 1000:.1f} max={values[-1] * 1000:.1f}"
+
+
+class Command(BaseCommand):
+    help = 'Holds many idle WebSocket connections to a running server and measures push latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='WebSocket URL, e.g. ws://127.0.0.1:8000/ws/hr/applicants/')
+        parser.add_argument('--connections', type=int, default=1000)
+        parser.add_argument('--rate', type=float, default=200, help='New connections per second')
+        parser.add_argument('--duration', type=float, default=60.0, help='Seconds to hold the connections open')
+        parser.add_argument('--user', help='Email of an HR user to connect as; a session is created for it')
+        parser.add_argument('--header', action='append', default=[], help='Extra header as "Name: value"')
+        parser.add_argument('--publish-interval', type=float, default=0,
+                            help='Seconds between test events sent to the user through the channel layer')
+
+    def handle(self, *args, **options):
+        headers = dict(h.split(':', 1) for h in options['header'])
+        headers = {name.strip(): value.strip() for name, value in headers.items()}
+        parts = urlsplit(options['url'])
+        # Connections without an allowed Origin are refused by the server
+        headers.setdefault('Origin', f"{'https' if parts.scheme == 'wss' else 'http'}://{parts.netloc}")
+
+        user = None
+        if options['user']:
+            user = get_user_model().objects.filter(email=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user {options['user']}")
+            headers['Cookie'] = f'{settings.SESSION_COOKIE_NAME}={self.session_key(user)}'
+        if options['publish_interval']:
+            if user is None:
+                raise CommandError('--publish-interval needs --user')
+            if 'InMemory' in settings.CHANNEL_LAYERS['default']['BACKEND']:
+                raise CommandError('Publishing needs the Redis channel layer shared with the server (REDIS_URL)')
+
+        results = asyncio.run(self.run(options['url'], headers, options, user))
+        connect_times, failures, dropped, latencies, received, elapsed = results
+        count = options['connections']
+        self.stdout.write(
+            f"Connected {len(connect_times)}/{count}, failed {failures}, "
+            f"dropped while idle {dropped}, held for {elapsed:.1f}s"
+        )
+        self.stdout.write(f"Handshake ms: {quantiles(connect_times)}")
+        if options['publish_interval']:
+            self.stdout.write(f"Events received: {received}, delivery ms: {quantiles(latencies)}")
+
+    def session_key(self, user):
+        """A logged-in session for `user`, as the test client's force_login makes."""
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session.session_key
+
+    async def run(self, url, headers, options, user):
+        connect_times, latencies = [], []
+        failures = dropped = received = 0
+        connected = asyncio.Event()
+        done = asyncio.Event()
+
+        async def client(session):
+            nonlocal failures, dropped, received
+            start = time.perf_counter()
+            try:
+                ws = await session.ws_connect(url, headers=headers, heartbeat=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                failures += 1
+                return
+            connect_times.append(time.perf_counter() - start)
+            try:
+                while not done.is_set():
+                    receive = asyncio.ensure_future(ws.receive())
+                    finished = asyncio.ensure_future(done.wait())
+                    await asyncio.wait({receive, finished}, return_when=asyncio.FIRST_COMPLETED)
+                    finished.cancel()
+                    if not receive.done():
+                        receive.cancel()
+                        break
+                    message = receive.result()
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        dropped += 1
+                        break
+                    event = message.json()
+                    if 'sent_at' in event:
+                        received += 1
+                        latencies.append(time.time() - event['sent_at'])
+            finally:
+                await ws.close()
+
+        async def publisher():
+            layer = get_channel_layer()
+            await connected.wait()
+            while not done.is_set():
+                await layer.group_send(owner_group(user.id), {
+                    'type': 'applicant.event',
+                    'payload': {'event': 'load_test', 'sent_at': time.time()},
+                })
+                try:
+                    await asyncio.wait_for(done.wait(), options['publish_interval'])
+                except asyncio.TimeoutError:
+                    pass
+
+        connector = aiohttp.TCPConnector(limit=0)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            tasks = []
+            publishing = asyncio.ensure_future(publisher()) if options['publish_interval'] else None
+            for _ in range(options['connections']):
+                tasks.append(asyncio.ensure_future(client(session)))
+                await asyncio.sleep(1 / options['rate'])
+            # Give the last handshakes a moment before holding
+            await asyncio.sleep(1)
+            connected.set()
+            started = time.monotonic()
+            await asyncio.sleep(options['duration'])
+            elapsed = time.monotonic() - started
+            done.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if publishing:
+                await publishing
+        return connect_times, failures, dropped, latencies, received, elapsed
@@ -0,0 +1,24 @@
+# jobs/management/commands/refresh_rank_scores.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.ranking import DEFAULT_BATCH_SIZE, refresh_scores
+
+
+class Command(BaseCommand):
+    help = 'Recomputes JobPost.rank_score in bulk (freshness decays, so run it on a schedule)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Job ids per UPDATE')
+        parser.add_argument('--interval', type=float, help='Keep running, refreshing every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.monotonic()
+            changed = refresh_scores(batch_size=options['batch_size'])
+            self.stdout.write(f"Updated {changed} rank scores in {time.monotonic() - start:.1f}s")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
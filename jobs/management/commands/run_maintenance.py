@@ -0,0 +1,27 @@
+# jobs/management/commands/run_maintenance.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import maintenance
+
+
+class Command(BaseCommand):
+    help = 'Expires premium placements and stale postings, then refreshes rank scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=maintenance.DEFAULT_BATCH_SIZE, help='Rows per UPDATE')
+        parser.add_argument('--interval', type=float, help='Keep running, every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.monotonic()
+            counts = maintenance.run(batch_size=options['batch_size'])
+            self.stdout.write(
+                f"{counts['premium_expired']} premium placements ended, {counts['expired']} postings expired, "
+                f"{counts['rescored']} rank scores updated in {time.monotonic() - start:.1f}s"
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_jobpost_posting_cost'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='jobpost',
+            name='payment_order',
+        ),
+    ]
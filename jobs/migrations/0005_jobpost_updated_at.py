@@ -0,0 +1,24 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_posted_at(apps, schema_editor):
+    JobPost = apps.get_model('jobs', 'JobPost')
+    JobPost.objects.update(updated_at=models.F('posted_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_remove_jobpost_payment_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_posted_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+import hashlib
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def _fingerprint(title, company, apply_link):
+    # Frozen copy of jobs.models.job_fingerprint
+    key = '\x1f'.join(
+        ' '.join(value.split()).lower() for value in (title or '', company or '')
+    ) + '\x1f' + (apply_link or '').strip()
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    JobPost = apps.get_model('jobs', 'JobPost')
+    batch = []
+    rows = JobPost.objects.only('id', 'title', 'company', 'apply_link').order_by('id')
+    for job in rows.iterator(chunk_size=5000):
+        job.fingerprint = _fingerprint(job.title, job.company, job.apply_link)
+        batch.append(job)
+        if len(batch) >= 5000:
+            JobPost.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        JobPost.objects.bulk_update(batch, ['fingerprint'])
+
+
+def remove_live_duplicates(apps, schema_editor):
+    # Keep the copy people can still see: a posted job over a scraped one,
+    # then a paid one, then the newest (older copies are past their listing
+    # window and 0008 would expire them), and soft-delete the others
+    JobPost = apps.get_model('jobs', 'JobPost')
+    live = JobPost.objects.filter(deleted=False)
+    duplicated = (
+        live.values('fingerprint').annotate(copies=Count('id')).filter(copies__gt=1).values_list('fingerprint', flat=True)
+    )
+    for fingerprint in duplicated.iterator():
+        ids = list(live.filter(fingerprint=fingerprint).order_by('is_scraped', '-is_paid', '-posted_at', '-id').values_list('id', flat=True))
+        JobPost.objects.filter(id__in=ids[1:]).update(deleted=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_jobpost_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='fingerprint',
+            field=models.CharField(default='', editable=False, max_length=32),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+        # The unique constraint on listed jobs is added by 0008, once
+        # `expired` exists; it only needs these rows to be unique
+        migrations.RunPython(remove_live_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations, models
+
+
+# Frozen copy of jobs.ranking at this migration: the weights and the
+# refresh query as they were, before `expired` existed. Migrations must not
+# import app code, which follows the latest schema.
+BATCH_SIZE = 10000
+
+SCORE_SQL = """
+UPDATE {table} j
+SET rank_score = round((
+    100.0 * power(0.5, s.age_hours / 48.0)
+    + 25.0 * s.priority_level
+    + CASE WHEN s.is_premium AND s.age_hours < s.premium_days * 24 THEN 300.0 ELSE 0 END
+    + CASE WHEN s.is_paid AND NOT s.is_scraped THEN 100.0 ELSE 0 END
+)::numeric, 4)
+FROM (
+    SELECT id, priority_level, is_premium, premium_days, is_paid, is_scraped,
+           greatest(extract(epoch FROM now() - posted_at) / 3600, 0)::float8 AS age_hours
+    FROM {table}
+    WHERE NOT deleted AND id > %s AND id <= %s
+) s
+WHERE j.id = s.id AND s.age_hours <= 15 * 24
+"""
+
+
+def score_jobs(apps, schema_editor):
+    JobPost = apps.get_model('jobs', 'JobPost')
+    connection = schema_editor.connection
+    sql = SCORE_SQL.format(table=connection.ops.quote_name(JobPost._meta.db_table))
+    last_id = JobPost.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    with connection.cursor() as cursor:
+        for after in range(0, last_id, BATCH_SIZE):
+            cursor.execute(sql, [after, after + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    # Each batch of the backfill commits on its own. The listing index is
+    # built by 0008, with its final condition
+    atomic = False
+
+    dependencies = [
+        ('jobs', '0006_jobpost_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='rank_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.RunPython(score_jobs, migrations.RunPython.noop),
+    ]
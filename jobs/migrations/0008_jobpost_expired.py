@@ -0,0 +1,66 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Frozen copy of jobs.maintenance.expire_postings at this migration:
+# posted jobs list for 15 days, scraped ones for 10, none past the deadline.
+BATCH_SIZE = 5000
+
+EXPIRE_SQL = """
+UPDATE {table}
+SET expired = TRUE, rank_score = 0, updated_at = %(now)s
+WHERE NOT deleted AND NOT expired AND id > %(after)s AND id <= %(upto)s AND (
+    (NOT is_scraped AND posted_at < %(now)s - interval '15 days')
+    OR (is_scraped AND posted_at < %(now)s - interval '10 days')
+    OR deadline < %(today)s
+)
+"""
+
+
+def expire_postings(apps, schema_editor):
+    # Listing queries stop checking dates in this release, so apply the
+    # windows once before they do
+    JobPost = apps.get_model('jobs', 'JobPost')
+    connection = schema_editor.connection
+    sql = EXPIRE_SQL.format(table=connection.ops.quote_name(JobPost._meta.db_table))
+    now = timezone.now()
+    last_id = JobPost.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    with connection.cursor() as cursor:
+        for after in range(0, last_id, BATCH_SIZE):
+            cursor.execute(sql, {'now': now, 'today': timezone.localdate(now), 'after': after,
+                                 'upto': after + BATCH_SIZE})
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('jobs', '0007_jobpost_rank_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='expired',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(expire_postings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='jobpost',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(deleted=False, expired=False),
+                fields=('fingerprint',),
+                name='jobs_jobpost_listed_fingerprint_uniq',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='jobpost',
+            index=models.Index(
+                condition=models.Q(deleted=False, expired=False),
+                fields=['-rank_score', '-id'],
+                name='jobs_jobpost_listed_rank_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,57 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_jobpost_expired'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedJobPost',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=500)),
+                ('description', models.TextField()),
+                ('company', models.CharField(max_length=500)),
+                ('location', models.CharField(max_length=500)),
+                ('function', models.CharField(blank=True, max_length=500, null=True)),
+                ('schedule', models.CharField(blank=True, max_length=500, null=True)),
+                ('deadline', models.DateField(blank=True, null=True)),
+                ('responsibilities', models.TextField(blank=True, null=True)),
+                ('requirements', models.TextField(blank=True, null=True)),
+                ('posted_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('expired', models.BooleanField(default=False)),
+                ('is_scraped', models.BooleanField(default=False)),
+                ('is_premium', models.BooleanField(default=False)),
+                ('premium_days', models.IntegerField(default=0)),
+                ('priority_level', models.IntegerField(default=0)),
+                ('apply_link', models.URLField(default='', max_length=1000)),
+                ('is_paid', models.BooleanField(default=False)),
+                ('posting_cost', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('fingerprint', models.CharField(editable=False, max_length=32)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('posted_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_job_posts', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedJobApplication',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('full_name', models.CharField(blank=True, max_length=255)),
+                ('email', models.EmailField(blank=True, max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=15)),
+                ('cover_letter', models.TextField(blank=True, null=True)),
+                ('applied_at', models.DateTimeField()),
+                ('resume', models.FileField(upload_to='resumes/')),
+                ('match_score', models.FloatField(blank=True, default=0.0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='jobs.archivedjobpost')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('jobs', '0009_archivedjobpost_archivedjobapplication'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='jobpost',
+            index=models.Index(fields=['updated_at'], name='jobs_jobpost_updated_idx'),
+        ),
+    ]
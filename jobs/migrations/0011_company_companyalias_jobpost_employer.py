@@ -0,0 +1,47 @@
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Existing jobs are linked by `manage.py backfill_companies`
+    atomic = False
+
+    dependencies = [
+        ('jobs', '0010_jobpost_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Company',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=500)),
+            ],
+            options={
+                'ordering': ['name'],
+                'verbose_name_plural': 'companies',
+            },
+        ),
+        migrations.CreateModel(
+            name='CompanyAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=500, unique=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='jobs.company')),
+            ],
+            options={
+                'verbose_name_plural': 'company aliases',
+            },
+        ),
+        migrations.AddField(
+            model_name='jobpost',
+            name='employer',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='jobs.company'),
+        ),
+        AddIndexConcurrently(
+            model_name='jobpost',
+            index=models.Index(fields=['employer'], name='jobs_jobpost_employer_idx'),
+        ),
+    ]
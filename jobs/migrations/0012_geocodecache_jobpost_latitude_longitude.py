@@ -0,0 +1,44 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Existing jobs get coordinates from `manage.py geocode_jobs`
+    atomic = False
+
+    dependencies = [
+        ('jobs', '0011_company_companyalias_jobpost_employer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=500, unique=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('source', models.CharField(choices=[('gazetteer', 'Gazetteer'), ('online', 'Online geocoder'), ('manual', 'Manual')], max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='jobpost',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobpost',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        AddIndexConcurrently(
+            model_name='jobpost',
+            index=models.Index(
+                condition=models.Q(deleted=False, expired=False, latitude__isnull=False),
+                fields=['latitude', 'longitude'],
+                name='jobs_jobpost_listed_geo_idx',
+            ),
+        ),
+    ]
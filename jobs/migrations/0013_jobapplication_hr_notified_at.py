@@ -0,0 +1,34 @@
+import django.db.models.functions.datetime
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('jobs', '0012_geocodecache_jobpost_latitude_longitude'),
+    ]
+
+    operations = [
+        # Existing applications count as notified, so the first digests don't
+        # announce the whole history. A now() default is evaluated once and
+        # doesn't rewrite the table; it is dropped again for new applications.
+        migrations.AddField(
+            model_name='jobapplication',
+            name='hr_notified_at',
+            field=models.DateTimeField(blank=True, db_default=django.db.models.functions.datetime.Now(),
+                                       editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='hr_notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        AddIndexConcurrently(
+            model_name='jobapplication',
+            index=models.Index(condition=models.Q(hr_notified_at__isnull=True), fields=['applied_at'],
+                               name='jobs_app_unnotified_idx'),
+        ),
+    ]
@@ -1,15 +1,118 @@
-from django.db import models
+import hashlib
+import re
+
+from django.db import models, transaction
 from users.models import CustomUser
 from django.conf import settings
 from django.core.files.storage import default_storage
-from django.db import models
-from payments.models import Order
+
+from . import geo, ranking
+
+def job_fingerprint(title, company, apply_link):
+    """Dedup key: case- and whitespace-insensitive title and company, plus the apply link."""
+    key = '\x1f'.join(
+        ' '.join(value.split()).lower() for value in (title or '', company or '')
+    ) + '\x1f' + (apply_link or '').strip()
+    return hashlib.md5(key.encode()).hexdigest()
+
+# Legal-form words dropped from company names before matching
+LEGAL_FORMS = {
+    'llc', 'ltd', 'limited', 'inc', 'corp', 'co', 'plc', 'gmbh', 'jsc', 'ojsc', 'cjsc', 'mmc', 'asc', 'qsc', 'ssc',
+}
+
+
+def company_key(name):
+    """Matching key for a company name: casefolded words without punctuation or legal form."""
+    words = re.sub(r'\W+', ' ', (name or '').casefold()).split()
+    core = [word for word in words if word not in LEGAL_FORMS]
+    return ' '.join(core or words)[:500]
+
+
+class CompanyManager(models.Manager):
+    def resolve(self, names):
+        """Map company names to Company ids, creating companies for unseen names."""
+        keys = {name: company_key(name) for name in names if company_key(name)}
+        ids = dict(CompanyAlias.objects.filter(key__in=set(keys.values())).values_list('key', 'company_id'))
+        missing = {}
+        for name, key in keys.items():
+            if key not in ids:
+                missing.setdefault(key, ' '.join(name.split())[:500])
+        if missing:
+            with transaction.atomic():
+                created = self.bulk_create([Company(name=name) for name in missing.values()])
+                CompanyAlias.objects.bulk_create(
+                    [CompanyAlias(key=key, company=company) for key, company in zip(missing, created)],
+                    ignore_conflicts=True,
+                )
+                # Keys another process created meanwhile keep its company
+                ids.update(CompanyAlias.objects.filter(key__in=list(missing)).values_list('key', 'company_id'))
+                self.filter(id__in=[company.id for company in created]).exclude(
+                    id__in=[ids[key] for key in missing]).delete()
+        return {name: ids[key] for name, key in keys.items()}
+
+    def matching(self, text):
+        """Companies whose name or an alias contains `text`."""
+        key = company_key(text)
+        query = models.Q(name__icontains=text.strip())
+        if key:
+            query |= models.Q(aliases__key__contains=key)
+        return self.filter(query).values('id')
+
+
+class Company(models.Model):
+    """Canonical company; JobPost.company keeps the name as posted."""
+    name = models.CharField(max_length=500)
+
+    objects = CompanyManager()
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'companies'
+
+    def __str__(self):
+        return self.name
+
+
+class CompanyAlias(models.Model):
+    """company_key() of a name that resolves to `company`; scraped variants map to one company."""
+    key = models.CharField(max_length=500, unique=True)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='aliases')
+
+    class Meta:
+        verbose_name_plural = 'company aliases'
+
+    def __str__(self):
+        return self.key
+
+
+class GeocodeCache(models.Model):
+    """Coordinates found for a location_key(); latitude is None when the place wasn't found."""
+    GAZETTEER = 'gazetteer'
+    ONLINE = 'online'
+    MANUAL = 'manual'
+    SOURCE_CHOICES = [(GAZETTEER, 'Gazetteer'), (ONLINE, 'Online geocoder'), (MANUAL, 'Manual')]
+
+    key = models.CharField(max_length=500, unique=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.key
+
 
 class JobPost(models.Model):
     title = models.CharField(max_length=500)
     description = models.TextField()
     company = models.CharField(max_length=500)
+    # Company resolved from `company` on save; indexed below
+    employer = models.ForeignKey(Company, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+                                 db_index=False, related_name='jobs')
     location = models.CharField(max_length=500)
+    # Coordinates of `location` (jobs.geo), set on save; None when unknown
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
     function = models.CharField(max_length=500, blank=True, null=True)
     schedule = models.CharField(max_length=500, blank=True, null=True)
     deadline = models.DateField(blank=True, null=True)
@@ -17,7 +120,10 @@ class JobPost(models.Model):
     requirements = models.TextField(blank=True, null=True)
     posted_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='job_posts')
     posted_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     deleted = models.BooleanField(default=False)
+    # Past its listing window or deadline; set by jobs.maintenance
+    expired = models.BooleanField(default=False)
     is_scraped = models.BooleanField(default=False)
     is_premium = models.BooleanField(default=False)
     premium_days = models.IntegerField(default=0)
@@ -26,11 +132,64 @@ class JobPost(models.Model):
     # New fields for payment integration
     is_paid = models.BooleanField(default=False)
     posting_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    payment_order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='job_post')  # Link to the payment order
+    # The payment order is reachable as `job.order` (Order.job)
+    # job_fingerprint() of title, company and apply_link; unique among listed jobs
+    fingerprint = models.CharField(max_length=32, editable=False)
+    # Listing order, see jobs.ranking; refreshed in bulk as freshness decays
+    rank_score = models.FloatField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fingerprint'],
+                condition=models.Q(deleted=False, expired=False),
+                name='jobs_jobpost_listed_fingerprint_uniq',
+            ),
+        ]
+        indexes = [
+            # Listed jobs in listing order, so a page of ids is an index-only scan
+            models.Index(
+                fields=['-rank_score', '-id'],
+                condition=models.Q(deleted=False, expired=False),
+                name='jobs_jobpost_listed_rank_idx',
+            ),
+            # Recently changed jobs, for jobs.autocomplete syncs and the archiver
+            models.Index(fields=['updated_at'], name='jobs_jobpost_updated_idx'),
+            models.Index(fields=['employer'], name='jobs_jobpost_employer_idx'),
+            # Bounding-box search over listed jobs with coordinates (jobs.geo.within_q)
+            models.Index(
+                fields=['latitude', 'longitude'],
+                condition=models.Q(deleted=False, expired=False, latitude__isnull=False),
+                name='jobs_jobpost_listed_geo_idx',
+            ),
+        ]
+
+    is_archived = False
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.fingerprint = job_fingerprint(self.title, self.company, self.apply_link)
+        self.rank_score = ranking.score(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'company' in update_fields:
+            self.employer_id = Company.objects.resolve([self.company]).get(self.company)
+        if update_fields is None or 'location' in update_fields:
+            self.latitude, self.longitude = geo.locate([self.location]).get(self.location) or (None, None)
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'company' in update_fields:
+                update_fields.add('employer')
+            if 'location' in update_fields:
+                update_fields.update(('latitude', 'longitude'))
+            if {'title', 'company', 'apply_link'} & update_fields:
+                update_fields.add('fingerprint')
+            if ranking.SCORED_FIELDS & update_fields:
+                update_fields.add('rank_score')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
 class JobApplication(models.Model):
     job = models.ForeignKey(JobPost, on_delete=models.CASCADE)
     full_name = models.CharField(max_length=255, blank=True)
@@ -40,6 +199,14 @@ class JobApplication(models.Model):
     applied_at = models.DateTimeField(auto_now_add=True)
     resume = models.FileField(upload_to='resumes/')
     match_score = models.FloatField(blank=True, default=0.0) 
+    # Set when the application went out in the job owner's digest (jobs.notifications)
+    hr_notified_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['applied_at'], name='jobs_app_unnotified_idx',
+                         condition=models.Q(hr_notified_at__isnull=True)),
+        ]
 
     def __str__(self):
         return f'{self.full_name} - {self.job.title}'
@@ -49,3 +216,54 @@ class JobApplication(models.Model):
         if self.match_score is not None:
             return round(self.match_score * 100, 2)
         return None
+
+
+# Archive of deleted and expired jobs, moved out of the hot tables by
+# `manage.py archive_jobs` (jobs.archive). Rows keep their original ids.
+class ArchivedJobPost(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=500)
+    description = models.TextField()
+    company = models.CharField(max_length=500)
+    location = models.CharField(max_length=500)
+    function = models.CharField(max_length=500, blank=True, null=True)
+    schedule = models.CharField(max_length=500, blank=True, null=True)
+    deadline = models.DateField(blank=True, null=True)
+    responsibilities = models.TextField(blank=True, null=True)
+    requirements = models.TextField(blank=True, null=True)
+    posted_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='archived_job_posts')
+    posted_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    deleted = models.BooleanField(default=False)
+    expired = models.BooleanField(default=False)
+    is_scraped = models.BooleanField(default=False)
+    is_premium = models.BooleanField(default=False)
+    premium_days = models.IntegerField(default=0)
+    priority_level = models.IntegerField(default=0)
+    apply_link = models.URLField(max_length=1000, default='')
+    is_paid = models.BooleanField(default=False)
+    posting_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    fingerprint = models.CharField(max_length=32, editable=False)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedJobApplication(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    job = models.ForeignKey(ArchivedJobPost, on_delete=models.CASCADE, related_name='applications')
+    full_name = models.CharField(max_length=255, blank=True)
+    email = models.EmailField(blank=True)
+    phone = models.CharField(max_length=15, blank=True)
+    cover_letter = models.TextField(blank=True, null=True)
+    applied_at = models.DateTimeField()
+    resume = models.FileField(upload_to='resumes/')
+    match_score = models.FloatField(blank=True, default=0.0)
+
+    match_score_percentage = JobApplication.match_score_percentage
+
+    def __str__(self):
+        return f'{self.full_name} - {self.job.title}'
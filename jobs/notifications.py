@@ -0,0 +1,91 @@
+# jobs/notifications.py
+#
+# New-application emails to the HR user who posted the job, as digests.
+#
+# Applications are saved with hr_notified_at unset. A job owner's digest is
+# due once their oldest unannounced application is DIGEST_PERIOD old; it then
+# lists everything that arrived since, so a busy posting costs one email an
+# hour instead of one per applicant. send_hr_digests() is called by the
+# mailer worker on every pass and queues the digests as bulk mail.
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from mailer.models import OutboundEmail
+from .models import JobApplication
+
+logger = logging.getLogger(__name__)
+
+DIGEST_PERIOD = timedelta(hours=1)
+DIGEST_BATCH_SIZE = 50
+
+
+def send_hr_digests(period=DIGEST_PERIOD):
+    """Queue every due HR digest, in claimed batches. Returns the digests queued."""
+    sent = 0
+    while True:
+        owners, count = _send_batch(period)
+        sent += count
+        # Nothing claimed means other workers hold the due rows; picking the
+        # same owners again would make no progress
+        if owners < DIGEST_BATCH_SIZE or count == 0:
+            return sent
+
+
+def _send_batch(period):
+    now = timezone.now()
+    owner_ids = list(
+        JobApplication.objects.filter(hr_notified_at__isnull=True)
+        .values('job__posted_by')
+        .annotate(oldest=Min('applied_at'))
+        .filter(oldest__lte=now - period)
+        .order_by('job__posted_by')
+        .values_list('job__posted_by', flat=True)[:DIGEST_BATCH_SIZE]
+    )
+    if not owner_ids:
+        return 0, 0
+    with transaction.atomic():
+        # Another worker may hold some of these; it sends those digests
+        applications = list(
+            JobApplication.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(hr_notified_at__isnull=True, job__posted_by__in=owner_ids)
+            .select_related('job__posted_by')
+            .order_by('job__posted_by', 'job_id', '-match_score', 'applied_at')
+        )
+        by_owner = {}
+        for application in applications:
+            by_owner.setdefault(application.job.posted_by, {}).setdefault(application.job, []).append(application)
+        messages = [_digest(owner, jobs, period) for owner, jobs in by_owner.items()]
+        if messages:
+            get_connection(priority=OutboundEmail.BULK).send_messages(messages)
+        JobApplication.objects.filter(id__in=[application.id for application in applications]).update(
+            hr_notified_at=now)
+    return len(owner_ids), len(messages)
+
+
+def _digest(owner, jobs, period):
+    groups = [
+        {
+            'job': job,
+            'applications': applications,
+            'url': settings.SITE_URL + reverse('hr_applicants', args=[job.id]),
+        }
+        for job, applications in jobs.items()
+    ]
+    count = sum(len(group['applications']) for group in groups)
+    subject = f"{count} new application{'s' if count != 1 else ''}"
+    if len(groups) == 1:
+        subject += f" for {groups[0]['job'].title}"
+    context = {
+        'jobs': groups,
+        'site_url': settings.SITE_URL,
+        'period_minutes': int(period.total_seconds() // 60),
+    }
+    return EmailMessage(subject=subject, body=render_to_string('jobs/email/hr_digest.txt', context), to=[owner.email])
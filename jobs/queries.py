@@ -0,0 +1,40 @@
+# jobs/queries.py
+#
+# Which jobs are shown publicly. The job list page, the JSON API and the
+# feeds all go through these helpers so they agree on what is listed.
+#
+# Listing windows are applied by jobs.maintenance, which marks jobs past
+# them as expired; reads only check the flags.
+from datetime import timedelta
+
+from django.db.models import Q
+
+from .models import JobPost
+
+# How long a job stays listed after posting, enforced by jobs.maintenance
+POSTED_JOB_MAX_AGE = timedelta(days=15)
+SCRAPED_JOB_MAX_AGE = timedelta(days=10)
+
+# Columns the job list template shows
+LIST_FIELDS = ('id', 'title', 'company', 'location', 'latitude', 'longitude', 'posted_at', 'is_scraped', 'apply_link')
+
+
+def listed_q():
+    """Jobs that are neither deleted nor expired."""
+    return Q(deleted=False, expired=False)
+
+
+def active_jobs():
+    """Listed jobs. The listed fingerprint constraint keeps them free of duplicates."""
+    return JobPost.objects.filter(listed_q())
+
+
+def ranked_job_ids():
+    """Ids of listed jobs in listing order, see jobs.ranking."""
+    return active_jobs().order_by('-rank_score', '-id').values_list('id', flat=True)
+
+
+def jobs_in_order(ids):
+    """Load the listed jobs for `ids`, keeping their order."""
+    jobs = JobPost.objects.only(*LIST_FIELDS).in_bulk(ids)
+    return [jobs[job_id] for job_id in ids if job_id in jobs]
@@ -0,0 +1,107 @@
+# jobs/ranking.py
+#
+# Listing order. Each job gets a stored rank_score:
+#
+#     freshness   FRESHNESS_WEIGHT, halving every FRESHNESS_HALF_LIFE_HOURS
+#     priority    PRIORITY_WEIGHT per priority_level
+#     premium     PREMIUM_WEIGHT while premium_days since posting last
+#     payment     PAID_WEIGHT for paid, posted (non-scraped) jobs
+#
+# Freshness decays, so scores are refreshed in bulk by
+# `manage.py refresh_rank_scores` rather than computed per request; save()
+# scores a job immediately so new and edited jobs don't wait for the next
+# refresh. score_values() and REFRESH_SQL must stay in step.
+import math
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+FRESHNESS_WEIGHT = 100.0
+FRESHNESS_HALF_LIFE_HOURS = 48.0
+PRIORITY_WEIGHT = 25.0
+PREMIUM_WEIGHT = 300.0
+PAID_WEIGHT = 100.0
+
+# Fields score() reads
+SCORED_FIELDS = {'posted_at', 'deleted', 'expired', 'priority_level', 'is_premium', 'premium_days', 'is_paid', 'is_scraped'}
+
+# Jobs older than this are out of every listing and score 0
+MAX_RANKED_AGE_DAYS = 15
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+def score(job, now=None):
+    return score_values(
+        job.posted_at, job.deleted or job.expired, job.priority_level, job.is_premium, job.premium_days,
+        job.is_paid, job.is_scraped, now,
+    )
+
+
+def score_values(posted_at, unlisted=False, priority_level=0, is_premium=False, premium_days=0,
+                 is_paid=False, is_scraped=False, now=None):
+    now = now or timezone.now()
+    posted_at = posted_at or now
+    age_hours = max((now - posted_at).total_seconds() / 3600, 0.0)
+    if unlisted or age_hours > MAX_RANKED_AGE_DAYS * 24:
+        return 0.0
+    value = FRESHNESS_WEIGHT * math.pow(0.5, age_hours / FRESHNESS_HALF_LIFE_HOURS)
+    value += PRIORITY_WEIGHT * (priority_level or 0)
+    if is_premium and age_hours < (premium_days or 0) * 24:
+        value += PREMIUM_WEIGHT
+    if is_paid and not is_scraped:
+        value += PAID_WEIGHT
+    return round(value, 4)
+
+
+REFRESH_SQL = """
+WITH scored AS (
+    SELECT id, CASE
+        WHEN expired OR age_hours > %(max_age_hours)s THEN 0
+        ELSE round((
+            %(freshness)s * power(0.5, age_hours / %(half_life)s)
+            + %(priority)s * priority_level
+            + CASE WHEN is_premium AND age_hours < premium_days * 24 THEN %(premium)s ELSE 0 END
+            + CASE WHEN is_paid AND NOT is_scraped THEN %(paid)s ELSE 0 END
+        )::numeric, 4)
+    END AS new_score
+    FROM (
+        SELECT id, expired, priority_level, is_premium, premium_days, is_paid, is_scraped, rank_score,
+               greatest(extract(epoch FROM %(now)s - posted_at) / 3600, 0)::float8 AS age_hours
+        FROM {table}
+        WHERE NOT deleted AND id > %(after)s AND id <= %(upto)s
+    ) jobs
+    -- Rows already at 0 and out of the ranking stay untouched
+    WHERE (NOT expired AND age_hours <= %(max_age_hours)s) OR rank_score <> 0
+)
+UPDATE {table} j
+SET rank_score = scored.new_score
+FROM scored
+WHERE j.id = scored.id AND abs(j.rank_score - scored.new_score) > 0.0001
+"""
+
+
+def refresh_scores(batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Recompute rank_score for every live job in id-range batches. Returns rows changed."""
+    from .models import JobPost
+
+    now = now or timezone.now()
+    table = connection.ops.quote_name(JobPost._meta.db_table)
+    sql = REFRESH_SQL.format(table=table)
+    params = {
+        'now': now,
+        'max_age_hours': MAX_RANKED_AGE_DAYS * 24,
+        'freshness': FRESHNESS_WEIGHT,
+        'half_life': FRESHNESS_HALF_LIFE_HOURS,
+        'priority': PRIORITY_WEIGHT,
+        'premium': PREMIUM_WEIGHT,
+        'paid': PAID_WEIGHT,
+    }
+    last_id = JobPost.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    changed = 0
+    # Short transactions per id range keep row locks brief
+    for after in range(0, last_id, batch_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, dict(params, after=after, upto=after + batch_size))
+            changed += cursor.rowcount
+    return changed
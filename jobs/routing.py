@@ -0,0 +1,10 @@
+# jobs/routing.py
+
+from django.urls import path
+
+from .consumers import ApplicantFeedConsumer
+
+websocket_urlpatterns = [
+    path('ws/hr/applicants/', ApplicantFeedConsumer.as_asgi()),
+    path('ws/hr/applicants/<int:job_id>/', ApplicantFeedConsumer.as_asgi()),
+]
@@ -0,0 +1,36 @@
+# jobs/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from jobsite import prebuilt
+from . import live
+from .caching import invalidate_job_detail
+from .feeds import FEED_GROUP
+from .models import JobApplication, JobPost
+from .sitemaps import SITEMAP_GROUP
+
+
+@receiver(post_save, sender=JobPost)
+@receiver(post_delete, sender=JobPost)
+def mark_prebuilt_files_stale(sender, instance, **kwargs):
+    prebuilt.mark_stale(SITEMAP_GROUP)
+    prebuilt.mark_stale(FEED_GROUP)
+
+
+@receiver(post_save, sender=JobPost)
+@receiver(post_delete, sender=JobPost)
+def drop_cached_job_detail(sender, instance, **kwargs):
+    invalidate_job_detail(instance.id)
+
+
+@receiver(post_save, sender=JobApplication)
+def publish_live_application(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        event = live.CREATED
+    elif update_fields is None or 'match_score' in update_fields:
+        event = live.SCORED
+    else:
+        return
+    transaction.on_commit(lambda: live.publish_application(instance, event))
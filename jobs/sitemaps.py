@@ -1,27 +1,116 @@
 # jobs/sitemaps.py
+from xml.sax.saxutils import escape
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
 from django.urls import reverse
+from django.utils import timezone
+
+from jobsite import prebuilt
 from .models import JobPost
 
+# Sitemap protocol limit per file
+SITEMAP_LIMIT = 50000
+SITEMAP_GROUP = 'sitemaps'
+
+
 class JobSitemap(Sitemap):
     changefreq = "daily"
     priority = 0.9
+    limit = SITEMAP_LIMIT
 
     def items(self):
-        return JobPost.objects.filter(deleted=False)
+        # Only the two columns the sitemap needs
+        return JobPost.objects.filter(deleted=False, expired=False).order_by('id').values_list('id', 'posted_at')
 
-    def lastmod(self, obj):
-        return obj.posted_at
+    def lastmod(self, item):
+        return item[1]
 
-    def location(self, obj):
-        return reverse('job_detail', args=[obj.id])
+    def location(self, item):
+        return reverse('job_detail', args=[item[0]])
 
 class StaticViewSitemap(Sitemap):
     priority = 0.5
     changefreq = 'monthly'
 
     def items(self):
-        return ['job_list', 'about']  
+        return ['job_list', 'about']
 
     def location(self, item):
         return reverse(item)
+
+
+def _url_entry(location, lastmod, changefreq, priority):
+    lastmod_tag = f'<lastmod>{lastmod.date().isoformat()}</lastmod>' if lastmod else ''
+    return (
+        f'<url><loc>{escape(location)}</loc>{lastmod_tag}'
+        f'<changefreq>{changefreq}</changefreq><priority>{priority}</priority></url>'
+    )
+
+
+def _urlset(entries):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        + ''.join(entries)
+        + '</urlset>\n'
+    ).encode()
+
+
+def build_sitemaps():
+    """Write the sitemap index and its sections to PREBUILT_ROOT.
+
+    Job URLs are streamed from a narrow `values_list` query and split into
+    sections of SITEMAP_LIMIT URLs. Returns the list of section names.
+    """
+    base = settings.SITE_URL.rstrip('/')
+    now = timezone.now()
+    sections = []
+
+    static = StaticViewSitemap()
+    sections.append(('sitemap-static.xml', now))
+    prebuilt.write_atomic('sitemap-static.xml', _urlset(
+        _url_entry(base + static.location(item), None, static.changefreq, static.priority)
+        for item in static.items()
+    ))
+
+    jobs = JobSitemap()
+    entries, newest, page = [], None, 0
+
+    def flush_section():
+        nonlocal entries, newest, page
+        page += 1
+        name = f'sitemap-jobs-{page}.xml'
+        prebuilt.write_atomic(name, _urlset(entries))
+        sections.append((name, newest))
+        entries, newest = [], None
+
+    for item in jobs.items().iterator(chunk_size=5000):
+        lastmod = jobs.lastmod(item)
+        entries.append(_url_entry(base + jobs.location(item), lastmod, jobs.changefreq, jobs.priority))
+        if lastmod and (newest is None or lastmod > newest):
+            newest = lastmod
+        if len(entries) >= SITEMAP_LIMIT:
+            flush_section()
+    if entries or page == 0:
+        flush_section()
+
+    # Drop sections left over from a bigger previous build
+    stale_page = page + 1
+    while prebuilt.is_file(f'sitemap-jobs-{stale_page}.xml'):
+        prebuilt.remove(f'sitemap-jobs-{stale_page}.xml')
+        stale_page += 1
+
+    index = ''.join(
+        f'<sitemap><loc>{escape(base + "/" + name)}</loc>'
+        + (f'<lastmod>{lastmod.isoformat()}</lastmod>' if lastmod else '')
+        + '</sitemap>'
+        for name, lastmod in sections
+    )
+    prebuilt.write_atomic('sitemap.xml', (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        + index
+        + '</sitemapindex>\n'
+    ).encode())
+    return [name for name, _ in sections]
@@ -20,3 +20,20 @@ def add_class(field, css_class):
         # Log the error or handle it as needed
         return field  # or raise an error if this is not expected
 
+
+
+def query_string(params, **changes):
+    """`params` (a QueryDict) as a query string with `changes` applied; a value of None drops the parameter."""
+    params = params.copy()
+    for name, value in changes.items():
+        if value is None:
+            params.pop(name, None)
+        else:
+            params[name] = value
+    return '?' + params.urlencode()
+
+
+@register.simple_tag(takes_context=True)
+def query_with(context, **changes):
+    """The current query string with `changes` applied, e.g. {% query_with page=2 %}."""
+    return query_string(context['request'].GET, **changes)
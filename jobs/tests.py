@@ -1,18 +1,328 @@
-from google.cloud import storage
-from google.oauth2 import service_account
+import gzip
 import os
+from datetime import timedelta
+from unittest import mock
 
-# Load credentials from the environment variable or directly from file
-credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "jobs-428816-193e530395ee.json")
-credentials = service_account.Credentials.from_service_account_file(credentials_path)
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
 
-# Initialize the client
-client = storage.Client(credentials=credentials, project='jobs-428816')
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
 
-# Test accessing the bucket
-bucket_name = 'jobs_aze'
-try:
-    bucket = client.get_bucket(bucket_name)
-    print(f"Successfully accessed the bucket: {bucket.name}")
-except Exception as e:
-    print(f"Error accessing the bucket: {e}")
+from users.models import CustomUser
+from . import autocomplete, live
+from .autocomplete import JobValueIndex, PrefixIndex
+from .forms import JobPostForm
+from .models import JobApplication, JobPost
+from .routing import websocket_urlpatterns
+from .views import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, _parse_radius
+
+
+def make_job(user, title='Python Developer', company='Caspian Tech', **fields):
+    fields.setdefault('location', 'Baku')
+    fields.setdefault('description', 'Build Django services.')
+    fields.setdefault('apply_link', f'https://jobs.example.com/{title.lower().replace(" ", "-")}')
+    return JobPost.objects.create(title=title, company=company, posted_by=user, **fields)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class JobDetailCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='hr@example.com', password='secret')
+        self.job = make_job(self.user)
+        self.url = reverse('job_detail', args=[self.job.id])
+
+    def test_anonymous_page_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertContains(first, 'Python Developer')
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertIn('public', second['Cache-Control'])
+
+    def test_saving_the_job_refreshes_the_page(self):
+        self.client.get(self.url)
+        self.job.title = 'Senior Python Developer'
+        self.job.save()
+
+        response = self.client.get(self.url)
+
+        self.assertContains(response, 'Senior Python Developer')
+
+    def test_deleted_job_is_404_once_cached(self):
+        self.client.get(self.url)
+        self.job.deleted = True
+        self.job.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_matching_etag_answers_304(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_query_string_stays_out_of_canonical_url(self):
+        self.client.get(self.url)
+
+        response = self.client.get(self.url + '?utm_source=newsletter')
+
+        self.assertContains(response, f'<link rel="canonical" href="http://testserver{self.url}">')
+        self.assertNotContains(response, 'utm_source')
+
+    def test_logged_in_page_is_private(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(self.url)
+
+        self.assertIn('private', response['Cache-Control'])
+
+
+class JobFeedTests(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='hr@example.com')
+        self.jobs = [make_job(self.user, title=f'Job {i}') for i in range(5)]
+        self.url = reverse('api_job_feed')
+
+    def walk(self, **params):
+        ids, cursor = [], None
+        while True:
+            query = dict(params, **({'cursor': cursor} if cursor else {}))
+            data = self.client.get(self.url, query).json()
+            ids.extend(item['id'] for item in data['results'])
+            cursor = data['next']
+            if not cursor:
+                return ids
+
+    def test_cursor_walks_every_job_once(self):
+        # Equal posted_at must still page on id without skipping or repeating rows
+        JobPost.objects.update(posted_at=timezone.now() - timedelta(hours=1))
+
+        ids = self.walk(limit=2)
+
+        self.assertEqual(ids, sorted((job.id for job in self.jobs), reverse=True))
+
+    def test_listed_jobs_only(self):
+        JobPost.objects.filter(id=self.jobs[0].id).update(deleted=True)
+        JobPost.objects.filter(id=self.jobs[1].id).update(expired=True)
+
+        self.assertEqual(sorted(self.walk()), sorted(job.id for job in self.jobs[2:]))
+
+    def test_fields_are_selectable(self):
+        data = self.client.get(self.url, {'fields': 'id,title', 'limit': 1}).json()
+
+        self.assertEqual(data['results'], [{'id': self.jobs[-1].id, 'title': 'Job 4'}])
+
+    def test_bad_parameters_are_400(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'fields': 'id,salary'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'limit': 'ten'}).status_code, 400)
+
+    def test_matching_etag_answers_304(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.jobs[0].save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_encodings_have_their_own_etag(self):
+        JobPost.objects.update(description='Build Django services. ' * 100)
+        params = {'fields': 'id,description'}
+
+        plain = self.client.get(self.url, params)
+        compressed = self.client.get(self.url, params, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertEqual(compressed['ETag'], plain['ETag'][:-1] + '-gz"')
+        # A coding with q=0 is refused
+        refused = self.client.get(self.url, params, HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+        self.assertEqual(refused['Content-Encoding'], 'gzip')
+        # Either tag shows the client has the current page
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=compressed['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class JobPostFormTests(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='hr@example.com')
+        self.data = {'title': 'Python Developer', 'description': 'Django', 'company': 'Caspian Tech', 'location': 'Baku'}
+        self.job = JobPostForm(self.data, user=self.user).save(commit=False)
+        self.job.posted_by = self.user
+        self.job.save()
+
+    def test_unpaid_post_is_resumed(self):
+        form = JobPostForm(dict(self.data, description='Django and Celery'), user=self.user)
+
+        self.assertTrue(form.is_valid(), form.errors)
+        job = form.save()
+        self.assertEqual(job.pk, self.job.pk)
+        self.assertEqual(JobPost.objects.get().description, 'Django and Celery')
+
+    def test_paid_post_is_a_duplicate(self):
+        JobPost.objects.update(is_paid=True)
+
+        self.assertFalse(JobPostForm(self.data, user=self.user).is_valid())
+
+    def test_someone_elses_post_is_a_duplicate(self):
+        other = CustomUser.objects.create_user(email='other@example.com')
+
+        self.assertFalse(JobPostForm(self.data, user=other).is_valid())
+
+
+class RadiusTests(SimpleTestCase):
+
+    def test_parse_radius(self):
+        self.assertEqual(_parse_radius('10'), 10)
+        self.assertEqual(_parse_radius(' 2.5 '), 2.5)
+        self.assertEqual(_parse_radius('-5'), 0)
+        self.assertEqual(_parse_radius('1e9'), MAX_RADIUS_KM)
+        for value in ('', 'far', 'nan', 'inf', '1,5'):
+            self.assertEqual(_parse_radius(value), DEFAULT_RADIUS_KM, value)
+
+
+class PrefixIndexTests(SimpleTestCase):
+
+    def test_lookup_is_case_and_space_insensitive(self):
+        index = PrefixIndex(['Python  Developer', 'python developer', 'PHP Developer', 'Accountant', '', None])
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.lookup('  PYTHON d'), ['Python Developer'])
+        self.assertEqual(index.lookup('p'), ['PHP Developer', 'Python Developer'])
+        self.assertEqual(index.lookup(''), [])
+
+    def test_add_keeps_values_distinct(self):
+        index = PrefixIndex(['Data Analyst'])
+
+        self.assertFalse(index.add('data  analyst'))
+        self.assertTrue(index.add('Data Engineer'))
+        self.assertEqual(index.lookup('data'), ['Data Analyst', 'Data Engineer'])
+
+    def test_limit(self):
+        index = PrefixIndex([f'Engineer {i}' for i in range(20)])
+
+        self.assertEqual(len(index.lookup('eng', limit=5)), 5)
+
+
+class JobValueIndexTests(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='hr@example.com')
+        self.job = make_job(self.user)
+        self.index = JobValueIndex('title')
+        self.index.rebuild()
+
+    def test_sync_picks_up_new_jobs(self):
+        make_job(self.user, title='Python Architect')
+
+        self.assertEqual(self.index.sync(), 1)
+        self.assertEqual(self.index.lookup('python'), ['Python Architect', 'Python Developer'])
+
+    def test_rebuild_drops_unlisted_jobs(self):
+        self.job.deleted = True
+        self.job.save()
+
+        self.index.sync()
+        self.assertEqual(self.index.index.lookup('python'), ['Python Developer'])
+        self.index.rebuild()
+        self.assertEqual(self.index.index.lookup('python'), [])
+
+    def test_endpoint(self):
+        with mock.patch.dict(autocomplete.indexes, {'title': self.index}):
+            response = self.client.get(reverse('api_autocomplete'), {'field': 'title', 'q': 'pyth'})
+
+        self.assertEqual(response.json(), {'results': ['Python Developer']})
+        self.assertEqual(self.client.get(reverse('api_autocomplete'), {'field': 'salary'}).status_code, 400)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class ApplicantFeedTests(TestCase):
+
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(email='hr@example.com')
+        self.other = CustomUser.objects.create_user(email='other@example.com')
+        self.job = make_job(self.owner)
+        self.second_job = make_job(self.owner, title='Data Analyst')
+
+    async def connect(self, user, path='/ws/hr/applicants/'):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), path)
+        communicator.scope['user'] = user
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    def apply(self, job):
+        # The signal publishes once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return JobApplication.objects.create(job=job, full_name='Aysel Mammadova', email='aysel@example.com')
+
+    async def test_rejects_anonymous_and_non_hr_users(self):
+        for user in (AnonymousUser(), CustomUser(id=self.other.id, email='x@example.com', user_type='candidate')):
+            communicator, connected, code = await self.connect(user)
+            self.assertFalse(connected)
+            self.assertEqual(code, 4403)
+
+    async def test_owner_receives_new_application(self):
+        owner, connected, _ = await self.connect(self.owner)
+        other, _, _ = await self.connect(self.other)
+        self.assertTrue(connected)
+
+        application = await sync_to_async(self.apply)(self.job)
+
+        payload = await owner.receive_json_from()
+        self.assertEqual(payload['event'], live.CREATED)
+        self.assertEqual((payload['id'], payload['job_id']), (application.id, self.job.id))
+        self.assertEqual(payload['full_name'], 'Aysel Mammadova')
+        self.assertTrue(await other.receive_nothing())
+        await owner.disconnect()
+        await other.disconnect()
+
+    async def test_job_page_only_gets_its_job(self):
+        communicator, _, _ = await self.connect(self.owner, f'/ws/hr/applicants/{self.job.id}/')
+
+        await sync_to_async(self.apply)(self.second_job)
+        self.assertTrue(await communicator.receive_nothing())
+        await sync_to_async(self.apply)(self.job)
+        self.assertEqual((await communicator.receive_json_from())['job_id'], self.job.id)
+        await communicator.disconnect()
+
+    async def test_ping(self):
+        communicator, _, _ = await self.connect(self.owner)
+
+        await communicator.send_json_to({'type': 'ping'})
+
+        self.assertEqual(await communicator.receive_json_from(), {'event': 'pong'})
+        await communicator.disconnect()
+
+
+if __name__ == '__main__':
+    # Checks that the resume bucket is reachable with the configured credentials
+    from google.cloud import storage
+    from google.oauth2 import service_account
+
+    # Load credentials from the environment variable or directly from file
+    credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "jobs-428816-193e530395ee.json")
+    credentials = service_account.Credentials.from_service_account_file(credentials_path)
+
+    # Initialize the client
+    client = storage.Client(credentials=credentials, project='jobs-428816')
+
+    # Test accessing the bucket
+    bucket_name = 'jobs_aze'
+    try:
+        bucket = client.get_bucket(bucket_name)
+        print(f"Successfully accessed the bucket: {bucket.name}")
+    except Exception as e:
+        print(f"Error accessing the bucket: {e}")
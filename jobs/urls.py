@@ -1,8 +1,9 @@
 from django.urls import path
-from . import views
+from . import api, views
 from .views import (
     hr_applicants,
     job_list,
+    job_detail,
     post_job,
     apply_job,
     job_applicants,
@@ -15,6 +16,9 @@ from .views import (
 
 urlpatterns = [
     path('', job_list, name='job_list'),
+    path('<int:job_id>/', job_detail, name='job_detail'),
+    path('api/jobs/', api.job_feed, name='api_job_feed'),
+    path('api/autocomplete/', api.autocomplete, name='api_autocomplete'),
     path('about/', about, name='about'),
     path('post-job/', post_job, name='post_job'),
     path('apply-job/<int:job_id>/', apply_job, name='apply_job'),
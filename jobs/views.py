@@ -1,15 +1,25 @@
 import requests
 import os
-from django.shortcuts import render, get_object_or_404, redirect
+import asyncio
+import math
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from django.utils import timezone
-from .models import JobPost, JobApplication
+from . import geo, queries
+from .caching import job_detail_cache_key
+from .facets import FACET_LABELS, facet_counts
+from .templatetags.custom_tags import query_string
+from .models import ArchivedJobPost, Company, JobPost
+from .archive import applications_for, get_hr_job
 from .forms import JobPostForm, JobApplicationForm, JobSearchForm, ResumeUploadForm
-from django.http import HttpResponseForbidden, JsonResponse, HttpResponse
+from django.http import HttpResponseForbidden, JsonResponse, HttpResponse, Http404
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
 from django.contrib import messages
 import logging
-from datetime import timedelta
 from django.db.models import Q
 import openai
 import PyPDF2
@@ -37,16 +47,12 @@ import base64
 import hashlib
 from uuid import uuid4
 from dotenv import load_dotenv
+from jobsite.instrumentation import timed
+from jobsite import metrics
 
 # Load environment variables
 load_dotenv()
 
-PUBLIC_KEY = os.getenv('PUBLIC_KEY')
-PRIVATE_KEY = os.getenv('PRIVATE_KEY')
-EPOINT_API_URL = 'https://epoint.az/api/1/request'
-
-
-
 # Initialize s3_client with Wasabi configuration
 s3_client = boto3.client(
     's3',
@@ -56,14 +62,22 @@ s3_client = boto3.client(
 )
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-# Log to console
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
 
+# "Near" search on the job list
+RADIUS_CHOICES_KM = (5, 10, 25, 50, 100)
+DEFAULT_RADIUS_KM = 25
+MAX_RADIUS_KM = 500
+
+
+def _parse_radius(value):
+    """The ?radius= value in km, clamped to [0, MAX_RADIUS_KM]; the default if it isn't a number."""
+    try:
+        radius = float(value)
+    except ValueError:
+        return DEFAULT_RADIUS_KM
+    if not math.isfinite(radius):
+        return DEFAULT_RADIUS_KM
+    return max(0.0, min(radius, MAX_RADIUS_KM))
 
 
 
@@ -77,36 +91,50 @@ def job_list(request):
     if job_title:
         query &= Q(title__icontains=job_title)  # Case-insensitive search for job title
     if company:
-        query &= Q(company__icontains=company)  # Case-insensitive search for company
-
-    now = timezone.now()
-
-    # Define time thresholds for scraped and non-scraped jobs
-    scraped_threshold = now - timedelta(days=10)
-    non_scraped_threshold = now - timedelta(days=15)
-
-    # Retrieve non-scraped jobs
-    non_scraped_jobs = JobPost.objects.filter(
-        query,
-        is_scraped=False,
-        posted_at__gte=non_scraped_threshold
-    ).order_by('-posted_at')
-
-    # Retrieve scraped jobs
-    scraped_jobs = JobPost.objects.filter(
-        query,
-        is_scraped=True,
-        posted_at__gte=scraped_threshold
-    ).order_by('-posted_at')
-
-    # Combine non-scraped and scraped jobs while ensuring no duplicates
-    combined_jobs = list(non_scraped_jobs) + list(scraped_jobs)
-
-    # Use a dictionary to remove duplicates based on (title, company, apply_link)
-    unique_jobs = {(job.title.lower(), job.company.lower(), job.apply_link): job for job in combined_jobs}.values()
-
-    # Final pagination for the combined unique result
-    final_paginator = Paginator(list(unique_jobs), 10)  # Show 10 jobs per page
+        # Companies matching the search, then an indexed lookup on employer
+        query &= Q(employer__in=Company.objects.matching(company))
+
+    # Facet filters are exact values picked from the facet counts
+    selected = {}
+    for facet in ('location', 'function', 'schedule'):
+        value = request.GET.get(facet, '')
+        if value:
+            selected[facet] = value
+            query &= Q(**{facet: value})
+    employer_id = request.GET.get('employer', '')
+    employer = Company.objects.filter(id=employer_id).first() if employer_id.isdigit() else None
+    if employer:
+        selected['company'] = employer.name
+        query &= Q(employer=employer)
+
+    # Jobs within `radius` km of a place; the place is looked up locally (jobs.geo)
+    near = request.GET.get('near', '').strip()
+    radius = _parse_radius(request.GET.get('radius', ''))
+    center = geo.locate([near], remember=False).get(near) if near else None
+    if center:
+        query &= geo.within_q(center[0], center[1], radius)
+
+    # Counts for the current result set; picking a value narrows it and
+    # starts again from the first page
+    facets = []
+    for facet, counts in facet_counts(queries.active_jobs().filter(query)).items():
+        param = 'employer' if facet == 'company' else facet
+        facets.append({
+            'label': FACET_LABELS[facet],
+            'selected': selected.get(facet, ''),
+            'clear_url': query_string(request.GET, **{param: None, 'page': None}),
+            'values': [
+                {'value': label, 'count': count, 'url': query_string(request.GET, **{param: value, 'page': None})}
+                for value, label, count in counts
+            ],
+        })
+
+    # Listed jobs by rank (jobs.ranking). Duplicates can't exist among listed
+    # jobs (unique fingerprint), so the database paginates directly. Paging
+    # over ids alone is an index-only scan of jobs_jobpost_listed_rank_idx.
+    ranked_ids = queries.ranked_job_ids().filter(query)
+
+    final_paginator = Paginator(ranked_ids, 10)  # Show 10 jobs per page
     page = request.GET.get('page', 1)
 
     try:
@@ -116,17 +144,36 @@ def job_list(request):
     except EmptyPage:
         jobs_page = final_paginator.page(final_paginator.num_pages)
 
+    # Then load just the rows on this page
+    jobs_page.object_list = queries.jobs_in_order(list(jobs_page.object_list))
+    if center:
+        for job in jobs_page.object_list:
+            job.distance_km = round(geo.haversine_km(center[0], center[1], job.latitude, job.longitude), 1)
+
     # Render the page with the jobs
-    return render(request, 'jobs/job_list.html', {'jobs': jobs_page, 'job_title': job_title, 'company': company})
+    return render(request, 'jobs/job_list.html', {
+        'jobs': jobs_page, 'job_title': job_title, 'company': company, 'facets': facets,
+        'near': near, 'radius': radius, 'radius_choices': RADIUS_CHOICES_KM, 'near_unknown': bool(near and not center),
+        # Prefills the job alert form (alerts app)
+        'alert_query': {
+            'job_title': job_title,
+            'company': employer.name if employer else company,
+            'location': selected.get('location', ''),
+            'function': selected.get('function', ''),
+            'schedule': selected.get('schedule', ''),
+        },
+    })
 
 def upload_file_to_wasabi(file_name, bucket_name):
     try:
         # Check if the bucket exists
-        s3_client.head_bucket(Bucket=bucket_name)
+        with timed('s3'):
+            s3_client.head_bucket(Bucket=bucket_name)
         logger.debug(f"Bucket '{bucket_name}' exists. Uploading file...")
 
         # Upload the file with public-read ACL
-        s3_client.upload_file(file_name, bucket_name, file_name, ExtraArgs={'ACL': 'public-read'})
+        with timed('s3'):
+            s3_client.upload_file(file_name, bucket_name, file_name, ExtraArgs={'ACL': 'public-read'})
         logger.debug(f"File '{file_name}' uploaded successfully.")
         # Generate the file URL
         file_url = f"https://.s3.eu-central-2.wasabisys.com/{bucket_name}/resumes/{file_name}"
@@ -145,12 +192,29 @@ def upload_file_to_wasabi(file_name, bucket_name):
         logger.error("Credentials not available.")
         return None
 
-def apply_job(request, job_id):
-    job = get_object_or_404(JobPost, id=job_id)
+def upload_resume(content, bucket_name, file_name):
+    with timed('s3'):
+        s3_client.upload_fileobj(
+            io.BytesIO(content),
+            bucket_name,
+            file_name,
+            ExtraArgs={'ACL': 'public-read'}
+        )
+
+def parse_resume(content):
+    with metrics.RESUME_PARSE_SECONDS.time():
+        return parse_pdf(io.BytesIO(content))
+
+def score_resume(cv_text, job_description):
+    with metrics.RESUME_SCORE_SECONDS.time():
+        return calculate_similarity(cv_text, job_description)
+
+async def apply_job(request, job_id):
+    job = await aget_object_or_404(JobPost, id=job_id)
     
     if request.method == 'POST':
         form = JobApplicationForm(request.POST, request.FILES)
-        if form.is_valid():
+        if await sync_to_async(form.is_valid)():
             application = form.save(commit=False)
             application.job = job
 
@@ -159,27 +223,24 @@ def apply_job(request, job_id):
                 file_name = f'resumes/{resume.name}'
                 bucket_name = os.getenv('R_SPACES_NAME')
 
+                file_ext = resume.name.split('.')[-1].lower()
+                if file_ext != 'pdf':
+                    logger.error(f"Unsupported file format: {file_ext}")
+                    messages.error(request, "Unsupported file format. Only PDF is supported.")
+                    return redirect('apply_job', job_id=job.id)
+
+                content = resume.read()
+                # Upload to S3 while the text is extracted and scored; both are
+                # independent and mostly waiting on I/O.
+                upload = asyncio.ensure_future(
+                    sync_to_async(upload_resume, thread_sensitive=False)(content, bucket_name, file_name)
+                )
                 try:
-                    file_ext = resume.name.split('.')[-1].lower()
-                    if file_ext == 'pdf':
-                        cv_text = parse_pdf(resume)  # Parse the resume before uploading
-                    else:
-                        logger.error(f"Unsupported file format: {file_ext}")
-                        messages.error(request, "Unsupported file format. Only PDF is supported.")
-                        return redirect('apply_job', job_id=job.id)
-
-                    job_description = job.description
-                    similarity_score = calculate_similarity(cv_text, job_description)
+                    cv_text = await sync_to_async(parse_resume, thread_sensitive=False)(content)
+                    similarity_score = await sync_to_async(score_resume, thread_sensitive=False)(cv_text, job.description)
                     application.match_score = similarity_score if similarity_score is not None else 0.0
-
-                    with resume.open('rb') as resume_file:
-                        s3_client.upload_fileobj(
-                            resume_file, 
-                            bucket_name, 
-                            file_name, 
-                            ExtraArgs={'ACL': 'public-read'}
-                        )
-                        application.resume = file_name
+                    await upload
+                    application.resume = file_name
 
                 except ClientError as e:
                     logger.error(f"Failed to upload resume: {e}")
@@ -187,22 +248,78 @@ def apply_job(request, job_id):
                     return redirect('apply_job', job_id=job.id)
                 except Exception as e:
                     logger.error(f"Error processing resume: {e}")
+                    await _discard_upload(upload, bucket_name, file_name)
                     messages.error(request, "Failed to process resume. Please try again.")
                     return redirect('apply_job', job_id=job.id)
 
-            application.save()
+            await application.asave()
             return redirect('congrats')
     else:
         form = JobApplicationForm()
     
-    return render(request, 'jobs/apply_job.html', {'form': form, 'job': job})
+    return await sync_to_async(render)(request, 'jobs/apply_job.html', {'form': form, 'job': job})
+
+async def _discard_upload(upload, bucket_name, file_name):
+    """Remove a resume uploaded for an application that was rejected."""
+    try:
+        await upload
+        await sync_to_async(s3_client.delete_object, thread_sensitive=False)(Bucket=bucket_name, Key=file_name)
+    except Exception as e:
+        logger.error(f"Failed to remove orphaned resume {file_name}: {e}")
+
+
+JOB_DETAIL_CACHE_TTL = 60 * 60
+
+
+def _job_updated_at(request, job_id):
+    """updated_at of a live job (None if missing or deleted), cached until the job changes."""
+    key = job_detail_cache_key(job_id)
+    meta = cache.get(key)
+    if meta is None:
+        meta = {'updated_at': JobPost.objects.filter(id=job_id, deleted=False).values_list('updated_at', flat=True).first()}
+        cache.set(key, meta, JOB_DETAIL_CACHE_TTL)
+    return meta['updated_at']
+
+
+def _job_detail_etag(request, job_id):
+    updated_at = _job_updated_at(request, job_id)
+    if updated_at is None:
+        return None
+    return f'job-{job_id}-{int(updated_at.timestamp() * 1000000)}'
+
+
+@condition(etag_func=_job_detail_etag, last_modified_func=_job_updated_at)
+def job_detail(request, job_id):
+    updated_at = _job_updated_at(request, job_id)
+    if updated_at is None:
+        raise Http404("No JobPost matches the given query.")
+
+    if request.user.is_authenticated:
+        # The navigation bar is personalised; don't share this copy
+        job = get_object_or_404(JobPost, id=job_id, deleted=False)
+        response = render(request, 'jobs/job_detail.html', {'job': job})
+        patch_cache_control(response, private=True, max_age=0)
+    else:
+        # Anonymous copies are identical, so keep the rendered page until the job changes.
+        # The page only uses the scheme, host and path of the URL (canonical and
+        # og:url leave out the query string), so those are all the key needs.
+        key = f'job_detail:html:{job_id}:{request.scheme}:{request.get_host()}:{int(updated_at.timestamp() * 1000000)}'
+        html = cache.get(key)
+        if html is None:
+            job = get_object_or_404(JobPost, id=job_id, deleted=False)
+            html = render_to_string('jobs/job_detail.html', {'job': job}, request=request)
+            cache.set(key, html, JOB_DETAIL_CACHE_TTL)
+        response = HttpResponse(html)
+        patch_cache_control(response, public=True, max_age=300, s_maxage=3600, stale_while_revalidate=60)
+    patch_vary_headers(response, ('Cookie',))
+    return response
 
 
 # hr views
 @login_required
 def post_job(request):
     if request.method == 'POST':
-        form = JobPostForm(request.POST)
+        form = JobPostForm(request.POST, user=request.user)
         if form.is_valid():
             job = form.save(commit=False)
             job.posted_by = request.user
@@ -244,7 +361,10 @@ def hr_dashboard(request):
 
     # Search functionality
     search_query = request.GET.get('q', '')
-    jobs = JobPost.objects.filter(posted_by=request.user, deleted=False)
+    # ?archived=1 lists jobs moved to the archive by `manage.py archive_jobs`
+    archived = request.GET.get('archived') == '1'
+    model = ArchivedJobPost if archived else JobPost
+    jobs = model.objects.filter(posted_by=request.user, deleted=False).order_by('-posted_at')
     
     if search_query:
         jobs = jobs.filter(title__icontains=search_query)
@@ -259,15 +379,15 @@ def hr_dashboard(request):
     except EmptyPage:
         jobs = jobs_paginator.page(jobs_paginator.num_pages)
 
-    return render(request, 'jobs/hr_dashboard.html', {'jobs': jobs, 'search_query': search_query})
+    return render(request, 'jobs/hr_dashboard.html', {'jobs': jobs, 'search_query': search_query, 'archived': archived})
 
 @login_required
 def hr_applicants(request, job_id):
     if request.user.user_type != 'HR':
         return HttpResponseForbidden("You are not authorized to view this page.")
 
-    job = get_object_or_404(JobPost, id=job_id, posted_by=request.user)
-    applications = JobApplication.objects.filter(job=job).exclude(full_name__isnull=True).order_by('-match_score', '-applied_at')
+    job = get_hr_job(request.user, job_id)
+    applications = applications_for(job).exclude(full_name__isnull=True).order_by('-match_score', '-applied_at')
 
     applications_page = request.GET.get('applications_page', 1)
     applications_paginator = Paginator(applications, 30)
@@ -285,8 +405,13 @@ def download_applicants_xlsx(request, job_id):
     if request.user.user_type != 'HR':
         return HttpResponseForbidden("You are not authorized to view this page.")
 
-    job = get_object_or_404(JobPost, id=job_id, posted_by=request.user)
-    applications = JobApplication.objects.filter(job=job).exclude(full_name__isnull=True).order_by('-applied_at')
+    job = get_hr_job(request.user, job_id)
+    with metrics.EXPORT_SECONDS.time(export='applicants_xlsx'):
+        response = _build_applicants_xlsx(job)
+    return response
+
+def _build_applicants_xlsx(job):
+    applications = applications_for(job).exclude(full_name__isnull=True).order_by('-applied_at')
 
     # Create an Excel workbook and sheet
     wb = openpyxl.Workbook()
@@ -298,7 +423,9 @@ def download_applicants_xlsx(request, job_id):
     ws.append(headers)
 
     # Write data to the sheet
+    rows = 0
     for application in applications:
+        rows += 1
         ws.append([
             application.full_name,
             application.email,
@@ -315,14 +442,17 @@ def download_applicants_xlsx(request, job_id):
 
     # Prepare the response
     response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename=applicants_{job_id}.xlsx'
+    response['Content-Disposition'] = f'attachment; filename=applicants_{job.id}.xlsx'
     wb.save(response)
+    metrics.EXPORT_ROWS.inc(rows, export='applicants_xlsx')
     return response
 
 @login_required
 def job_applicants(request, job_id):
-    job = get_object_or_404(JobPost, id=job_id, posted_by=request.user, deleted=False)
-    applications = JobApplication.objects.filter(job=job)
+    job = get_hr_job(request.user, job_id)
+    if job.deleted:
+        raise Http404("No JobPost matches the given query.")
+    applications = applications_for(job)
     return render(request, 'jobs/job_applicants.html', {'job': job, 'applications': applications})
 
 
@@ -350,7 +480,8 @@ def parse_pdf(file):
 def translate_text(text, target_lang='en'):
     translator = Translator()
     try:
-        translation = translator.translate(text, dest=target_lang)
+        with timed('translate'):
+            translation = translator.translate(text, dest=target_lang)
         return translation.text
     except Exception as e:
         logger.error(f"Translation error: {e}")
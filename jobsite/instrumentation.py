@@ -0,0 +1,174 @@
+# jobsite/instrumentation.py
+#
+# Per-request timing collector used by PerformanceMiddleware. Views and helpers
+# record external calls with `timed('s3')` etc.; DB queries, cache lookups and
+# template rendering are picked up automatically while a request is active.
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from . import metrics as app_metrics
+
+_current = ContextVar('request_metrics', default=None)
+
+# Categories reported in Server-Timing, in display order
+EXTERNAL_CATEGORIES = ('s3', 'epoint', 'translate')
+
+
+class RequestMetrics:
+    def __init__(self, capture_queries=False):
+        self.started = time.perf_counter()
+        self.capture_queries = capture_queries
+        self.db_count = 0
+        self.db_time = 0.0
+        self.queries = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+        self.view_time = 0.0
+        self.external = {}
+
+    def add_external(self, category, duration):
+        self.external[category] = self.external.get(category, 0.0) + duration
+
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        # Server-Timing durations are in milliseconds
+        parts = [
+            f'total;dur={self.total_time() * 1000:.1f}',
+            f'view;dur={self.view_time * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_count} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+        ]
+        for category in EXTERNAL_CATEGORIES:
+            if category in self.external:
+                parts.append(f'{category};dur={self.external[category] * 1000:.1f}')
+        return ', '.join(parts)
+
+    def as_dict(self):
+        data = {
+            'total_ms': round(self.total_time() * 1000, 1),
+            'view_ms': round(self.view_time * 1000, 1),
+            'db_count': self.db_count,
+            'db_ms': round(self.db_time * 1000, 1),
+            'template_ms': round(self.template_time * 1000, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+        for category, duration in self.external.items():
+            data[f'{category}_ms'] = round(duration * 1000, 1)
+        return data
+
+
+def start_request(capture_queries=False):
+    metrics = RequestMetrics(capture_queries=capture_queries)
+    _current.set(metrics)
+    return metrics
+
+
+def end_request():
+    _current.set(None)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def timed(category):
+    """Time an external call (S3, Epoint, translation) for the active request."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        app_metrics.EXTERNAL_CALL_ERRORS.inc(service=category)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        app_metrics.EXTERNAL_CALL_LATENCY.observe(duration, service=category)
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.add_external(category, duration)
+
+
+def record_cache(hit):
+    app_metrics.CACHE_REQUESTS.inc(result='hit' if hit else 'miss')
+    metrics = _current.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def query_timer(execute, sql, params, many, context):
+    """connection.execute_wrapper hook counting and timing queries."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        metrics.db_count += 1
+        metrics.db_time += duration
+        if metrics.capture_queries:
+            metrics.queries.append({'sql': sql, 'ms': round(duration * 1000, 2)})
+
+
+_template_patched = False
+
+
+def install_template_timer():
+    """Wrap the Django template backend so top-level renders are timed.
+
+    Only the backend wrapper is patched, so {% include %} and {% extends %}
+    inside a template are not double counted.
+    """
+    global _template_patched
+    if _template_patched:
+        return
+    from django.template.backends.django import Template
+
+    original_render = Template.render
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return original_render(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+    Template.render = render
+    _template_patched = True
+
+
+_cache_patched = set()
+_MISSING = object()
+
+
+def install_cache_counter(cache):
+    """Count hits and misses on `cache.get` for every instance of its backend class.
+
+    `cache` must be a backend instance (`caches[alias]`), not the
+    `django.core.cache.cache` proxy, whose class has no `get` of its own.
+    """
+    backend = type(cache)
+    if backend in _cache_patched:
+        return
+    original_get = backend.get
+
+    def get(self, key, default=None, version=None):
+        value = original_get(self, key, _MISSING, version)
+        record_cache(value is not _MISSING)
+        return default if value is _MISSING else value
+
+    backend.get = get
+    _cache_patched.add(backend)
@@ -0,0 +1,25 @@
+# jobsite/lifespan.py
+#
+# ASGI lifespan handler: opens the long-lived resources of a server process
+# on its event loop at startup and closes them at shutdown.
+import logging
+
+from payments import gateway
+
+logger = logging.getLogger(__name__)
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Keep-alive connections to Epoint for the async payment views
+            await gateway.get_client().astart()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            try:
+                await gateway.get_client().aclose()
+            except Exception:
+                logger.exception("Closing the Epoint session failed")
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -0,0 +1,178 @@
+# jobsite/log.py
+#
+# Logging building blocks referenced from settings.LOGGING.
+#
+# Request threads only run the sampling filter and put the record on a queue;
+# a background QueueListener thread, one per process, formats it as JSON and
+# writes it out.
+import atexit
+import copy
+import logging
+import os
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from queue import Full, Queue
+
+import orjson
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are included as top-level keys."""
+
+    converter = time.gmtime
+
+    def format(self, record):
+        data = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        return orjson.dumps(data, default=str).decode()
+
+
+class QueueListenerHandler(QueueHandler):
+    """Enqueue records and write them from a background thread.
+
+    The queue is bounded; when it is full the record is dropped rather than
+    blocking the request, and the number of dropped records is reported on
+    the next record that gets through.
+
+    The listener thread starts with the first record in each process, so
+    workers forked after logging is configured (gunicorn --preload) get
+    their own thread and queue instead of a parent's thread that fork
+    didn't copy.
+    """
+
+    def __init__(self, maxsize=10000, stream=None):
+        super().__init__(Queue(maxsize))
+        self.maxsize = maxsize
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.target.setFormatter(JsonFormatter())
+        self.dropped = 0
+        self._enqueued = 0
+        self.listener = None
+        self._pid = None
+        self._counter_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.stop)
+
+    def _after_fork(self):
+        # Another thread may have held these locks, or left the queue half
+        # written, at the moment of the fork
+        self.queue = Queue(self.maxsize)
+        self.listener = None
+        self._pid = None
+        self.dropped = 0
+        self._enqueued = 0
+        self._counter_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid != pid:
+                self.listener = QueueListener(self.queue, self.target)
+                self.listener.start()
+                self._pid = pid
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def stop(self):
+        """Flush the queue and stop the listener thread (safe to call twice)."""
+        if self.listener is not None and self._pid == os.getpid() and self.listener._thread is not None:
+            self.listener.stop()
+
+    def prepare(self, record):
+        # Only merge args and capture the traceback here; JSON formatting
+        # happens on the listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        with self._counter_lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            record.dropped_records = dropped
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            full = False
+        except Full:
+            full = True
+        with self._counter_lock:
+            if full:
+                self.dropped += 1
+            self._enqueued += 1
+            report = self._enqueued % 256 == 0
+        if report:
+            from . import metrics
+            metrics.QUEUE_DEPTH.set(self.queue.qsize(), queue='logging')
+
+
+class SamplingFilter(logging.Filter):
+    """Rate-limit noisy records at or below `max_level`.
+
+    Each (logger, call site) may emit `rate` records per `period` seconds;
+    the rest are dropped and counted in `sampled_out` on the next record let
+    through from that site. Records above `max_level` always pass.
+    """
+
+    def __init__(self, rate=10, period=60, max_level='DEBUG'):
+        super().__init__()
+        self.rate = rate
+        self.period = period
+        self.max_level = logging._checkLevel(max_level)
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                dropped = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if dropped:
+                    record.sampled_out = dropped
+                return True
+            if window[1] < self.rate:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+def parse_levels(value):
+    """Parse "jobs=INFO,payments.views=DEBUG" into LOGGING['loggers'] entries."""
+    loggers = {}
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        name, level = item.split('=', 1)
+        loggers[name.strip()] = {'level': level.strip().upper()}
+    return loggers
@@ -0,0 +1,273 @@
+# jobsite/metrics.py
+#
+# Small Prometheus-compatible metrics registry.
+#
+# Every process keeps its samples in memory and, when METRICS_DIR is set,
+# periodically writes a snapshot to METRICS_DIR/metrics-<pid>-<token>.json,
+# the token telling apart processes that were given the same pid. The
+# exposition view merges the snapshots of all gunicorn workers, so a scrape
+# sees the whole server no matter which worker answers it.
+import atexit
+import json
+import math
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+_lock = threading.Lock()
+_metrics = {}
+_last_flush = 0.0
+# (pid, snapshot file name) of this process; a forked child picks a new name
+_snapshot_file = None
+_SNAPSHOT_NAME = re.compile(r'metrics-(\d+)(-[0-9a-f]+)?\.json')
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        with _lock:
+            _metrics[name] = self
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        _maybe_flush()
+
+
+class Gauge(Metric):
+    """Gauge samples from all live processes are summed on exposition."""
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = value
+        _maybe_flush()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            sample = self.values.get(key)
+            if sample is None:
+                sample = self.values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    sample['buckets'][i] += 1
+                    break
+            sample['sum'] += value
+            sample['count'] += 1
+        _maybe_flush()
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+def _snapshot():
+    with _lock:
+        return {
+            name: {
+                'kind': metric.kind,
+                'values': [[list(key), value] for key, value in metric.values.items()],
+            }
+            for name, metric in _metrics.items()
+        }
+
+
+def _metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def _snapshot_name():
+    global _snapshot_file
+    pid = os.getpid()
+    if _snapshot_file is None or _snapshot_file[0] != pid:
+        # A new worker given an exited one's pid must not overwrite its counters
+        _snapshot_file = (pid, f'metrics-{pid}-{secrets.token_hex(4)}.json')
+    return _snapshot_file[1]
+
+
+def flush():
+    """Write this process's samples to METRICS_DIR (no-op without it)."""
+    global _last_flush
+    directory = _metrics_dir()
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _snapshot_name())
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as fh:
+        json.dump(_snapshot(), fh)
+    os.replace(tmp_path, path)
+    _last_flush = time.monotonic()
+
+
+def _maybe_flush(force=False):
+    if not _metrics_dir():
+        return
+    if force or time.monotonic() - _last_flush >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+# Short-lived processes (management commands) publish their samples on exit
+atexit.register(_maybe_flush, force=True)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _collect():
+    """Merge the snapshots of every worker into {name: {key: value}}."""
+    directory = _metrics_dir()
+    if not directory:
+        with _lock:
+            return {
+                name: {'kind': metric.kind, 'values': dict(metric.values)}
+                for name, metric in _metrics.items()
+            }
+
+    flush()
+    merged = {}
+    for file_name in os.listdir(directory):
+        match = _SNAPSHOT_NAME.fullmatch(file_name)
+        if not match:
+            continue
+        pid = int(match.group(1))
+        try:
+            with open(os.path.join(directory, file_name)) as fh:
+                snapshot = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        alive = _pid_alive(pid)
+        for name, data in snapshot.items():
+            # Counters and histograms of exited workers still count; their gauges do not
+            if data['kind'] == 'gauge' and not alive:
+                continue
+            target = merged.setdefault(name, {'kind': data['kind'], 'values': {}})['values']
+            for key, value in data['values']:
+                key = tuple(key)
+                if data['kind'] == 'histogram':
+                    current = target.get(key)
+                    if current is None:
+                        target[key] = {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+                    else:
+                        current['buckets'] = [a + b for a, b in zip(current['buckets'], value['buckets'])]
+                        current['sum'] += value['sum']
+                        current['count'] += value['count']
+                else:
+                    target[key] = target.get(key, 0) + value
+    return merged
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+
+def render():
+    """Return the merged metrics in the Prometheus text exposition format."""
+    merged = _collect()
+    lines = []
+    with _lock:
+        metrics = list(_metrics.values())
+    for metric in metrics:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        values = merged.get(metric.name, {}).get('values', {})
+        for key, value in sorted(values.items()):
+            if metric.kind == 'histogram':
+                cumulative = 0
+                for bound, count in zip(metric.buckets, value['buckets']):
+                    cumulative += count
+                    labels = _format_labels(metric.labelnames, key, ('le', _format_bound(bound)))
+                    lines.append(f'{metric.name}_bucket{labels} {cumulative}')
+                labels = _format_labels(metric.labelnames, key)
+                lines.append(f'{metric.name}_sum{labels} {value["sum"]}')
+                lines.append(f'{metric.name}_count{labels} {value["count"]}')
+            else:
+                lines.append(f'{metric.name}{_format_labels(metric.labelnames, key)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+# Application metrics
+REQUEST_LATENCY = Histogram(
+    'eploy_request_duration_seconds', 'Request latency by URL name.', ['view', 'method', 'status'])
+EXTERNAL_CALL_LATENCY = Histogram(
+    'eploy_external_call_duration_seconds', 'Latency of calls to S3, Epoint and translation.', ['service'])
+EXTERNAL_CALL_ERRORS = Counter(
+    'eploy_external_call_errors_total', 'Failed calls to external services.', ['service'])
+RESUME_PARSE_SECONDS = Histogram(
+    'eploy_resume_parse_duration_seconds', 'Time spent extracting text from uploaded resumes.')
+RESUME_SCORE_SECONDS = Histogram(
+    'eploy_resume_score_duration_seconds', 'Time spent scoring a resume against a job description.')
+EPOINT_REQUESTS = Counter(
+    'eploy_epoint_requests_total', 'Payment requests sent to Epoint by outcome.', ['outcome'])
+PAYMENT_CALLBACKS = Counter(
+    'eploy_payment_callbacks_total', 'Epoint result callbacks by outcome.', ['outcome'])
+EXPORT_SECONDS = Histogram(
+    'eploy_export_duration_seconds', 'Time spent generating data exports.', ['export'])
+EXPORT_ROWS = Counter(
+    'eploy_export_rows_total', 'Rows written by data exports.', ['export'])
+RECONCILED_ORDERS = Counter(
+    'eploy_reconciled_orders_total', 'Pending orders checked against the gateway, by result.', ['result'])
+QUEUE_DEPTH = Gauge(
+    'eploy_queue_depth', 'Items waiting in background queues.', ['queue'])
+CACHE_REQUESTS = Counter(
+    'eploy_cache_requests_total', 'Cache lookups by result.', ['result'])
+API_RESPONSES = Counter(
+    'eploy_api_responses_total', 'Job feed API responses by result.', ['result'])
+EMAILS = Counter(
+    'eploy_emails_total', 'Outbound email delivery attempts by outcome.', ['outcome'])
@@ -1,7 +1,102 @@
 # jobsite/middleware.py
+import logging
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
 
+from . import instrumentation, metrics as app_metrics
+
+perf_logger = logging.getLogger('jobsite.performance')
+
+
 class ContentSecurityPolicyMiddleware(MiddlewareMixin):
     def process_response(self, request, response):
         response['Content-Security-Policy'] = "default-src 'self'; script-src 'self'; object-src 'none';"
         return response
+
+
+def _install_query_timer(sender, connection, **kwargs):
+    if instrumentation.query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(instrumentation.query_timer)
+
+
+class PerformanceMiddleware(MiddlewareMixin):
+    """Collects per-request timings and reports them as Server-Timing and log lines.
+
+    Settings:
+        PERF_SERVER_TIMING   -- add the Server-Timing header for staff users, or
+                                everyone when DEBUG is on (default False)
+        PERF_SAMPLE_RATE     -- fraction of requests logged at INFO (default 0.0)
+        PERF_SLOW_REQUEST_MS -- requests slower than this are always logged at
+                                WARNING together with their SQL (0 disables)
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.server_timing = getattr(settings, 'PERF_SERVER_TIMING', False)
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 0.0)
+        self.slow_ms = getattr(settings, 'PERF_SLOW_REQUEST_MS', 0)
+
+        connection_created.connect(_install_query_timer, dispatch_uid='perf_query_timer')
+        for connection in connections.all(initialized_only=True):
+            _install_query_timer(None, connection)
+        instrumentation.install_template_timer()
+        for alias in settings.CACHES:
+            instrumentation.install_cache_counter(caches[alias])
+
+    def process_request(self, request):
+        request._perf_metrics = instrumentation.start_request(capture_queries=self.slow_ms > 0)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._perf_view_started = request._perf_metrics.total_time()
+
+    def process_response(self, request, response):
+        metrics = getattr(request, '_perf_metrics', None)
+        if metrics is None:
+            return response
+        instrumentation.end_request()
+
+        view_started = getattr(request, '_perf_view_started', None)
+        if view_started is not None:
+            metrics.view_time = metrics.total_time() - view_started
+
+        # Query counts and timings are internals; don't hand them to every visitor
+        user = getattr(request, 'user', None)
+        if self.server_timing and (settings.DEBUG or (user is not None and user.is_staff)):
+            response['Server-Timing'] = metrics.server_timing()
+            if not settings.DEBUG:
+                # This copy is for a staff session; shared caches must not
+                # hand it to anyone else
+                patch_vary_headers(response, ('Cookie',))
+                patch_cache_control(response, private=True)
+
+        match = getattr(request, 'resolver_match', None)
+        total = metrics.total_time()
+        app_metrics.REQUEST_LATENCY.observe(
+            total,
+            view=match.view_name if match else 'unresolved',
+            method=request.method,
+            status=response.status_code,
+        )
+
+        total_ms = total * 1000
+        is_slow = self.slow_ms and total_ms >= self.slow_ms
+        if is_slow or (self.sample_rate and random.random() < self.sample_rate):
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                **metrics.as_dict(),
+            }
+            if is_slow:
+                record['queries'] = metrics.queries
+                perf_logger.warning('slow request', extra={'request': record})
+            else:
+                perf_logger.info('request', extra={'request': record})
+        return response
@@ -0,0 +1,212 @@
+# jobsite/prebuilt.py
+#
+# Files generated ahead of time (sitemaps, feeds) and served straight from
+# disk. Serving never touches the database: the ETag comes from the file's
+# size and mtime (one per encoding), and pre-compressed .br/.gz variants are picked by
+# Accept-Encoding.
+#
+# Builders are told to regenerate through "stale" marker files, which model
+# signals create cheaply and the build commands clear.
+import gzip
+import os
+import tempfile
+from contextlib import contextmanager
+from email.utils import formatdate
+
+import brotli
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def root():
+    return settings.PREBUILT_ROOT
+
+
+def path_for(name):
+    path = os.path.normpath(os.path.join(root(), name))
+    if not path.startswith(os.path.normpath(root()) + os.sep):
+        raise Http404('Invalid file name')
+    return path
+
+
+class _VariantWriter:
+    """Writes a file and its .gz and .br variants side by side, to temp files."""
+
+    BUFFER_SIZE = 1 << 20
+
+    def __init__(self, path):
+        self.path = path
+        self.targets = [path + '.br', path + '.gz', path]
+        self.tmp_paths = []
+        self.files = []
+        for _ in self.targets:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            self.tmp_paths.append(tmp_path)
+            self.files.append(os.fdopen(fd, 'wb'))
+        self.br_file, gz_file, self.plain = self.files
+        self.gzip = gzip.GzipFile(fileobj=gz_file, mode='wb', compresslevel=9, mtime=0)
+        self.brotli = brotli.Compressor()
+        self.buffer = []
+        self.buffered = 0
+
+    def write(self, data):
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.buffered >= self.BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        data = b''.join(self.buffer)
+        self.buffer, self.buffered = [], 0
+        self.plain.write(data)
+        self.gzip.write(data)
+        self.br_file.write(self.brotli.process(data))
+
+    def commit(self):
+        self.flush()
+        self.gzip.close()
+        self.br_file.write(self.brotli.finish())
+        for fh in self.files:
+            fh.close()
+        # Compressed variants first, so a reader never sees a new plain file
+        # with old compressed ones next to it
+        for tmp_path, target in zip(self.tmp_paths, self.targets):
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+
+    def discard(self):
+        for fh in self.files:
+            fh.close()
+        for tmp_path in self.tmp_paths:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+@contextmanager
+def open_atomic(name):
+    """Stream a file and its .gz/.br variants; they replace the old ones together on success.
+
+        with prebuilt.open_atomic('feeds/jobs.xml') as out:
+            out.write(b'...')
+    """
+    path = path_for(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    writer = _VariantWriter(path)
+    try:
+        yield writer
+        writer.commit()
+    except BaseException:
+        writer.discard()
+        raise
+
+
+def write_atomic(name, content):
+    """Write `content` (bytes) plus .gz and .br variants, each replaced atomically."""
+    with open_atomic(name) as out:
+        out.write(content)
+
+
+def is_file(name):
+    return os.path.isfile(path_for(name))
+
+
+def remove(name):
+    path = path_for(name)
+    for target in (path, path + '.gz', path + '.br'):
+        if os.path.exists(target):
+            os.unlink(target)
+
+
+def mark_stale(group):
+    os.makedirs(root(), exist_ok=True)
+    with open(os.path.join(root(), f'.stale-{group}'), 'a'):
+        pass
+
+
+def is_stale(group):
+    return os.path.exists(os.path.join(root(), f'.stale-{group}'))
+
+
+def clear_stale(group):
+    try:
+        os.unlink(os.path.join(root(), f'.stale-{group}'))
+    except FileNotFoundError:
+        pass
+
+
+# Each encoding of a body is its own representation and gets its own strong ETag
+_ETAG_SUFFIXES = {None: '', 'br': '-br', 'gzip': '-gz'}
+
+
+def etag_for(version, encoding=None):
+    """Strong ETag for the `encoding` ('br', 'gzip' or None) of the content `version`."""
+    return f'"{version}{_ETAG_SUFFIXES[encoding]}"'
+
+
+def matching_etag(request, version):
+    """The If-None-Match tag naming any encoding of `version`, or None.
+
+    The content is unchanged whichever encoding the client cached, so any of
+    them earns a 304; it carries the tag the client sent.
+    """
+    tags = parse_etags(request.headers.get('If-None-Match', ''))
+    if '*' in tags:
+        return etag_for(version)
+    candidates = {etag_for(version, encoding) for encoding in _ETAG_SUFFIXES}
+    return next((tag for tag in tags if tag in candidates), None)
+
+
+def accepts_encoding(request, coding):
+    """Whether the request's Accept-Encoding allows `coding`; "br;q=0" refuses it."""
+    qvalues = {}
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[name] = q
+    # "*" stands for every coding not named
+    return qvalues.get(coding, qvalues.get('*', 0.0)) > 0
+
+
+def serve(request, name, content_type, max_age=3600):
+    """Serve a prebuilt file with conditional GET and pre-compressed variants."""
+    path = path_for(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404(f'{name} has not been generated yet')
+
+    version = f'{stat.st_size:x}-{stat.st_mtime_ns:x}'
+    etag = matching_etag(request, version)
+    if etag:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    encoding = None
+    for candidate, suffix in ENCODINGS:
+        if accepts_encoding(request, candidate) and os.path.exists(path + suffix):
+            encoding, path = candidate, path + suffix
+            break
+
+    response = FileResponse(open(path, 'rb'), content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['ETag'] = etag_for(version, encoding)
+    response['Last-Modified'] = formatdate(stat.st_mtime, usegmt=True)
+    response['Cache-Control'] = f'public, max-age={max_age}'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -3,6 +3,7 @@ import os
 from decouple import config
 from dotenv import load_dotenv
 from os import getenv
+from jobsite.log import parse_levels as parse_log_levels
 
 # Load environment variables
 load_dotenv()
@@ -16,6 +17,13 @@ def get_secret(secret_name):
 # Payment settings (using environment variables)
 PUBLIC_KEY = get_secret('PUBLIC_KEY')  # Epoint public key from .env
 PRIVATE_KEY = get_secret('PRIVATE_KEY')  # Epoint private key from .env
+EPOINT_API_URL = get_secret('EPOINT_API_URL') or 'https://epoint.az/api/1'
+EPOINT_CONNECT_TIMEOUT = float(get_secret('EPOINT_CONNECT_TIMEOUT') or 3.05)
+EPOINT_READ_TIMEOUT = float(get_secret('EPOINT_READ_TIMEOUT') or 15)
+EPOINT_MAX_RETRIES = int(get_secret('EPOINT_MAX_RETRIES') or 2)  # idempotent calls only
+EPOINT_POOL_SIZE = int(get_secret('EPOINT_POOL_SIZE') or 10)
+EPOINT_BREAKER_THRESHOLD = int(get_secret('EPOINT_BREAKER_THRESHOLD') or 5)
+EPOINT_BREAKER_RESET = float(get_secret('EPOINT_BREAKER_RESET') or 30)
 
 # Security settings
 SECRET_KEY = get_secret('SECRET_KEY')
@@ -46,14 +54,18 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sitemaps',
-    'jobs',
+    'jobs.apps.JobsConfig',
     'users',
     'payments',
+    'crawler',
+    'alerts',
+    'mailer',
     'storages',
     'whitenoise.runserver_nostatic',
 ]
 
 MIDDLEWARE = [
+    'jobsite.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -120,6 +132,51 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Cache: Redis when REDIS_URL is set, otherwise per-process memory
+REDIS_URL = get_secret('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+# Channel layer for live HR pages (jobs.live): Redis when REDIS_URL is
+# set, so every worker reaches every connection, otherwise in-process
+ASGI_APPLICATION = 'jobsite.asgi.application'
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+
+# Crawler
+CRAWLER_USER_AGENT = get_secret('CRAWLER_USER_AGENT') or 'EployBot/1.0 (+https://www.eploy.io)'
+
+# Geocoding of job locations (jobs.geo): the gazetteer file first, then
+# Nominatim through geopy only when `geocode_jobs --online` is run
+GEOCODER_GAZETTEER = get_secret('GEOCODER_GAZETTEER') or os.path.join(BASE_DIR, 'jobs', 'data', 'gazetteer.csv')
+GEOCODER_USER_AGENT = get_secret('GEOCODER_USER_AGENT') or CRAWLER_USER_AGENT
+
+# Pre-generated files (sitemaps, feeds) served by jobsite.prebuilt
+PREBUILT_ROOT = get_secret('PREBUILT_ROOT') or os.path.join(BASE_DIR, 'prebuilt')
+SITE_URL = get_secret('SITE_URL') or 'https://www.eploy.io'
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -138,7 +195,10 @@ AWS_S3_OBJECT_PARAMETERS = {
 MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/resumes/'
 
 # Email settings
-EMAIL_BACKEND = get_secret('EMAIL_BACKEND')
+# Mail is queued in the database and delivered by `manage.py run_mailer`
+# through MAILER_BACKEND, the backend that actually sends (SMTP)
+EMAIL_BACKEND = 'mailer.backends.QueuedEmailBackend'
+MAILER_BACKEND = get_secret('EMAIL_BACKEND') or 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = get_secret('EMAIL_HOST')
 EMAIL_PORT = int(get_secret('EMAIL_PORT'))
 EMAIL_USE_TLS = get_secret('EMAIL_USE_TLS') == 'True'
@@ -160,16 +220,46 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # OpenAI API Key
 OPENAI_API_KEY = get_secret('OPENAI_API_KEY')
 
+# Request instrumentation (jobsite.middleware.PerformanceMiddleware)
+PERF_SERVER_TIMING = get_secret('PERF_SERVER_TIMING') == 'True'
+PERF_SAMPLE_RATE = float(get_secret('PERF_SAMPLE_RATE') or 0.01)
+PERF_SLOW_REQUEST_MS = int(get_secret('PERF_SLOW_REQUEST_MS') or 1000)
+
+# Metrics (jobsite.metrics). METRICS_DIR must be shared by all gunicorn workers.
+METRICS_DIR = get_secret('METRICS_DIR')
+METRICS_TOKEN = get_secret('METRICS_TOKEN')
+METRICS_FLUSH_INTERVAL = int(get_secret('METRICS_FLUSH_INTERVAL') or 5)
+
+# Logging: JSON lines written from a background thread (see jobsite/log.py).
+# LOG_LEVELS sets per-logger levels, e.g. "jobs=INFO,payments=DEBUG".
+LOG_LEVEL = get_secret('LOG_LEVEL') or 'INFO'
+LOG_SAMPLE_RATE = int(get_secret('LOG_SAMPLE_RATE') or 10)
+LOG_SAMPLE_PERIOD = int(get_secret('LOG_SAMPLE_PERIOD') or 60)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'sampling': {
+            '()': 'jobsite.log.SamplingFilter',
+            'rate': LOG_SAMPLE_RATE,
+            'period': LOG_SAMPLE_PERIOD,
+            'max_level': 'DEBUG',
+        },
+    },
     'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
+        'queue': {
+            '()': 'jobsite.log.QueueListenerHandler',
+            'filters': ['sampling'],
         },
     },
     'root': {
-        'handlers': ['console'],
-        'level': 'DEBUG',
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        # Django's own loggers propagate to root; keep their handlers off
+        'django': {'handlers': [], 'level': 'INFO'},
+        **parse_log_levels(get_secret('LOG_LEVELS')),
     },
 }
@@ -5,13 +5,8 @@ from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView, TemplateView
-from django.contrib.sitemaps.views import sitemap
 from jobs.views import redirect_to_jobs, robots_txt
-from jobs.sitemaps import JobSitemap, StaticViewSitemap
-sitemaps = {
-    'jobs': JobSitemap,
-    'static': StaticViewSitemap,
-}
+from jobsite.views import feed_file, metrics_view, sitemap_file
 
 urlpatterns = [
     path('', RedirectView.as_view(url='/jobs/', permanent=True)),
@@ -19,9 +14,13 @@ urlpatterns = [
     path('jobs/', include('jobs.urls')),
     path('users/', include('users.urls')),
     path('payments/', include('payments.urls')),
+    path('alerts/', include('alerts.urls')),
     path('privacy-policy/', TemplateView.as_view(template_name='jobs/privacy_policy.html'), name='privacy_policy'),
     path('robots.txt', robots_txt, name='robots_txt'),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemap_file, name='sitemap'),
+    re_path(r'^(?P<name>sitemap-[a-z]+(-\d+)?\.xml)$', sitemap_file, name='sitemap_section'),
+    path('feeds/<str:name>', feed_file, name='feed'),
+    path('metrics/', metrics_view, name='metrics'),
     re_path(r'^ads.txt$', RedirectView.as_view(url=settings.STATIC_URL + 'ads.txt', permanent=False)),
 ]
 
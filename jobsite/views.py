@@ -1,8 +1,36 @@
 # jobsite/views.py
 
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.shortcuts import redirect
 
+from jobs.feeds import FEED_FILES
+from . import metrics, prebuilt
+
+
 def redirect_to_jobs(request):
     return redirect('job_list')
 
 
+def metrics_view(request):
+    """Prometheus exposition endpoint, open to staff or a bearer METRICS_TOKEN."""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    auth = request.headers.get('Authorization', '')
+    token_ok = bool(token) and auth.startswith('Bearer ') and hmac.compare_digest(auth[len('Bearer '):], token)
+    if not (token_ok or request.user.is_staff):
+        return HttpResponseForbidden("You are not authorized to view this page.")
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def sitemap_file(request, name='sitemap.xml'):
+    """Sitemap index and sections, pre-generated by `manage.py build_sitemaps`."""
+    return prebuilt.serve(request, name, 'application/xml')
+
+
+def feed_file(request, name):
+    """Job feeds and dumps, pre-generated by `manage.py build_feeds`."""
+    if name not in FEED_FILES:
+        raise Http404('Unknown feed')
+    return prebuilt.serve(request, f'feeds/{name}', FEED_FILES[name], max_age=900)
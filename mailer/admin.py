@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to', 'priority', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'priority')
+    search_fields = ('subject', 'to')
+    readonly_fields = ('attempts', 'last_error', 'created_at', 'sent_at')
+    actions = ['retry']
+
+    @admin.action(description='Retry now')
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=OutboundEmail.SENT).update(
+            status=OutboundEmail.PENDING, attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f'{count} emails queued again.')
@@ -0,0 +1,62 @@
+# mailer/backends.py
+#
+# EMAIL_BACKEND for the site: send_mail(), password reset and the alert
+# digests all store their messages in OutboundEmail instead of talking to
+# SMTP inside the request. The mailer worker (mailer.delivery) delivers them
+# through settings.MAILER_BACKEND, the real backend.
+#
+# Messages are stored in the caller's transaction, so mail about work that
+# is rolled back is never sent.
+import logging
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Queue messages for the mailer worker.
+
+    get_connection(priority=OutboundEmail.BULK) queues behind normal mail.
+    """
+
+    def __init__(self, fail_silently=False, priority=OutboundEmail.NORMAL, **kwargs):
+        super().__init__(fail_silently=fail_silently, **kwargs)
+        self.priority = priority
+
+    def send_messages(self, email_messages):
+        rows, direct = [], []
+        now = timezone.now()
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            if message.attachments:
+                # Not worth storing; nothing on the site attaches files
+                direct.append(message)
+                continue
+            # Rendering checks the headers, so a bad message fails here, in the caller
+            message.message()
+            rows.append(OutboundEmail(
+                from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+                to=list(message.to),
+                cc=list(message.cc),
+                bcc=list(message.bcc),
+                reply_to=list(message.reply_to),
+                subject=str(message.subject),
+                body=str(message.body),
+                alternatives=[[str(content), mimetype] for content, mimetype in getattr(message, 'alternatives', [])],
+                headers={name: str(value) for name, value in message.extra_headers.items()},
+                priority=self.priority,
+                next_attempt_at=now,
+            ))
+        OutboundEmail.objects.bulk_create(rows)
+        sent = len(rows)
+        if direct:
+            logger.info("Sending %d messages with attachments directly", len(direct))
+            sent += get_connection(settings.MAILER_BACKEND, fail_silently=self.fail_silently).send_messages(direct) or 0
+        return sent
@@ -0,0 +1,163 @@
+# mailer/delivery.py
+#
+# Delivery of queued OutboundEmail rows, run by `manage.py run_mailer`.
+#
+# A Mailer keeps one connection to settings.MAILER_BACKEND open across
+# batches and sends every claimed message over it, instead of a connection
+# per message. Rows are claimed with SKIP LOCKED, so several workers can run
+# side by side. A message that fails is retried with exponential backoff
+# and given up after MAX_ATTEMPTS; one the server rejects outright (a 5xx
+# reply to the message) is given up at once. When the connection itself
+# fails, the rest of the batch is left for the next pass.
+#
+# Delivery is at least once: a worker killed mid-batch leaves the batch
+# pending, and messages it had already handed to the server go out again.
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from jobsite import metrics
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+MAX_ATTEMPTS = 8
+RETRY_DELAY = timedelta(minutes=1)
+MAX_RETRY_DELAY = timedelta(hours=6)
+KEEP_SENT = timedelta(days=7)
+
+
+def retry_delay(attempts):
+    """1, 2, 4, ... minutes after the `attempts`th failure, at most six hours."""
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def is_permanent(error):
+    """Whether the server rejected this message rather than failed to take it."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def is_connection_error(error):
+    """Whether the next message would fail the same way: no usable connection."""
+    connection_errors = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPAuthenticationError)
+    # SMTPException is an OSError too, but mostly about one message
+    return isinstance(error, connection_errors) or (
+        isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException))
+
+
+def to_message(email):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        cc=email.cc,
+        bcc=email.bcc,
+        reply_to=email.reply_to,
+        headers=email.headers,
+    )
+    for content, mimetype in email.alternatives:
+        message.attach_alternative(content, mimetype)
+    return message
+
+
+class Mailer:
+    def __init__(self, backend=None, **options):
+        """`options` go to the backend, e.g. host and port for SMTP."""
+        self.backend = backend or settings.MAILER_BACKEND
+        self.options = options
+        self.connection = None
+
+    def open(self):
+        if self.connection is None:
+            connection = get_connection(self.backend, **self.options)
+            connection.open()
+            self.connection = connection
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                logger.warning("Failed to close the mail connection", exc_info=True)
+            self.connection = None
+
+    def send_batch(self, batch_size=DEFAULT_BATCH_SIZE):
+        """Send up to `batch_size` due messages. Returns the number claimed."""
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                OutboundEmail.objects.select_for_update(skip_locked=True)
+                .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+                .order_by('priority', 'next_attempt_at')[:batch_size]
+            )
+            if not batch:
+                return 0
+
+            handled = []
+            for email in batch:
+                try:
+                    self.open().send_messages([to_message(email)])
+                except Exception as e:
+                    email.attempts += 1
+                    email.last_error = f'{type(e).__name__}: {e}'[:2000]
+                    if is_permanent(e) or email.attempts >= MAX_ATTEMPTS:
+                        logger.error("Giving up on email %s: %s", email.id, email.last_error)
+                        email.status = OutboundEmail.FAILED
+                        metrics.EMAILS.inc(outcome='failed')
+                    else:
+                        logger.warning("Email %s failed, retrying: %s", email.id, email.last_error)
+                        email.next_attempt_at = now + retry_delay(email.attempts)
+                        metrics.EMAILS.inc(outcome='retry')
+                    handled.append(email)
+                    if is_connection_error(e):
+                        self.close()
+                        break
+                else:
+                    email.status = OutboundEmail.SENT
+                    email.sent_at = timezone.now()
+                    email.attempts += 1
+                    email.last_error = ''
+                    metrics.EMAILS.inc(outcome='sent')
+                    handled.append(email)
+
+            OutboundEmail.objects.bulk_update(
+                handled, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'],
+            )
+        return len(handled)
+
+    def send_all(self, batch_size=DEFAULT_BATCH_SIZE):
+        """Send every due message; returns the number handled. Closes the connection when done."""
+        handled = 0
+        try:
+            while True:
+                count = self.send_batch(batch_size)
+                handled += count
+                if count < batch_size:
+                    return handled
+        finally:
+            self.close()
+
+
+def pending_count():
+    count = OutboundEmail.objects.filter(status=OutboundEmail.PENDING).count()
+    metrics.QUEUE_DEPTH.set(count, queue='outbound_email')
+    return count
+
+
+def purge_sent(older_than=KEEP_SENT):
+    """Delete sent messages older than `older_than`; failed ones stay for inspection."""
+    deleted, _ = OutboundEmail.objects.filter(
+        status=OutboundEmail.SENT, sent_at__lt=timezone.now() - older_than).delete()
+    return deleted
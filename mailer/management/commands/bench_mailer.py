@@ -0,0 +1,68 @@
+# mailer/management/commands/bench_mailer.py
+
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from mailer import delivery
+from mailer.backends import QueuedEmailBackend
+from mailer.models import OutboundEmail
+from mailer.smtp_sink import SmtpSink
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+SUBJECT = '[bench_mailer]'
+
+
+class Command(BaseCommand):
+    help = 'Compares queued, pooled delivery with one SMTP connection per message, against a local sink'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=delivery.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of messages the sink defers')
+
+    def handle(self, *args, **options):
+        # The worker sends whatever is due, so only run this on an empty queue
+        if OutboundEmail.objects.filter(status=OutboundEmail.PENDING).exists():
+            raise CommandError('Real mail is pending; run the benchmark on a database with an empty queue')
+        count = options['messages']
+        sink = SmtpSink(error_rate=options['error_rate']).start()
+        host, port = sink.address
+        smtp = {'host': host, 'port': port, 'username': '', 'password': '', 'use_tls': False, 'use_ssl': False}
+        messages = [
+            EmailMessage(f'{SUBJECT} {i}', 'Benchmark message\n' * 20, 'bench@example.com', [f'user{i}@example.com'])
+            for i in range(count)
+        ]
+        try:
+            # Before: every send_mail() opens its own connection inside the request
+            start = time.perf_counter()
+            for message in messages:
+                get_connection(SMTP_BACKEND, **smtp).send_messages([message])
+            direct = time.perf_counter() - start
+            direct_connections = sink.connections
+            self.stdout.write(
+                f"connection per message: {count / direct:8.0f} msg/s, "
+                f"{direct / count * 1000:.2f} ms in the request each, {direct_connections} connections"
+            )
+
+            start = time.perf_counter()
+            QueuedEmailBackend().send_messages(messages)
+            queued = time.perf_counter() - start
+
+            sink.messages.clear()
+            start = time.perf_counter()
+            mailer = delivery.Mailer(SMTP_BACKEND, **smtp)
+            handled = mailer.send_all(options['batch_size'])
+            pooled = time.perf_counter() - start
+            self.stdout.write(
+                f"queued + worker:        {handled / pooled:8.0f} msg/s, "
+                f"{queued / count * 1000:.2f} ms in the request each, "
+                f"{sink.connections - direct_connections} connections, {len(sink.messages)} delivered"
+            )
+            retrying = OutboundEmail.objects.filter(subject__startswith=SUBJECT, status=OutboundEmail.PENDING).count()
+            if retrying:
+                self.stdout.write(f"{retrying} deferred by the sink and waiting for retry")
+        finally:
+            OutboundEmail.objects.filter(subject__startswith=SUBJECT).delete()
+            sink.stop()
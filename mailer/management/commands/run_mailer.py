@@ -0,0 +1,43 @@
+# mailer/management/commands/run_mailer.py
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.notifications import send_hr_digests
+from mailer import delivery
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Queues HR application digests and delivers queued email over one connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=delivery.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit')
+
+    def handle(self, *args, **options):
+        mailer = delivery.Mailer()
+        last_purge = 0
+        while True:
+            try:
+                digests = send_hr_digests()
+                sent = mailer.send_all(options['batch_size'])
+                if time.monotonic() - last_purge > 3600:
+                    delivery.purge_sent()
+                    last_purge = time.monotonic()
+            except Exception:
+                # Keep the worker alive; failed rows stay pending
+                logger.exception("Mailer pass failed")
+                if options['once']:
+                    raise
+            else:
+                if digests or sent:
+                    self.stdout.write(f"Queued {digests} HR digests, handled {sent} emails")
+            delivery.pending_count()
+            if options['once']:
+                return
+            time.sleep(options['interval'])
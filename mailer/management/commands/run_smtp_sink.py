@@ -0,0 +1,31 @@
+# mailer/management/commands/run_smtp_sink.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from mailer.smtp_sink import SmtpSink
+
+
+class Command(BaseCommand):
+    help = 'Runs a local SMTP server that keeps mail; point EMAIL_HOST/EMAIL_PORT at it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of messages answered with 451')
+        parser.add_argument('--reject-domain', help='Recipients at this domain are refused with 550')
+
+    def handle(self, *args, **options):
+        sink = SmtpSink(port=options['port'], error_rate=options['error_rate'],
+                        reject_domain=options['reject_domain']).start()
+        host, port = sink.address
+        self.stdout.write(f"SMTP sink listening on {host}:{port}")
+        seen = 0
+        try:
+            while True:
+                time.sleep(1)
+                for sender, recipients, _ in sink.messages[seen:]:
+                    self.stdout.write(f"{sender} -> {', '.join(recipients)}")
+                seen = len(sink.messages)
+        except KeyboardInterrupt:
+            sink.stop()
@@ -0,0 +1,46 @@
+from django.db import models
+from django.db.models import Q
+
+
+class OutboundEmail(models.Model):
+    """An email waiting for, or done with, delivery by the mailer worker.
+
+    Stored by mailer.backends.QueuedEmailBackend; see mailer.delivery.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    # Lower goes first: password resets and confirmations before digests
+    NORMAL = 0
+    BULK = 1
+    PRIORITY_CHOICES = [(NORMAL, 'Normal'), (BULK, 'Bulk')]
+
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list)
+    bcc = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list)
+    subject = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    # [[content, mimetype], ...], e.g. the HTML part
+    alternatives = models.JSONField(default=list)
+    headers = models.JSONField(default=dict)
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=NORMAL)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's queue; sent mail drops out of it
+            models.Index(fields=['priority', 'next_attempt_at'], name='mailer_outbound_pending_idx',
+                         condition=Q(status='pending')),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
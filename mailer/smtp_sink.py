@@ -0,0 +1,113 @@
+# mailer/smtp_sink.py
+#
+# Local SMTP server that accepts and keeps mail, for tests and benchmarks.
+# Point EMAIL_HOST/EMAIL_PORT at it with EMAIL_USE_TLS=False. It speaks just
+# enough SMTP for smtplib: EHLO/HELO, AUTH PLAIN (any credentials), MAIL,
+# RCPT, DATA, RSET, NOOP and QUIT.
+import random
+import socketserver
+import threading
+
+
+def address(command):
+    """The address in "MAIL FROM:<a@b> SIZE=..." or "RCPT TO:<a@b>"."""
+    argument = command.split(':', 1)[1].strip() if ':' in command else ''
+    return argument.split(' ', 1)[0].strip('<>')
+
+class SmtpSink:
+    """Threaded SMTP server collecting messages in `messages`.
+
+    `error_rate` is the fraction of messages answered with a temporary 451
+    and `reject_domain` makes recipients at that domain fail with 550.
+    `connections` counts the SMTP sessions opened.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, error_rate=0.0, reject_domain=None):
+        self.error_rate = error_rate
+        self.reject_domain = reject_domain and reject_domain.lower()
+        self.messages = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self.server = socketserver.ThreadingTCPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def _handler_class(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(line.encode() + b'\r\n')
+
+            def handle(self):
+                with sink._lock:
+                    sink.connections += 1
+                self.reply('220 localhost SMTP sink')
+                sender, recipients = None, []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode('utf-8', 'replace').strip()
+                    verb = command.split(' ', 1)[0].upper()
+                    if verb == 'EHLO':
+                        self.reply('250-localhost')
+                        self.reply('250-8BITMIME')
+                        self.reply('250 AUTH PLAIN')
+                    elif verb == 'HELO':
+                        self.reply('250 localhost')
+                    elif verb == 'AUTH':
+                        self.reply('235 Authenticated')
+                    elif verb == 'MAIL':
+                        if random.random() < sink.error_rate:
+                            self.reply('451 Try again later')
+                            continue
+                        sender, recipients = address(command), []
+                        self.reply('250 OK')
+                    elif verb == 'RCPT':
+                        recipient = address(command)
+                        if sink.reject_domain and recipient.lower().endswith('@' + sink.reject_domain):
+                            self.reply('550 No such user')
+                            continue
+                        recipients.append(recipient)
+                        self.reply('250 OK')
+                    elif verb == 'DATA':
+                        self.reply('354 End data with <CR><LF>.<CR><LF>')
+                        lines = []
+                        while True:
+                            data = self.rfile.readline()
+                            if not data or data.rstrip(b'\r\n') == b'.':
+                                break
+                            lines.append(data[1:] if data.startswith(b'..') else data)
+                        with sink._lock:
+                            sink.messages.append((sender, recipients, b''.join(lines)))
+                        sender, recipients = None, []
+                        self.reply('250 OK queued')
+                    elif verb == 'RSET':
+                        sender, recipients = None, []
+                        self.reply('250 OK')
+                    elif verb == 'NOOP':
+                        self.reply('250 OK')
+                    elif verb == 'QUIT':
+                        self.reply('221 Bye')
+                        return
+                    else:
+                        self.reply('502 Command not implemented')
+
+        return Handler
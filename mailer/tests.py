@@ -0,0 +1,135 @@
+import smtplib
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .delivery import MAX_ATTEMPTS, Mailer
+from .models import OutboundEmail
+from .smtp_sink import SmtpSink
+
+LOCMEM = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class FailingBackend(BaseEmailBackend):
+    """Raises `error` for every message sent to `fail_to`, delivers the rest to the locmem outbox."""
+
+    def __init__(self, error=None, fail_to='bad@example.com', **kwargs):
+        super().__init__(**kwargs)
+        self.error = error
+        self.fail_to = fail_to
+        self.delivered = get_connection(LOCMEM)
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.fail_to in message.to:
+                raise self.error
+        return self.delivered.send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='mailer.backends.QueuedEmailBackend', MAILER_BACKEND=LOCMEM)
+class QueuedEmailBackendTests(TestCase):
+
+    def test_send_mail_is_queued(self):
+        send_mail('Confirm your job alert', 'Click the link', 'site@example.com', ['visitor@example.com'])
+
+        self.assertEqual(mail.outbox, [])
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.subject, email.to, email.status), ('Confirm your job alert', ['visitor@example.com'], 'pending'))
+        self.assertEqual(email.priority, OutboundEmail.NORMAL)
+
+    def test_bulk_priority(self):
+        get_connection(priority=OutboundEmail.BULK).send_messages([EmailMessage('Digest', 'Jobs', 'site@example.com', ['a@example.com'])])
+
+        self.assertEqual(OutboundEmail.objects.get().priority, OutboundEmail.BULK)
+
+    def test_rolled_back_mail_is_not_queued(self):
+        try:
+            with transaction.atomic():
+                send_mail('Welcome', 'Hello', 'site@example.com', ['visitor@example.com'])
+                raise ValueError
+        except ValueError:
+            pass
+
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_attachments_are_sent_directly(self):
+        message = EmailMessage('Applicants', 'Attached', 'site@example.com', ['hr@example.com'])
+        message.attach('applicants.csv', 'name\n', 'text/csv')
+
+        self.assertEqual(get_connection().send_messages([message]), 1)
+
+        self.assertFalse(OutboundEmail.objects.exists())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(EMAIL_BACKEND='mailer.backends.QueuedEmailBackend')
+class MailerTests(TestCase):
+
+    def queue(self, *recipients, priority=OutboundEmail.NORMAL):
+        # One call each, so they are due in this order
+        for to in recipients:
+            message = EmailMessage(f'To {to}', 'Body', 'site@example.com', [to], headers={'X-Tag': 'test'})
+            get_connection(priority=priority).send_messages([message])
+
+    def test_delivers_in_priority_order(self):
+        self.queue('digest@example.com', priority=OutboundEmail.BULK)
+        self.queue('reset@example.com')
+
+        self.assertEqual(Mailer(LOCMEM).send_all(), 2)
+
+        self.assertEqual([message.to for message in mail.outbox], [['reset@example.com'], ['digest@example.com']])
+        self.assertEqual(mail.outbox[0].extra_headers['X-Tag'], 'test')
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.SENT).exists())
+
+    def test_temporary_failure_is_retried_later(self):
+        self.queue('bad@example.com', 'good@example.com')
+
+        Mailer('mailer.tests.FailingBackend', error=smtplib.SMTPDataError(451, b'Try again later')).send_all()
+
+        email = OutboundEmail.objects.get(to=['bad@example.com'])
+        self.assertEqual((email.status, email.attempts), (OutboundEmail.PENDING, 1))
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        self.assertIn('Try again later', email.last_error)
+        self.assertEqual(OutboundEmail.objects.get(to=['good@example.com']).status, OutboundEmail.SENT)
+
+    def test_rejected_message_fails_at_once(self):
+        self.queue('bad@example.com')
+
+        Mailer('mailer.tests.FailingBackend', error=smtplib.SMTPDataError(550, b'No such user')).send_all()
+
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.FAILED)
+
+    def test_gives_up_after_max_attempts(self):
+        self.queue('bad@example.com')
+        OutboundEmail.objects.update(attempts=MAX_ATTEMPTS - 1)
+
+        Mailer('mailer.tests.FailingBackend', error=smtplib.SMTPDataError(451, b'Try again later')).send_all()
+
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.FAILED)
+
+    def test_connection_failure_leaves_the_rest_of_the_batch(self):
+        self.queue('bad@example.com', 'good@example.com')
+
+        Mailer('mailer.tests.FailingBackend', error=smtplib.SMTPServerDisconnected('gone')).send_all()
+
+        self.assertEqual(OutboundEmail.objects.get(to=['bad@example.com']).attempts, 1)
+        self.assertEqual(OutboundEmail.objects.get(to=['good@example.com']).attempts, 0)
+        self.assertEqual(mail.outbox, [])
+
+    def test_smtp_delivery_reuses_one_connection(self):
+        sink = SmtpSink(reject_domain='rejected.example.com').start()
+        self.addCleanup(sink.stop)
+        host, port = sink.address
+        self.queue('one@example.com', 'two@example.com', 'three@rejected.example.com')
+
+        Mailer('django.core.mail.backends.smtp.EmailBackend', host=host, port=port, username='', password='',
+               use_tls=False, use_ssl=False).send_all()
+
+        self.assertEqual(sink.connections, 1)
+        self.assertEqual([recipients for _, recipients, _ in sink.messages], [['one@example.com'], ['two@example.com']])
+        self.assertEqual(OutboundEmail.objects.get(to=['three@rejected.example.com']).status, OutboundEmail.FAILED)
@@ -0,0 +1,87 @@
+# payments/callbacks.py
+#
+# Ingestion and batch processing of Epoint result callbacks.
+#
+# The webhook view only verifies the signature and stores the raw callback;
+# process_batch() applies stored callbacks to orders through the payment
+# state machine, so replays and gateway retries are no-ops.
+import hashlib
+import logging
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+from jobsite import metrics
+from . import gateway, services
+from .models import PaymentCallback
+
+logger = logging.getLogger(__name__)
+
+
+def record(data, signature):
+    """Durably store a verified callback; an identical earlier callback makes this a no-op."""
+    payload_hash = hashlib.sha256(data.encode()).hexdigest()
+    # A single INSERT ... ON CONFLICT DO NOTHING
+    PaymentCallback.objects.bulk_create(
+        [PaymentCallback(data=data, signature=signature, payload_hash=payload_hash)],
+        ignore_conflicts=True,
+    )
+
+
+def process_batch(batch_size=100):
+    """Apply up to `batch_size` pending callbacks in one transaction.
+
+    Rows are claimed with SKIP LOCKED, so several workers can run side by
+    side. Returns the number of callbacks handled.
+    """
+    with transaction.atomic():
+        batch = list(
+            PaymentCallback.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('id')[:batch_size]
+        )
+        if not batch:
+            return 0
+
+        now = timezone.now()
+        for callback in batch:
+            callback.attempts += 1
+            try:
+                payload = gateway.decode_payload(callback.data)
+                callback.order_id = uuid.UUID(str(payload.get('order_id')))
+                callback.transaction_id = payload.get('transaction')
+                with transaction.atomic():
+                    changed = services.apply_gateway_status(
+                        callback.order_id,
+                        payload.get('status'),
+                        transaction_id=callback.transaction_id,
+                        card_mask=payload.get('card_mask'),
+                        card_name=payload.get('card_name'),
+                    )
+                outcome = payload.get('status') if changed else 'duplicate'
+                callback.status = 'processed'
+                callback.error = ''
+            except Exception as e:
+                logger.exception("Failed to apply payment callback %s", callback.id)
+                outcome = 'error'
+                callback.status = 'failed'
+                callback.error = str(e)
+            callback.processed_at = now
+            metrics.PAYMENT_CALLBACKS.inc(outcome=f'applied_{outcome}')
+
+        PaymentCallback.objects.bulk_update(
+            batch, ['status', 'order_id', 'transaction_id', 'attempts', 'error', 'processed_at'],
+        )
+    return len(batch)
+
+
+def pending_count():
+    count = PaymentCallback.objects.filter(status='pending').count()
+    metrics.QUEUE_DEPTH.set(count, queue='payment_callbacks')
+    return count
+
+
+def replay(queryset):
+    """Put already handled callbacks back on the queue."""
+    return queryset.exclude(status='pending').update(status='pending', processed_at=None, error='')
@@ -0,0 +1,261 @@
+# payments/gateway.py
+#
+# Client for the Epoint payment gateway.
+#
+# One client is shared per process: sync requests go through a pooled
+# keep-alive session. Async callers on the ASGI server's loop share a pooled
+# aiohttp session opened at lifespan startup and closed at shutdown
+# (jobsite.lifespan); callers on short-lived loops (async_to_sync under
+# WSGI) get a session per call, closed on that loop. Every call has
+# connect and read timeouts, idempotent calls are retried with jittered
+# backoff, and a circuit breaker fails fast while Epoint is degraded.
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import aiohttp
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from jobsite import metrics
+from jobsite.instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayError(Exception):
+    """Epoint could not be reached or rejected the request."""
+
+
+class GatewayUnavailable(GatewayError):
+    """The circuit breaker is open; Epoint was not called."""
+
+
+def sign(data):
+    """Epoint signature: base64(sha1(private_key + data + private_key))."""
+    signature_string = f"{settings.PRIVATE_KEY}{data}{settings.PRIVATE_KEY}"
+    return base64.b64encode(hashlib.sha1(signature_string.encode()).digest()).decode()
+
+
+def verify(data, signature):
+    return bool(data) and bool(signature) and hmac.compare_digest(sign(data), signature)
+
+
+def encode_payload(payload):
+    return base64.b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_payload(data):
+    return json.loads(base64.b64decode(data))
+
+
+def signed_request(payload):
+    data = encode_payload(payload)
+    return {'data': data, 'signature': sign(data)}
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; lets one probe through after `reset_timeout`."""
+
+    def __init__(self, threshold=5, reset_timeout=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning("Epoint circuit breaker opened after %s failures", self.failures)
+                self.opened_at = time.monotonic()
+
+
+class EpointClient:
+    def __init__(self, base_url=None, connect_timeout=None, read_timeout=None, max_retries=None,
+                 pool_size=None, breaker=None):
+        self.base_url = (base_url or settings.EPOINT_API_URL).rstrip('/')
+        self.connect_timeout = connect_timeout or settings.EPOINT_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or settings.EPOINT_READ_TIMEOUT
+        self.max_retries = settings.EPOINT_MAX_RETRIES if max_retries is None else max_retries
+        self.pool_size = pool_size or settings.EPOINT_POOL_SIZE
+        self.breaker = breaker or CircuitBreaker(settings.EPOINT_BREAKER_THRESHOLD, settings.EPOINT_BREAKER_RESET)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Pooled aiohttp sessions by event loop, see astart()
+        self._loop_sessions = {}
+
+    # -- public API --------------------------------------------------------
+
+    def request_payment(self, payload):
+        """Register a payment and return Epoint's response (contains redirect_url)."""
+        return self._call('/request', payload, idempotent=False)
+
+    def get_status(self, order_id):
+        """Look up the current state of a payment by our order id."""
+        payload = {'public_key': settings.PUBLIC_KEY, 'order_id': str(order_id)}
+        return self._call('/get-status', payload, idempotent=True)
+
+    async def arequest_payment(self, payload):
+        return await self._acall('/request', payload, idempotent=False)
+
+    async def aget_status(self, order_id):
+        payload = {'public_key': settings.PUBLIC_KEY, 'order_id': str(order_id)}
+        return await self._acall('/get-status', payload, idempotent=True)
+
+    async def astart(self):
+        """Open a pooled aiohttp session for the running loop; it lives until aclose()."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._loop_sessions:
+            self._loop_sessions[loop] = self._async_session()
+
+    async def aclose(self):
+        """Close the running loop's pooled session, if astart() opened one."""
+        session = self._loop_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    # -- internals ---------------------------------------------------------
+
+    def _attempts(self, idempotent):
+        return 1 + (self.max_retries if idempotent else 0)
+
+    def _backoff(self, attempt):
+        # Full jitter: sleep a random amount up to 0.2s, 0.4s, 0.8s, ...
+        return random.uniform(0, 0.2 * (2 ** attempt))
+
+    def _check_breaker(self, path):
+        if not self.breaker.allow():
+            metrics.EPOINT_REQUESTS.inc(outcome='circuit_open')
+            raise GatewayUnavailable(f"Epoint circuit open, not calling {path}")
+
+    def _handle_result(self, path, status_code, result):
+        if status_code >= 500:
+            self.breaker.record_failure()
+            metrics.EPOINT_REQUESTS.inc(outcome=f'http_{status_code}')
+            raise GatewayError(f"Epoint {path} returned HTTP {status_code}")
+        self.breaker.record_success()
+        if status_code != 200 or result is None:
+            metrics.EPOINT_REQUESTS.inc(outcome=f'http_{status_code}')
+            raise GatewayError(f"Epoint {path} returned HTTP {status_code}")
+        if result.get('status') == 'error':
+            metrics.EPOINT_REQUESTS.inc(outcome='rejected')
+            raise GatewayError(f"Epoint {path} rejected the request: {result.get('message')}")
+        metrics.EPOINT_REQUESTS.inc(outcome='success')
+        return result
+
+    def _call(self, path, payload, idempotent):
+        self._check_breaker(path)
+        url = self.base_url + path
+        attempts = self._attempts(idempotent)
+        for attempt in range(attempts):
+            try:
+                with timed('epoint'):
+                    response = self.session.post(
+                        url, data=signed_request(payload), timeout=(self.connect_timeout, self.read_timeout),
+                    )
+                if response.status_code >= 500 and attempt + 1 < attempts:
+                    time.sleep(self._backoff(attempt))
+                    continue
+                result = response.json() if response.status_code == 200 else None
+                return self._handle_result(path, response.status_code, result)
+            except (requests.RequestException, ValueError) as e:
+                if attempt + 1 < attempts:
+                    time.sleep(self._backoff(attempt))
+                    continue
+                self.breaker.record_failure()
+                metrics.EPOINT_REQUESTS.inc(outcome='network_error')
+                raise GatewayError(f"Epoint {path} failed: {e}") from e
+
+    def _async_session(self):
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout),
+        )
+
+    @asynccontextmanager
+    async def _session(self):
+        session = self._loop_sessions.get(asyncio.get_running_loop())
+        if session is not None:
+            yield session
+            return
+        # No pooled session on this loop; close this one before the loop goes away
+        async with self._async_session() as session:
+            yield session
+
+    async def _acall(self, path, payload, idempotent):
+        self._check_breaker(path)
+        url = self.base_url + path
+        attempts = self._attempts(idempotent)
+        # Retries reuse the session's kept-alive connection
+        async with self._session() as session:
+            for attempt in range(attempts):
+                try:
+                    with timed('epoint'):
+                        async with session.post(url, data=signed_request(payload)) as response:
+                            status_code = response.status
+                            result = await response.json(content_type=None) if status_code == 200 else None
+                    if status_code >= 500 and attempt + 1 < attempts:
+                        await asyncio.sleep(self._backoff(attempt))
+                        continue
+                    return self._handle_result(path, status_code, result)
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    if attempt + 1 < attempts:
+                        await asyncio.sleep(self._backoff(attempt))
+                        continue
+                    self.breaker.record_failure()
+                    metrics.EPOINT_REQUESTS.inc(outcome='network_error')
+                    raise GatewayError(f"Epoint {path} failed: {e}") from e
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide EpointClient."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = EpointClient()
+    return _client
@@ -0,0 +1,44 @@
+# payments/management/commands/bench_epoint_client.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from payments import gateway
+from payments.stub_gateway import StubGateway
+
+
+class Command(BaseCommand):
+    help = 'Compares unpooled requests.post with the pooled EpointClient against the local stub gateway'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--latency', type=float, default=0.0, help='Stub response delay in seconds')
+
+    def handle(self, *args, **options):
+        stub = StubGateway(settings.PRIVATE_KEY, latency=options['latency']).start()
+        client = gateway.EpointClient(base_url=stub.base_url, pool_size=options['concurrency'])
+
+        def payload():
+            return {'public_key': settings.PUBLIC_KEY, 'order_id': str(uuid4()), 'amount': '20.00'}
+
+        def unpooled(_):
+            requests.post(f'{stub.base_url}/request', data=gateway.signed_request(payload()), timeout=10)
+
+        def pooled(_):
+            client.request_payment(payload())
+
+        try:
+            for label, func in (('requests.post (no session)', unpooled), ('EpointClient (pooled)', pooled)):
+                start = time.perf_counter()
+                with ThreadPoolExecutor(options['concurrency']) as pool:
+                    list(pool.map(func, range(options['requests'])))
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"{label:28} {options['requests'] / elapsed:8.1f} req/s")
+        finally:
+            stub.stop()
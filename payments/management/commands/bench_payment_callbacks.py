@@ -0,0 +1,81 @@
+# payments/management/commands/bench_payment_callbacks.py
+
+import asyncio
+import random
+import time
+from uuid import uuid4
+
+import aiohttp
+from django.core.management.base import BaseCommand
+
+from payments import callbacks, gateway
+from payments.models import Order, PaymentCallback
+
+
+class Command(BaseCommand):
+    help = 'Posts generated, signed Epoint callbacks at a running server, then times the batch processor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/payments/result/')
+        parser.add_argument('--count', type=int, default=5000)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--duplicates', type=float, default=0.2, help='Fraction of callbacks sent twice, like gateway retries')
+        parser.add_argument('--use-pending-orders', action='store_true', help='Address pending orders from the database')
+        parser.add_argument('--process', action='store_true', help='Drain the queue afterwards and report processing rate')
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if options['use_pending_orders']:
+            order_ids = [str(o) for o in Order.objects.filter(status='pending').values_list('order_id', flat=True)[:options['count']]]
+        else:
+            order_ids = [str(uuid4()) for _ in range(options['count'])]
+
+        bodies = []
+        for order_id in order_ids:
+            payload = {
+                'order_id': order_id,
+                'status': random.choice(['success', 'success', 'success', 'failed']),
+                'transaction': f'te{uuid4().hex[:12]}',
+                'amount': '20.00',
+                'card_mask': '400000******0000',
+            }
+            body = gateway.signed_request(payload)
+            bodies.append(body)
+            if random.random() < options['duplicates']:
+                bodies.append(body)
+        random.shuffle(bodies)
+
+        elapsed, errors = asyncio.run(self.send(options['url'], bodies, options['concurrency']))
+        self.stdout.write(f"Acknowledged {len(bodies) - errors}/{len(bodies)} callbacks in {elapsed:.2f}s "
+                          f"({len(bodies) / elapsed:,.0f}/s)")
+
+        if options['process']:
+            queued = PaymentCallback.objects.filter(status='pending').count()
+            start = time.perf_counter()
+            while callbacks.process_batch(options['batch_size']):
+                pass
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"Processed {queued} stored callbacks in {elapsed:.2f}s ({queued / max(elapsed, 1e-9):,.0f}/s)")
+
+    async def send(self, url, bodies, concurrency):
+        errors = 0
+        queue = asyncio.Queue()
+        for body in bodies:
+            queue.put_nowait(body)
+
+        async def worker(session):
+            nonlocal errors
+            while not queue.empty():
+                body = queue.get_nowait()
+                try:
+                    async with session.post(url, data=body) as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                except aiohttp.ClientError:
+                    errors += 1
+
+        start = time.perf_counter()
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+            await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        return time.perf_counter() - start, errors
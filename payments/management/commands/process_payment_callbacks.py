@@ -0,0 +1,27 @@
+# payments/management/commands/process_payment_callbacks.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments import callbacks
+
+
+class Command(BaseCommand):
+    help = 'Applies stored Epoint callbacks to orders in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = callbacks.process_batch(options['batch_size'])
+            if processed:
+                self.stdout.write(f"Processed {processed} callbacks")
+                continue
+            callbacks.pending_count()
+            if options['once']:
+                return
+            time.sleep(options['interval'])
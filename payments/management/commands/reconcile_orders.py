@@ -0,0 +1,92 @@
+# payments/management/commands/reconcile_orders.py
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from jobsite import metrics
+from payments import gateway, services
+from payments.models import Order
+
+logger = logging.getLogger(__name__)
+
+# Epoint get-status values that settle an order; anything else stays pending
+SETTLED_STATUSES = {
+    'success': 'success',
+    'failed': 'failed',
+    'error': 'failed',
+    'returned': 'failed',
+}
+
+
+class Command(BaseCommand):
+    help = 'Resolves orders stuck in pending by asking Epoint for their status'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=30, help='Only orders pending for at least this many minutes')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent status requests')
+        parser.add_argument('--batch-size', type=int, default=200, help='Orders per status round and transaction')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many orders')
+        parser.add_argument('--gateway-url', help='Override EPOINT_API_URL, e.g. a run_stub_gateway instance')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['gateway_url']:
+            client = gateway.EpointClient(base_url=options['gateway_url'], pool_size=options['workers'])
+        else:
+            client = gateway.get_client()
+
+        cutoff = timezone.now() - timedelta(minutes=options['older_than'])
+        pending = Order.objects.filter(status='pending', created_at__lt=cutoff).order_by('id')
+
+        last_id = 0
+        totals = {'checked': 0, 'success': 0, 'failed': 0, 'unchanged': 0, 'errors': 0}
+        with ThreadPoolExecutor(options['workers']) as pool:
+            while options['limit'] is None or totals['checked'] < options['limit']:
+                size = options['batch_size']
+                if options['limit'] is not None:
+                    size = min(size, options['limit'] - totals['checked'])
+                batch = list(pending.filter(id__gt=last_id).values_list('id', 'order_id')[:size])
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+
+                try:
+                    statuses = list(pool.map(lambda row: self.fetch_status(client, row[1]), batch))
+                except gateway.GatewayUnavailable as e:
+                    self.stderr.write(f"Stopping: {e}")
+                    break
+
+                with transaction.atomic():
+                    for (_, order_id), status in zip(batch, statuses):
+                        totals['checked'] += 1
+                        if status is None:
+                            totals['errors'] += 1
+                            metrics.RECONCILED_ORDERS.inc(result='error')
+                            continue
+                        result = SETTLED_STATUSES.get(status)
+                        if result is None or options['dry_run']:
+                            totals['unchanged'] += 1
+                            metrics.RECONCILED_ORDERS.inc(result='unchanged')
+                            continue
+                        changed = services.apply_gateway_status(order_id, result)
+                        outcome = result if changed else 'unchanged'
+                        totals[outcome] += 1
+                        metrics.RECONCILED_ORDERS.inc(result=outcome)
+
+        self.stdout.write(self.style.SUCCESS(
+            'Checked {checked} orders: {success} paid, {failed} failed, {unchanged} unchanged, {errors} errors'.format(**totals)
+        ))
+
+    def fetch_status(self, client, order_id):
+        try:
+            return client.get_status(order_id).get('status')
+        except gateway.GatewayUnavailable:
+            raise
+        except gateway.GatewayError as e:
+            logger.warning("Status lookup for order %s failed: %s", order_id, e)
+            return None
@@ -0,0 +1,36 @@
+# payments/management/commands/replay_payment_callbacks.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from payments import callbacks
+from payments.models import PaymentCallback
+
+
+class Command(BaseCommand):
+    help = 'Re-queues stored Epoint callbacks so process_payment_callbacks applies them again'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--id', type=int, action='append', dest='ids', help='Callback id (repeatable)')
+        parser.add_argument('--order', help='Replay every callback for this order id')
+        parser.add_argument('--since', help='Replay callbacks received at or after this ISO timestamp')
+        parser.add_argument('--failed', action='store_true', help='Only replay callbacks that failed to apply')
+
+    def handle(self, *args, **options):
+        queryset = PaymentCallback.objects.all()
+        if options['ids']:
+            queryset = queryset.filter(id__in=options['ids'])
+        if options['order']:
+            queryset = queryset.filter(order_id=options['order'])
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid timestamp: {options['since']}")
+            queryset = queryset.filter(received_at__gte=since)
+        if options['failed']:
+            queryset = queryset.filter(status='failed')
+        if not (options['ids'] or options['order'] or options['since'] or options['failed']):
+            raise CommandError('Pass at least one of --id, --order, --since or --failed')
+
+        replayed = callbacks.replay(queryset)
+        self.stdout.write(self.style.SUCCESS(f"Re-queued {replayed} callbacks"))
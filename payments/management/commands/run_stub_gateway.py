@@ -0,0 +1,30 @@
+# payments/management/commands/run_stub_gateway.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from payments.stub_gateway import StubGateway
+
+
+class Command(BaseCommand):
+    help = 'Runs a local Epoint stand-in; point EPOINT_API_URL at the printed URL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+        parser.add_argument('--default-status', default='success', help='Status returned by get-status')
+
+    def handle(self, *args, **options):
+        stub = StubGateway(
+            settings.PRIVATE_KEY,
+            port=options['port'],
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            default_status=options['default_status'],
+        )
+        self.stdout.write(f"Stub Epoint gateway listening at {stub.base_url}")
+        try:
+            stub.serve_forever()
+        except KeyboardInterrupt:
+            stub.stop()
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_paymentcallback'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='archived_job_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -10,6 +10,7 @@ class Order(models.Model):
 
     order_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     job = models.OneToOneField('jobs.JobPost', on_delete=models.CASCADE, null=True, blank=True)
+    archived_job_id = models.BigIntegerField(null=True, blank=True)  # ArchivedJobPost id once the job is archived
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     transaction_id = models.CharField(max_length=100, null=True, blank=True)
@@ -25,3 +26,32 @@ class Order(models.Model):
             models.Index(fields=['order_id']),
             models.Index(fields=['status']),
         ]
+
+
+class PaymentCallback(models.Model):
+    """Raw Epoint result callback, stored on receipt and applied by a worker."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    ]
+
+    data = models.TextField()
+    signature = models.CharField(max_length=100)
+    payload_hash = models.CharField(max_length=64, unique=True)  # gateway retries of the same callback collapse here
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    order_id = models.UUIDField(null=True, blank=True)
+    transaction_id = models.CharField(max_length=100, null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Callback {self.id} - {self.status}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='payments_callback_queue_idx'),
+            models.Index(fields=['order_id'], name='payments_callback_order_idx'),
+        ]
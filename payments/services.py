@@ -0,0 +1,81 @@
+# payments/services.py
+#
+# Payment state machine. Orders only move out of `pending`:
+#
+#     pending -> paid     (job marked is_paid)
+#     pending -> failed   (job soft-deleted)
+#
+# Each transition is a single SQL statement: a conditional UPDATE on the
+# order whose RETURNING feeds the UPDATE of the linked job. Whoever gets
+# there first (success redirect, webhook worker, reconciliation) wins; every
+# other caller sees False and changes nothing.
+from django.db import connection, transaction
+
+from jobs import ranking
+from jobs.caching import invalidate_job_detail
+from jobs.feeds import FEED_GROUP
+from jobs.models import JobPost
+from jobs.sitemaps import SITEMAP_GROUP
+from jobsite import prebuilt
+from .models import Order
+
+_TRANSITION_SQL = """
+WITH moved AS (
+    UPDATE {order_table}
+    SET status = %s,
+        transaction_id = COALESCE(%s, transaction_id),
+        card_mask = COALESCE(%s, card_mask),
+        card_name = COALESCE(%s, card_name)
+    WHERE order_id = %s AND status = 'pending'
+    RETURNING job_id
+), job AS (
+    UPDATE {job_table}
+    SET {job_update}
+    FROM moved
+    WHERE {job_table}.id = moved.job_id
+)
+SELECT job_id FROM moved
+"""
+
+
+def _jobs_changed(job_ids):
+    if not job_ids:
+        return
+    invalidate_job_detail(*job_ids)
+    prebuilt.mark_stale(SITEMAP_GROUP)
+    prebuilt.mark_stale(FEED_GROUP)
+
+
+def _transition(order_id, new_status, job_update, transaction_id=None, card_mask=None, card_name=None):
+    sql = _TRANSITION_SQL.format(
+        order_table=connection.ops.quote_name(Order._meta.db_table),
+        job_table=connection.ops.quote_name(JobPost._meta.db_table),
+        job_update=job_update,
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [new_status, transaction_id, card_mask, card_name, str(order_id)])
+            moved = cursor.fetchall()
+    # One row per order moved; job_id is NULL once the job has been archived
+    job_ids = [job_id for (job_id,) in moved if job_id is not None]
+    # Raw SQL skips post_save, so do what the JobPost signals would
+    transaction.on_commit(lambda: _jobs_changed(job_ids))
+    return bool(moved)
+
+
+def mark_paid(order_id, transaction_id=None, card_mask=None, card_name=None):
+    """pending -> paid, and mark the job as paid. Returns True if this call made the change."""
+    job_update = f'is_paid = TRUE, updated_at = now(), rank_score = rank_score + {ranking.PAID_WEIGHT}'
+    return _transition(order_id, 'paid', job_update, transaction_id, card_mask, card_name)
+
+
+def mark_failed(order_id, transaction_id=None):
+    """pending -> failed, and soft-delete the job. Returns True if this call made the change."""
+    return _transition(order_id, 'failed', 'deleted = TRUE, updated_at = now(), rank_score = 0', transaction_id)
+
+
+def apply_gateway_status(order_id, status, **details):
+    """Apply an Epoint result status ('success' or anything else) to an order."""
+    if status == 'success':
+        return mark_paid(order_id, **details)
+    return mark_failed(order_id, transaction_id=details.get('transaction_id'))
@@ -0,0 +1,110 @@
+# payments/stub_gateway.py
+#
+# Local stand-in for the Epoint API, used for tests and benchmarks.
+# It speaks the same signed data/signature form protocol as the real gateway.
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from uuid import uuid4
+
+
+class StubGateway:
+    """Threaded HTTP server answering /api/1/request and /api/1/get-status.
+
+    `latency` delays every response, `error_rate` is the fraction answered
+    with HTTP 503, and `statuses` maps order ids to the status returned by
+    get-status (unknown orders get `default_status`).
+    """
+
+    def __init__(self, private_key, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0,
+                 default_status='success'):
+        self.private_key = private_key or ''
+        self.latency = latency
+        self.error_rate = error_rate
+        self.default_status = default_status
+        self.statuses = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/api/1'
+
+    def sign(self, data):
+        signature_string = f"{self.private_key}{data}{self.private_key}"
+        return base64.b64encode(hashlib.sha1(signature_string.encode()).digest()).decode()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def _respond(self, path, form):
+        data = form.get('data', [''])[0]
+        if self.sign(data) != form.get('signature', [''])[0]:
+            return 400, {'status': 'error', 'message': 'Invalid signature'}
+        payload = json.loads(base64.b64decode(data))
+        order_id = payload.get('order_id')
+        with self._lock:
+            self.requests.append((path, payload))
+
+        if path == '/api/1/request':
+            with self._lock:
+                self.statuses.setdefault(order_id, self.default_status)
+            return 200, {
+                'status': 'success',
+                'transaction': f'te{uuid4().hex[:12]}',
+                'redirect_url': f'{self.base_url}/checkout/{order_id}',
+            }
+        if path == '/api/1/get-status':
+            with self._lock:
+                status = self.statuses.get(order_id, self.default_status)
+            return 200, {
+                'status': status,
+                'order_id': order_id,
+                'transaction': f'te{hashlib.md5(str(order_id).encode()).hexdigest()[:12]}',
+            }
+        return 404, {'status': 'error', 'message': 'Unknown endpoint'}
+
+    def _handler_class(self):
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                form = parse_qs(self.rfile.read(length).decode())
+                if gateway.latency:
+                    time.sleep(gateway.latency)
+                if gateway.error_rate and random.random() < gateway.error_rate:
+                    status, body = 503, {'status': 'error', 'message': 'Service unavailable'}
+                else:
+                    status, body = gateway._respond(self.path, form)
+                encoded = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -1,3 +1,180 @@
-from django.test import TestCase
+import asyncio
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from jobs.models import JobPost
+from users.models import CustomUser
+from . import services
+from .gateway import EpointClient
+from .models import Order
+from .stub_gateway import StubGateway
+
+
+class TransitionRaceTests(TransactionTestCase):
+    """The success redirect, the webhook worker and reconciliation may apply
+    the same result at once; exactly one of them may move the order."""
+
+    def setUp(self):
+        user = CustomUser.objects.create_user(email='hr@example.com', password='password')
+        self.job = JobPost.objects.create(
+            title='Backend Developer', description='Python', company='Example LLC', location='Baku', posted_by=user,
+        )
+        self.order = Order.objects.create(job=self.job, amount=10)
+
+    def race(self, *calls):
+        barrier = threading.Barrier(len(calls))
+        results = [None] * len(calls)
+
+        def run(index, call):
+            try:
+                barrier.wait()
+                results[index] = call()
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_mark_paid_transitions_once(self):
+        rank_score = JobPost.objects.get(id=self.job.id).rank_score
+        results = self.race(*[lambda: services.mark_paid(self.order.order_id, transaction_id='te1')] * 8)
+
+        self.assertEqual(results.count(True), 1)
+        self.order.refresh_from_db()
+        self.job.refresh_from_db()
+        self.assertEqual(self.order.status, 'paid')
+        self.assertTrue(self.job.is_paid)
+        # The paid bonus is applied once, not once per caller
+        self.assertAlmostEqual(self.job.rank_score, rank_score + services.ranking.PAID_WEIGHT, places=3)
+
+    def test_paid_and_failed_race_has_one_winner(self):
+        results = self.race(
+            lambda: services.mark_paid(self.order.order_id),
+            lambda: services.mark_failed(self.order.order_id),
+        )
+
+        self.assertEqual(results.count(True), 1)
+        self.order.refresh_from_db()
+        self.job.refresh_from_db()
+        if results[0]:
+            self.assertEqual(self.order.status, 'paid')
+            self.assertEqual((self.job.is_paid, self.job.deleted), (True, False))
+        else:
+            self.assertEqual(self.order.status, 'failed')
+            self.assertEqual((self.job.is_paid, self.job.deleted), (False, True))
+
+    def test_order_without_job(self):
+        order = Order.objects.create(job=None, archived_job_id=self.job.id, amount=10)
+        with mock.patch.object(services, 'invalidate_job_detail') as invalidate:
+            self.assertTrue(services.mark_paid(order.order_id))
+            self.assertFalse(services.mark_paid(order.order_id))
+        invalidate.assert_not_called()
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'paid')
+
+
+class AsyncSessionTests(SimpleTestCase):
+
+    def status_calls(self, pooled):
+        """Make two get_status calls; returns the server-side transport each arrived on."""
+        transports = []
+
+        async def get_status(request):
+            transports.append(request.transport)
+            return web.json_response({'status': 'success'})
+
+        async def run():
+            app = web.Application()
+            app.router.add_post('/get-status', get_status)
+            async with TestServer(app) as server:
+                client = EpointClient(base_url=str(server.make_url('')), max_retries=0)
+                if pooled:
+                    await client.astart()
+                await client.aget_status(1)
+                await client.aget_status(2)
+                await client.aclose()
+                self.assertEqual(client._loop_sessions, {})
+
+        asyncio.run(run())
+        return transports
+
+    def test_started_loop_reuses_one_connection(self):
+        first, second = self.status_calls(pooled=True)
+
+        self.assertIs(first, second)
+
+    def test_other_loops_get_a_session_per_call(self):
+        first, second = self.status_calls(pooled=False)
+
+        self.assertIsNot(first, second)
+
+
+@override_settings(PRIVATE_KEY='test-private-key', PUBLIC_KEY='test-public-key')
+class ReconcileOrdersTests(TestCase):
+
+    def setUp(self):
+        self.gateway = StubGateway('test-private-key', default_status='pending').start()
+        self.addCleanup(self.gateway.stop)
+        self.user = CustomUser.objects.create_user(email='hr@example.com')
+
+    def order(self, gateway_status):
+        job = JobPost.objects.create(
+            title=f'Job {gateway_status}', description='Python', company='Example LLC', location='Baku',
+            posted_by=self.user,
+        )
+        order = Order.objects.create(job=job, amount=10)
+        self.gateway.statuses[str(order.order_id)] = gateway_status
+        return order
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('reconcile_orders', '--older-than', '0', '--gateway-url', self.gateway.base_url, *args, stdout=out)
+        return out.getvalue()
+
+    def test_settles_orders_by_gateway_status(self):
+        paid = self.order('success')
+        failed = self.order('failed')
+        pending = self.order('pending')
+        # Epoint answers status "error" for a lookup it couldn't serve
+        unknown = self.order('error')
+
+        output = self.reconcile()
+
+        self.assertIn('Checked 4 orders: 1 paid, 1 failed, 1 unchanged, 1 errors', output)
+        statuses = dict(Order.objects.values_list('id', 'status'))
+        self.assertEqual(
+            [statuses[order.id] for order in (paid, failed, pending, unknown)],
+            ['paid', 'failed', 'pending', 'pending'],
+        )
+        jobs = {job.id: job for job in JobPost.objects.all()}
+        self.assertTrue(jobs[paid.job_id].is_paid)
+        self.assertTrue(jobs[failed.job_id].deleted)
+        self.assertFalse(jobs[pending.job_id].is_paid or jobs[pending.job_id].deleted)
+
+    def test_recent_orders_are_left_alone(self):
+        order = self.order('success')
+
+        call_command('reconcile_orders', '--gateway-url', self.gateway.base_url, stdout=StringIO())
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'pending')
+        self.assertEqual(self.gateway.requests, [])
+
+    def test_dry_run_changes_nothing(self):
+        order = self.order('success')
+
+        self.assertIn('1 unchanged', self.reconcile('--dry-run'))
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'pending')
@@ -0,0 +1,38 @@
+// Live applicant updates for HR pages, pushed by jobs.consumers.ApplicantFeedConsumer.
+// liveApplicants('/ws/hr/applicants/', function (event) { ... }) calls the
+// handler for every created or rescored application and reconnects after
+// network errors and deploys.
+function liveApplicants(path, onEvent) {
+    var scheme = window.location.protocol === 'https:' ? 'wss://' : 'ws://';
+    var delay = 1000;
+    var keepalive = null;
+
+    function connect() {
+        var socket = new WebSocket(scheme + window.location.host + path);
+        socket.onopen = function () {
+            delay = 1000;
+            // Keeps proxies from closing the idle connection
+            keepalive = setInterval(function () {
+                socket.send(JSON.stringify({type: 'ping'}));
+            }, 30000);
+        };
+        socket.onmessage = function (message) {
+            var event = JSON.parse(message.data);
+            if (event.event !== 'pong') {
+                onEvent(event);
+            }
+        };
+        socket.onclose = function (close) {
+            clearInterval(keepalive);
+            if (close.code === 4403) {
+                return;
+            }
+            setTimeout(connect, delay + Math.random() * 1000);
+            delay = Math.min(delay * 2, 60000);
+        };
+    }
+
+    if ('WebSocket' in window) {
+        connect();
+    }
+}